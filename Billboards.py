@@ -16,11 +16,13 @@ import numpy as np
 
 ''' VTK '''
 import vtk
+from vtk.util import numpy_support as nps
 
 class TextBillboard(vtk.vtkTextActor):
     ''' a fixed-size text label (i.e. a 2D label in the 3D world) '''
     def __init__(self, text, text_size=None):
         self.vtkTransform = None
+        self.transform_mtime = None
         self.pos = vtk.vtkCoordinate()
         self.SetInput(text)
         self.GetTextProperty().BoldOn()
@@ -47,14 +49,10 @@ class TextBillboard(vtk.vtkTextActor):
         prop.SetOrientation(roll)
 
     def ApplyTransformation(self):
-        mat = self.vtkTransform.GetMatrix()
-        a = np.zeros((4,4))
-
-        for r in xrange(4):
-            for c in xrange(4):
-                a[r][c] = mat.GetElement(r, c)
-
-        self.SetPosition(a[0,3],a[1,3],a[2,3])
+        # only the translation of the transform matters to a billboard
+        self.transform_mtime = self.vtkTransform.GetMTime()
+        x, y, z = self.vtkTransform.GetPosition()
+        self.SetPosition(x, y, z)
 
     def SetUserTransform(self, transform):
         self.vtkTransform = transform
@@ -63,36 +61,32 @@ class TextBillboard(vtk.vtkTextActor):
     def GetUserTransform(self):
         return self.vtkTransform
 
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - follows changes anywhere up the transform's chain of parent directory
+        # transforms, whose modified times a concatenated vtkTransform includes in its own
+        if self.vtkTransform is not None and self.vtkTransform.GetMTime() != self.transform_mtime:
+            self.ApplyTransformation()
+
 class ImageBillboard(vtk.vtkTexturedActor2D):
-    ''' a fixed-size billboard for images (i.e. a 2D sprite in the 3D world) '''
+    ''' a fixed-size billboard for images (i.e. a 2D sprite in the 3D world) - the image is packed into the shared image
+    atlas, so all image billboards use one texture '''
     def __init__(self, image_path, width=None, height=None):
         self.vtkTransform = None
+        self.transform_mtime = None
         self.pos = vtk.vtkCoordinate()
-        if image_path[-4:].lower() == '.jpg' or image_path[-4:].lower() == '.jpeg':
-            reader = vtk.vtkJPEGReader()
-            reader.SetFileName(image_path)
-            reader.Update()
-        elif image_path[-4:].lower() == '.png':
-            reader = vtk.vtkPNGReader()
-            reader.SetFileName(image_path)
-            reader.Update()
-        texture = vtk.vtkTexture()
-        texture.SetInputConnection(reader.GetOutputPort())
-        image_dims = reader.GetOutput().GetDimensions()
-
-        self.SetTexture(texture)
-
-        if width is not None and height is not None:
-            self.construct(width, height)
-        else:
-            self.construct(image_dims[0], image_dims[1])
-
-    def construct(self, width, height):
+        self.atlas = imageAtlas()
+        self.atlas_generation = None
+        self.image_path = None
+        self.width = width
+        self.height = height
+        self.roll = 0.0
+        self.half_size = (0.0, 0.0)
+        self.construct()
+        self.SetImage(image_path)
+
+    def construct(self):
         points = vtk.vtkPoints()
-        points.InsertNextPoint([-float(width)/2, -float(height)/2, 0.0])
-        points.InsertNextPoint([float(width)/2, -float(height)/2, 0.0])
-        points.InsertNextPoint([float(width)/2, float(height)/2, 0.0])
-        points.InsertNextPoint([-float(width)/2, float(height)/2, 0.0])
+        points.SetNumberOfPoints(4)
 
         polys = vtk.vtkCellArray()
         poly = vtk.vtkPolygon()
@@ -109,11 +103,8 @@ class ImageBillboard(vtk.vtkTexturedActor2D):
 
         texCoords = vtk.vtkFloatArray()
         texCoords.SetNumberOfComponents(2)
+        texCoords.SetNumberOfTuples(4)
         texCoords.SetName("TextureCoordinates")
-        texCoords.InsertNextTuple((0.0, 0.0))
-        texCoords.InsertNextTuple((1.0, 0.0))
-        texCoords.InsertNextTuple((1.0, 1.0))
-        texCoords.InsertNextTuple((0.0, 1.0))
 
         self.data.GetPointData().SetTCoords(texCoords)
 
@@ -128,40 +119,438 @@ class ImageBillboard(vtk.vtkTexturedActor2D):
 
         self.SetMapper(mapper)
 
+    def SetImage(self, image_path):
+        # pack the image into the atlas (once per image file) and point the quad at it
+        self.image_path = image_path
+        addAtlasImage(image_path)
+        image_width, image_height = self.atlas.GetSize(image_path)
+        width = self.width if self.width is not None and self.height is not None else image_width
+        height = self.height if self.width is not None and self.height is not None else image_height
+        self.half_size = (float(width)/2, float(height)/2)
+        self._updateCorners()
+        vtk.vtkTexturedActor2D.SetTexture(self, self.atlas.GetTexture())
+        self._updateTextureCoordinates()
+
+    def _updateCorners(self):
+        # the quad corners, rotated by roll degrees about the billboard position
+        c = math.cos(math.radians(self.roll))
+        s = math.sin(math.radians(self.roll))
+        w, h = self.half_size
+        points = self.data.GetPoints()
+        points.SetPoint(0, -c*w + s*h, -s*w - c*h, 0.0)
+        points.SetPoint(1, c*w + s*h, s*w - c*h, 0.0)
+        points.SetPoint(2, c*w - s*h, s*w + c*h, 0.0)
+        points.SetPoint(3, -c*w - s*h, -s*w + c*h, 0.0)
+        points.Modified()
+        self.data.Modified()
+
+    def _updateTextureCoordinates(self):
+        self.atlas_generation = self.atlas.generation
+        u0, v0, u1, v1 = self.atlas.GetTextureCoordinates(self.image_path)
+        texCoords = self.data.GetPointData().GetTCoords()
+        texCoords.SetTuple2(0, u0, v0)
+        texCoords.SetTuple2(1, u1, v0)
+        texCoords.SetTuple2(2, u1, v1)
+        texCoords.SetTuple2(3, u0, v1)
+        texCoords.Modified()
+        self.data.Modified()
+
     def SetPosition(self, x, y, z):
         self.pos.SetValue(x, y, z)
 
     def SetOrientation(self, roll, pitch, yaw):
-        t = vtk.vtkTransform()
-        t.RotateZ(roll)
-        tf = vtk.vtkTransformPolyDataFilter()
-        tf.SetInput(self.data)
-        tf.SetTransform(t)
-        tf.Update()
+        # billboards only rotate in the screen plane - the quad corners are rewritten in place
+        self.roll = roll
+        self._updateCorners()
 
-        coordView = vtk.vtkCoordinate()
-        coordView.SetReferenceCoordinate(self.pos)
-        coordView.SetCoordinateSystemToViewport()
+    def ApplyTransformation(self):
+        # only the translation of the transform matters to a billboard
+        self.transform_mtime = self.vtkTransform.GetMTime()
+        x, y, z = self.vtkTransform.GetPosition()
+        self.SetPosition(x, y, z)
 
+    def SetUserTransform(self, transform):
+        self.vtkTransform = transform
+        self.ApplyTransformation()
+
+    def GetUserTransform(self):
+        return self.vtkTransform
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - follows changes anywhere up the transform's chain of parent directory
+        # transforms, whose modified times a concatenated vtkTransform includes in its own
+        if self.vtkTransform is not None and self.vtkTransform.GetMTime() != self.transform_mtime:
+            self.ApplyTransformation()
+        if self.atlas.generation != self.atlas_generation:
+            # the atlas grew since the texture coordinates were set
+            self._updateTextureCoordinates()
+
+def isBillboard(actor):
+    # billboards (and label and sprite layers) are 2D overlays positioned by world points - they have no scale, offset or render mode
+    return isinstance(actor, (TextBillboard, ImageBillboard, LabelLayer, SpriteLayer))
+
+def readImage(image_path):
+    '''
+    Given a .jpg/.jpeg/.png file path, return the image as a (height x width x 4) uint8 RGBA numpy array, with row 0 at
+    the bottom.
+    '''
+    if image_path[-4:].lower() == '.jpg' or image_path[-5:].lower() == '.jpeg':
+        reader = vtk.vtkJPEGReader()
+    elif image_path[-4:].lower() == '.png':
+        reader = vtk.vtkPNGReader()
+    else:
+        raise ValueError('unsupported image type: ' + image_path)
+    reader.SetFileName(image_path)
+    reader.Update()
+    image = reader.GetOutput()
+    dims = image.GetDimensions()
+    pixels = nps.vtk_to_numpy(image.GetPointData().GetScalars()).reshape(dims[1], dims[0], -1)
+    num_components = np.shape(pixels)[2]
+    rgba = np.empty((dims[1], dims[0], 4), dtype=np.uint8)
+    if num_components >= 3:
+        rgba[:,:,0:3] = pixels[:,:,0:3]
+    else:
+        # grayscale(-alpha) image
+        rgba[:,:,0:3] = pixels[:,:,0:1]
+    rgba[:,:,3] = pixels[:,:,num_components-1] if num_components in [2, 4] else 255
+    return rgba
+
+_image_atlas = None
+
+def imageAtlas():
+    # the atlas shared by all image billboards and sprite layers
+    global _image_atlas
+    if _image_atlas is None:
+        _image_atlas = TextureAtlas()
+    return _image_atlas
+
+def addAtlasImage(image_path):
+    # pack an image file into the shared image atlas - each file is read and packed only once
+    atlas = imageAtlas()
+    if image_path not in atlas:
+        atlas.Add(image_path, readImage(image_path))
+    return atlas
+
+def _projectToViewport(renderer, points, transform=None):
+    # (N x 4) homogeneous world points (in the frame of transform, if given) to viewport x, y - and whether each point
+    # is inside the view frustum
+    width, height = renderer.GetSize()
+    matrix = renderer.GetActiveCamera().GetCompositeProjectionTransformMatrix(renderer.GetTiledAspectRatio(), -1, 1)
+    world_to_clip = np.array([[matrix.GetElement(i, j) for j in xrange(4)] for i in xrange(4)])
+    if transform is not None:
+        transform_matrix = transform.GetMatrix()
+        world_to_clip = np.dot(world_to_clip, [[transform_matrix.GetElement(i, j) for j in xrange(4)] for i in xrange(4)])
+    clip = np.dot(points, world_to_clip.T)
+    in_front = clip[:,3] > 0
+    w = np.where(in_front, clip[:,3], 1.0)
+    x = (clip[:,0]/w + 1.0)/2.0*width
+    y = (clip[:,1]/w + 1.0)/2.0*height
+    return x, y, in_front & (np.abs(clip[:,2]) <= clip[:,3])
+
+def _setQuads(polydata, corners, tcoords):
+    # fill a polydata with one textured quad per row of the (N x 4 x 2) viewport corners and (N x 4 x 2) texture coordinates
+    num_quads = len(corners)
+    points = np.zeros((num_quads, 4, 3))
+    points[:,:,0:2] = corners
+
+    cell_ids = np.empty((num_quads, 5), dtype=nps.ID_TYPE_CODE)
+    cell_ids[:,0] = 4
+    cell_ids[:,1:] = np.arange(4*num_quads).reshape(num_quads, 4)
+
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(nps.numpy_to_vtk(points.reshape(-1, 3), deep=1))
+    polys = vtk.vtkCellArray()
+    polys.SetCells(num_quads, nps.numpy_to_vtkIdTypeArray(cell_ids.ravel(), deep=1))
+    vtk_tcoords = nps.numpy_to_vtk(np.reshape(tcoords, (-1, 2)), deep=1)
+    vtk_tcoords.SetName("TextureCoordinates")
+
+    polydata.SetPoints(vtk_points)
+    polydata.SetPolys(polys)
+    polydata.GetPointData().SetTCoords(vtk_tcoords)
+    polydata.Modified()
+
+def _quadTextureCoordinates(rects):
+    # (N x 4) atlas rectangles (u0, v0, u1, v1) to (N x 4 x 2) texture coordinates of quad corners in counter-clockwise order
+    rects = np.reshape(rects, (-1, 4))
+    return np.concatenate([rects[:,None,[0,1]], rects[:,None,[2,1]], rects[:,None,[2,3]], rects[:,None,[0,3]]], axis=1)
+
+def renderText(text, text_property):
+    '''
+    Given a string and a vtkTextProperty, return the rendered text as a (height x width x 4) uint8 RGBA numpy array,
+    with row 0 at the bottom.
+    '''
+    utilities = vtk.vtkFreeTypeUtilities.GetInstance()
+    bbox = [0, 0, 0, 0]
+    utilities.GetBoundingBox(text_property, text, bbox)
+    image = vtk.vtkImageData()
+    utilities.RenderString(text_property, text, image)
+    dims = image.GetDimensions()
+    pixels = nps.vtk_to_numpy(image.GetPointData().GetScalars()).reshape(dims[1], dims[0], -1)
+    # the text starts at the image origin, the rest of the (power of two sized) image is padding
+    width, height = bbox[1] - bbox[0] + 1, bbox[3] - bbox[2] + 1
+    return np.array(pixels[0:height, 0:width, 0:4], dtype=np.uint8)
+
+class TextureAtlas(object):
+    ''' many small images packed into one texture - images are placed left to right on shelves stacked bottom to top '''
+    def __init__(self, width=512, height=256):
+        self.pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        self.shelves = []       # [y, height, next free x] of each shelf
+        self.entries = {}       # key -> (x, y, width, height) in pixels
+        self.generation = 0     # bumped whenever the atlas grows, i.e. whenever texture coordinates change
+
+        self.image = vtk.vtkImageData()
+        self.texture = vtk.vtkTexture()
+        self.texture.SetInput(self.image)
+        self.texture.InterpolateOff()
+        self.texture.RepeatOff()
+        self._updateImage()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def GetTexture(self):
+        return self.texture
+
+    def GetSize(self, key):
+        return self.entries[key][2:4]
+
+    def GetTextureCoordinates(self, key):
+        # (u0, v0, u1, v1) of an image - computed on demand, since they change whenever the atlas grows
+        x, y, width, height = self.entries[key]
+        atlas_height, atlas_width = np.shape(self.pixels)[0:2]
+        return (float(x)/atlas_width, float(y)/atlas_height, float(x + width)/atlas_width, float(y + height)/atlas_height)
+
+    def Add(self, key, rgba):
+        # pack a (height x width x 4) uint8 image, unless one is already stored under key
+        if key in self.entries:
+            return self.entries[key]
+        height, width = np.shape(rgba)[0:2]
+        x, y = self._allocate(width + 1, height + 1)
+        self.pixels[y:y+height, x:x+width] = rgba
+        self.entries[key] = (x, y, width, height)
+        self.image.Modified()
+        return self.entries[key]
+
+    def _allocate(self, width, height):
+        # the first shelf that is tall enough (but not wastefully so) and has room, or a new shelf on top
+        for shelf in self.shelves:
+            if height <= shelf[1] <= 2*height and shelf[2] + width <= np.shape(self.pixels)[1]:
+                x = shelf[2]
+                shelf[2] += width
+                return x, shelf[0]
+        y = self.shelves[-1][0] + self.shelves[-1][1] if len(self.shelves) > 0 else 0
+        self._reserve(width, y + height)
+        self.shelves.append([y, height, width])
+        return 0, y
+
+    def _reserve(self, width, height):
+        # grow the atlas in powers of two until it is at least width x height
+        atlas_height, atlas_width = np.shape(self.pixels)[0:2]
+        new_width, new_height = atlas_width, atlas_height
+        while new_width < width:
+            new_width *= 2
+        while new_height < height:
+            new_height *= 2
+        if (new_width, new_height) == (atlas_width, atlas_height):
+            return
+        pixels = np.zeros((new_height, new_width, 4), dtype=np.uint8)
+        pixels[0:atlas_height, 0:atlas_width] = self.pixels
+        self.pixels = pixels
+        self.generation += 1
+        self._updateImage()
+
+    def _updateImage(self):
+        # the image references the atlas pixels directly (deep=0)
+        height, width = np.shape(self.pixels)[0:2]
+        self.image.SetDimensions(width, height, 1)
+        self.image.SetScalarTypeToUnsignedChar()
+        self.image.SetNumberOfScalarComponents(4)
+        self.image.GetPointData().SetScalars(nps.numpy_to_vtk(self.pixels.reshape(-1, 4), deep=0))
+        self.image.Modified()
+
+class LabelLayer(vtk.vtkTexturedActor2D):
+    ''' many text labels drawn by a single actor - labels are placed by priority each time the view changes, and labels that
+    would overlap an already placed one are dropped '''
+    def __init__(self, numpy_array, labels, priority_array=None, text_size=None):
+        self.vtkTransform = None
+        if np.shape(numpy_array)[0] == 3 and np.shape(numpy_array)[1] != 3:
+            numpy_array = np.transpose(numpy_array)
+        self.positions = np.ones((np.shape(numpy_array)[0], 4))
+        self.positions[:,0:3] = numpy_array
+        self.labels = [str(label) for label in labels]
+
+        # labels are placed highest priority first - ties keep their input order
+        if priority_array is None:
+            priority_array = np.zeros(len(self.labels))
+        self.order = np.argsort(-np.asarray(priority_array, dtype=float), kind='mergesort')
+
+        self.text_property = vtk.vtkTextProperty()
+        self.text_property.BoldOn()
+        self.text_property.SetColor(0.0,0.0,0.0)
+        self.text_property.SetFontFamilyToArial()
+        if text_size is not None:
+            self.text_property.SetFontSize(text_size)
+
+        # every distinct string is rendered once, into the shared atlas texture
+        self.atlas = TextureAtlas()
+        unique_labels = sorted(set(self.labels))
+        label_index = dict([(label, i) for i, label in enumerate(unique_labels)])
+        for label in unique_labels:
+            self.atlas.Add(label, renderText(label, self.text_property))
+        self.label_ids = np.array([label_index[label] for label in self.labels], dtype=int)
+        self.unique_labels = unique_labels
+        self.label_sizes = np.array([self.atlas.GetSize(label) for label in unique_labels], dtype=float).reshape(-1, 2)
+        vtk.vtkTexturedActor2D.SetTexture(self, self.atlas.GetTexture())
+
+        self.data = vtk.vtkPolyData()
         mapper = vtk.vtkPolyDataMapper2D()
-        mapper.SetInputConnection(tf.GetOutputPort())
-        mapper.SetTransformCoordinate(coordView)
+        mapper.SetInput(self.data)
+        self.SetMapper(mapper)
+
+        # the view the labels were last placed for
+        self.placement_key = None
 
+    def SetTexture(self, texture):
+        # the label layer draws from its own atlas texture
+        pass
+
+    def SetPosition(self, x, y, z):
+        # labels are positioned by their own points
+        pass
+
+    def SetOrientation(self, roll, pitch, yaw):
+        pass
+
+    def SetUserTransform(self, transform):
+        self.vtkTransform = transform
+        self.placement_key = None
+
+    def GetUserTransform(self):
+        return self.vtkTransform
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - labels are only re-placed when the camera, viewport or transform changed
+        camera = renderer.GetActiveCamera()
+        key = (camera.GetMTime(), tuple(renderer.GetSize()), None if self.vtkTransform is None else self.vtkTransform.GetMTime())
+        if key == self.placement_key:
+            return
+        self.placement_key = key
+        self._placeLabels(renderer)
+
+    def _placeLabels(self, renderer):
+        width, height = renderer.GetSize()
+        if len(self.labels) == 0 or width <= 0 or height <= 0:
+            self.data.Initialize()
+            self.data.Modified()
+            return
+
+        # project all label points to the viewport at once
+        x, y, in_view = _projectToViewport(renderer, self.positions, self.vtkTransform)
+
+        # label rectangles - centered horizontally above their point
+        sizes = self.label_sizes[self.label_ids]
+        x0 = np.floor(x - sizes[:,0]/2.0)
+        y0 = np.floor(y + 2.0)
+        on_screen = in_view & (x0 + sizes[:,0] > 0) & (x0 < width) & (y0 + sizes[:,1] > 0) & (y0 < height)
+
+        # greedy placement in priority order on a coarse occupancy grid of the viewport
+        cell = 4
+        occupied = np.zeros((height//cell + 2, width//cell + 2), dtype=bool)
+        placed = []
+        for i in self.order[on_screen[self.order]]:
+            c0, r0 = max(int(x0[i])//cell, 0), max(int(y0[i])//cell, 0)
+            c1, r1 = max(int(x0[i] + sizes[i,0])//cell + 1, 0), max(int(y0[i] + sizes[i,1])//cell + 1, 0)
+            if occupied[r0:r1, c0:c1].any():
+                continue
+            occupied[r0:r1, c0:c1] = True
+            placed.append(i)
+        placed = np.array(placed, dtype=int)
+
+        # one textured quad per placed label
+        corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+        quads = np.array([x0[placed], y0[placed]]).T[:,None,:] + corners[None,:,:]*sizes[placed][:,None,:]
+        tcoords_by_label = np.array([self.atlas.GetTextureCoordinates(label) for label in self.unique_labels]).reshape(-1, 4)
+        _setQuads(self.data, quads, _quadTextureCoordinates(tcoords_by_label[self.label_ids[placed]]))
+
+class SpriteLayer(vtk.vtkTexturedActor2D):
+    ''' many fixed-size image sprites (i.e. vehicle or waypoint icons) drawn by a single actor from the shared image atlas '''
+    def __init__(self, numpy_array, image_paths, width=None, height=None):
+        self.vtkTransform = None
+        self.atlas = imageAtlas()
+        self.positions = np.ones((0, 4))
+        self.SetPositions(numpy_array)
+        if isinstance(image_paths, basestring):
+            image_paths = [image_paths]*len(self.positions)
+        if len(image_paths) != len(self.positions):
+            raise ValueError('got ' + str(len(image_paths)) + ' images for ' + str(len(self.positions)) + ' sprites')
+
+        # sprites index into the distinct images, each packed into the atlas once
+        self.image_paths = sorted(set(image_paths))
+        image_index = dict([(image_path, i) for i, image_path in enumerate(self.image_paths)])
+        self.image_ids = np.array([image_index[image_path] for image_path in image_paths], dtype=int)
+        for image_path in self.image_paths:
+            addAtlasImage(image_path)
+        if width is not None and height is not None:
+            self.image_sizes = np.tile([float(width), float(height)], (len(self.image_paths), 1))
+        else:
+            self.image_sizes = np.array([self.atlas.GetSize(image_path) for image_path in self.image_paths], dtype=float).reshape(-1, 2)
+        vtk.vtkTexturedActor2D.SetTexture(self, self.atlas.GetTexture())
+
+        self.data = vtk.vtkPolyData()
+        mapper = vtk.vtkPolyDataMapper2D()
+        mapper.SetInput(self.data)
         self.SetMapper(mapper)
 
-    def ApplyTransformation(self):
-        mat = self.vtkTransform.GetMatrix()
-        a = np.zeros((4,4))
+        # the view and atlas layout the sprites were last laid out for
+        self.layout_key = None
 
-        for r in xrange(4):
-            for c in xrange(4):
-                a[r][c] = mat.GetElement(r, c)
+    def SetPositions(self, numpy_array):
+        # move all sprites at once - they are laid out again on the next frame
+        if np.shape(numpy_array)[0] == 3 and np.shape(numpy_array)[1] != 3:
+            numpy_array = np.transpose(numpy_array)
+        if len(numpy_array) != len(self.positions):
+            self.positions = np.ones((len(numpy_array), 4))
+        self.positions[:,0:3] = numpy_array
+        self.layout_key = None
 
-        self.SetPosition(a[0,3],a[1,3],a[2,3])
+    def SetTexture(self, texture):
+        # sprites draw from the shared atlas texture
+        pass
+
+    def SetPosition(self, x, y, z):
+        # sprites are positioned by their own points
+        pass
+
+    def SetOrientation(self, roll, pitch, yaw):
+        pass
 
     def SetUserTransform(self, transform):
         self.vtkTransform = transform
-        self.ApplyTransformation()
+        self.layout_key = None
 
     def GetUserTransform(self):
-        return self.vtkTransform
\ No newline at end of file
+        return self.vtkTransform
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - sprites are only laid out again when the view, transform or atlas changed
+        key = (renderer.GetActiveCamera().GetMTime(), tuple(renderer.GetSize()), self.atlas.generation,
+               None if self.vtkTransform is None else self.vtkTransform.GetMTime())
+        if key == self.layout_key:
+            return
+        self.layout_key = key
+
+        width, height = renderer.GetSize()
+        if len(self.positions) == 0 or width <= 0 or height <= 0:
+            self.data.Initialize()
+            self.data.Modified()
+            return
+        x, y, in_view = _projectToViewport(renderer, self.positions, self.vtkTransform)
+        sizes = self.image_sizes[self.image_ids]
+        visible = in_view & (x + sizes[:,0]/2.0 > 0) & (x - sizes[:,0]/2.0 < width) & (y + sizes[:,1]/2.0 > 0) & (y - sizes[:,1]/2.0 < height)
+
+        # one textured quad per visible sprite, centered on its point and snapped to whole pixels
+        corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=float)
+        lower = np.floor(np.array([x[visible], y[visible]]).T - sizes[visible]/2.0)
+        quads = lower[:,None,:] + corners[None,:,:]*sizes[visible][:,None,:]
+        tcoords_by_image = np.array([self.atlas.GetTextureCoordinates(image_path) for image_path in self.image_paths]).reshape(-1, 4)
+        _setQuads(self.data, quads, _quadTextureCoordinates(tcoords_by_image[self.image_ids[visible]]))
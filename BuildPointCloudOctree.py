@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+offline tool that builds an out-of-core octree (see OctreePointClouds.py) from point files too large for memory
+
+usage: python BuildPointCloudOctree.py points.npy octree_dir [--colors colors.npy]
+       python BuildPointCloudOctree.py points.bin octree_dir --dtype float64
+
+Points are .npy (N x 3) arrays or raw binary xyz triplets, colors are .npy or raw uint8 (N x 3). Inputs are memory
+mapped and streamed through in chunks, and node files are appended to as points arrive, so memory use is bounded by
+the chunk size rather than the input size. The upper levels of the octree are filled from a uniform random sample of
+the whole input, drawn while the bounds are found, so the coarse view covers all of the data however it is ordered.
+'''
+
+''' standard libs '''
+import os
+import sys
+import json
+import argparse
+import warnings
+import numpy as np
+
+''' custom libs '''
+import OctreePointClouds
+
+''' octree build parameters '''
+OCTREE_NODE_CAPACITY = 20000    # points kept in a node before the rest are passed down to its children
+OCTREE_MAX_DEPTH = 16           # nodes at this depth keep every point that reaches them
+OCTREE_CHUNK_SIZE = 1000000     # points read from the input at a time
+
+def openPointFile(path, dtype=np.float32, columns=3):
+    # memory map a .npy or raw binary file as an (N x columns) array
+    if path.lower().endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    return np.memmap(path, dtype=dtype, mode='r').reshape(-1, columns)
+
+def _appendNode(octree_dir, name, points, colors, offset):
+    with open(os.path.join(octree_dir, name + OctreePointClouds.OCTREE_POINTS_EXTENSION), 'ab') as f:
+        f.write(np.ascontiguousarray(points - offset, dtype=np.float32).tostring())
+    if colors is not None:
+        with open(os.path.join(octree_dir, name + OctreePointClouds.OCTREE_COLORS_EXTENSION), 'ab') as f:
+            f.write(np.ascontiguousarray(colors, dtype=np.uint8).tostring())
+
+def _insertPoints(octree_dir, counts, name, lower, size, points, colors, offset, depth, node_capacity, max_depth):
+    # fill this node up to its capacity, then route the remaining points to the child octants they fall in
+    count = counts.get(name, 0)
+    if depth >= max_depth:
+        take = len(points)
+    else:
+        take = min(max(node_capacity - count, 0), len(points))
+    if take > 0:
+        _appendNode(octree_dir, name, points[:take], None if colors is None else colors[:take], offset)
+        counts[name] = count + take
+    if take == len(points):
+        return
+
+    points = points[take:]
+    colors = None if colors is None else colors[take:]
+    half = size/2.0
+    bits = (points - lower) >= half
+    octants = bits[:,0]*1 + bits[:,1]*2 + bits[:,2]*4
+    for octant in np.unique(octants):
+        mask = octants == octant
+        child_lower = lower + half*np.array([octant & 1, (octant >> 1) & 1, (octant >> 2) & 1])
+        _insertPoints(octree_dir, counts, name + str(octant), child_lower, half, points[mask], None if colors is None else colors[mask],
+                      offset, depth+1, node_capacity, max_depth)
+
+def buildOctree(points, colors, octree_dir, node_capacity=OCTREE_NODE_CAPACITY, max_depth=OCTREE_MAX_DEPTH, chunk_size=OCTREE_CHUNK_SIZE):
+    '''
+    Given (N x 3) points and optional (N x 3) uint8 colors (numpy or memory mapped arrays) and an output directory,
+    write an octree readable by OctreePointClouds.OctreePointCloud.
+    '''
+    if not os.path.isdir(octree_dir):
+        os.makedirs(octree_dir)
+    if os.path.exists(os.path.join(octree_dir, OctreePointClouds.OCTREE_INDEX_FILE)):
+        warn_str = 'overwriting the octree in ' + octree_dir
+        warnings.warn(warn_str, RuntimeWarning)
+        for file_name in os.listdir(octree_dir):
+            if file_name.endswith(OctreePointClouds.OCTREE_POINTS_EXTENSION) or file_name.endswith(OctreePointClouds.OCTREE_COLORS_EXTENSION):
+                os.remove(os.path.join(octree_dir, file_name))
+    num_points = len(points)
+    chunk_starts = np.arange(0, num_points, chunk_size)
+
+    # pass 1 - the bounding cube, and an offset that keeps float32 node coordinates precise for georeferenced data - and
+    # a uniform sample of about a chunk of points, drawn across all chunks
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    sample_probability = min(float(chunk_size)/max(num_points, 1), 1.0)
+    sample_ids = []
+    for start in chunk_starts:
+        chunk = np.asarray(points[start:start+chunk_size], dtype=float)
+        lower = np.minimum(lower, np.min(chunk, axis=0))
+        upper = np.maximum(upper, np.max(chunk, axis=0))
+        sample_ids.append(np.flatnonzero(np.random.random_sample(len(chunk)) < sample_probability))
+    size = max(np.max(upper - lower), 1e-9)*(1.0 + 1e-9)
+    offset = np.floor(lower)
+
+    # the sample is inserted first, so the root and upper levels - which each keep the first points that reach them - hold
+    # a uniform sample of the whole input even when it is ordered (i.e. by scan line or tile)
+    counts = {}
+    sample = np.vstack([np.asarray(points[start:start+chunk_size], dtype=float)[ids] for (start, ids) in zip(chunk_starts, sample_ids)])
+    sample_colors = None
+    if colors is not None:
+        sample_colors = np.vstack([np.asarray(colors[start:start+chunk_size])[ids] for (start, ids) in zip(chunk_starts, sample_ids)])
+    order = np.random.permutation(len(sample))
+    _insertPoints(octree_dir, counts, OctreePointClouds.OCTREE_ROOT, lower, size, sample[order],
+                  None if sample_colors is None else sample_colors[order], offset, 0, node_capacity, max_depth)
+    print 'sample of ' + str(len(sample)) + ' points, ' + str(len(counts)) + ' nodes'
+    del sample, sample_colors
+
+    # pass 2 - the rest of the points, shuffled within each chunk, fill the deeper levels
+    for chunk_number, (start, ids) in enumerate(zip(chunk_starts, sample_ids)):
+        chunk = np.asarray(points[start:start+chunk_size], dtype=float)
+        chunk_colors = None if colors is None else np.asarray(colors[start:start+chunk_size])
+        rest = np.ones(len(chunk), dtype=bool)
+        rest[ids] = False
+        order = np.flatnonzero(rest)[np.random.permutation(len(chunk) - len(ids))]
+        _insertPoints(octree_dir, counts, OctreePointClouds.OCTREE_ROOT, lower, size, chunk[order],
+                      None if chunk_colors is None else chunk_colors[order], offset, 0, node_capacity, max_depth)
+        print 'chunk ' + str(chunk_number+1) + '/' + str(len(chunk_starts)) + ', ' + str(len(counts)) + ' nodes'
+
+    index = {'offset': (offset).tolist(), 'lower': (lower - offset).tolist(), 'size': size,
+             'has_colors': colors is not None, 'nodes': counts}
+    with open(os.path.join(octree_dir, OctreePointClouds.OCTREE_INDEX_FILE), 'w') as f:
+        json.dump(index, f)
+    return index
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an out-of-core LightField octree from a point file.')
+    parser.add_argument('points', help='.npy (N x 3) array, or raw binary xyz triplets')
+    parser.add_argument('octree_dir', help='output directory')
+    parser.add_argument('--colors', default=None, help='.npy or raw uint8 (N x 3) colors')
+    parser.add_argument('--dtype', default='float32', help='data type of raw binary points (default float32)')
+    parser.add_argument('--capacity', type=int, default=OCTREE_NODE_CAPACITY, help='points per node')
+    parser.add_argument('--max-depth', type=int, default=OCTREE_MAX_DEPTH, help='maximum octree depth')
+    parser.add_argument('--chunk-size', type=int, default=OCTREE_CHUNK_SIZE, help='points read at a time')
+    args = parser.parse_args()
+
+    points = openPointFile(args.points, np.dtype(args.dtype))
+    colors = None
+    if args.colors is not None:
+        colors = openPointFile(args.colors, np.uint8)
+        if len(colors) != len(points):
+            sys.exit('the number of colors (' + str(len(colors)) + ') does not match the number of points (' + str(len(points)) + ')')
+    index = buildOctree(points, colors, args.octree_dir, args.capacity, args.max_depth, args.chunk_size)
+    print 'wrote ' + str(len(index['nodes'])) + ' nodes to ' + args.octree_dir
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+camera and view utilities
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+
+def getWorldPixelSize(renderer, bounds=None):
+    '''
+    Given a renderer and optional world bounds, return the world length covered by one pixel. For perspective
+    cameras this is evaluated at the point of the bounds closest to the camera (or at the focal point if no bounds
+    are given).
+    '''
+    camera = renderer.GetActiveCamera()
+    height = max(renderer.GetSize()[1], 1)
+    if camera.GetParallelProjection():
+        return 2.0*camera.GetParallelScale()/height
+
+    if bounds is None:
+        distance = camera.GetDistance()
+    else:
+        position = np.array(camera.GetPosition())
+        bounds = np.reshape(bounds, (3,2))
+        closest = np.clip(position, bounds[:,0], bounds[:,1])
+        distance = np.linalg.norm(position - closest)
+    distance = max(distance, camera.GetClippingRange()[0])
+    return 2.0*distance*math.tan(math.radians(camera.GetViewAngle())/2.0)/height
+
+def getPixelSizeAtDistance(renderer, distance):
+    '''
+    Given a renderer and a distance (or numpy array of distances) from the camera, return the world length covered
+    by one pixel at that distance.
+    '''
+    camera = renderer.GetActiveCamera()
+    height = max(renderer.GetSize()[1], 1)
+    if camera.GetParallelProjection():
+        return 2.0*camera.GetParallelScale()/height*np.ones(np.shape(distance))
+    distance = np.maximum(distance, camera.GetClippingRange()[0])
+    return 2.0*distance*math.tan(math.radians(camera.GetViewAngle())/2.0)/height
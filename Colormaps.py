@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+colormaps - lookup tables for mapping scalar fields to colors
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+
+''' colormaps - (position, r, g, b) control points, linearly interpolated '''
+COLORMAP_DEFAULT = 'viridis'
+COLORMAPS = {
+    'viridis': [[0.0/9, 0.267, 0.004, 0.329], [1.0/9, 0.282, 0.157, 0.471], [2.0/9, 0.243, 0.286, 0.537],
+                [3.0/9, 0.192, 0.408, 0.557], [4.0/9, 0.149, 0.510, 0.557], [5.0/9, 0.122, 0.620, 0.537],
+                [6.0/9, 0.208, 0.718, 0.475], [7.0/9, 0.431, 0.808, 0.345], [8.0/9, 0.710, 0.871, 0.169],
+                [9.0/9, 0.992, 0.906, 0.145]],
+    'jet': [[0.0, 0.0, 0.0, 0.5], [0.11, 0.0, 0.0, 1.0], [0.36, 0.0, 1.0, 1.0], [0.64, 1.0, 1.0, 0.0],
+            [0.89, 1.0, 0.0, 0.0], [1.0, 0.5, 0.0, 0.0]],
+    'hot': [[0.0, 0.0, 0.0, 0.0], [0.375, 1.0, 0.0, 0.0], [0.75, 1.0, 1.0, 0.0], [1.0, 1.0, 1.0, 1.0]],
+    'cool': [[0.0, 0.0, 1.0, 1.0], [1.0, 1.0, 0.0, 1.0]],
+    'gray': [[0.0, 0.0, 0.0, 0.0], [1.0, 1.0, 1.0, 1.0]],
+}
+COLORMAP_TABLE_SIZE = 256
+
+def LookupTable(colormap=COLORMAP_DEFAULT, scalar_range=(0.0, 1.0)):
+    '''
+    Given a colormap name and a (min, max) scalar range, return a new vtkLookupTable for it - each mapper needs its
+    own table, since mappers set the table range when they map their scalars.
+    '''
+    if colormap not in COLORMAPS:
+        warn_str = 'unknown colormap: ' + str(colormap) + ', using ' + COLORMAP_DEFAULT + ' - available colormaps: ' + str(sorted(COLORMAPS.keys()))
+        warnings.warn(warn_str, RuntimeWarning)
+        colormap = COLORMAP_DEFAULT
+    control_points = np.array(COLORMAPS[colormap])
+    positions = np.linspace(0.0, 1.0, COLORMAP_TABLE_SIZE)
+
+    lut = vtk.vtkLookupTable()
+    lut.SetNumberOfTableValues(COLORMAP_TABLE_SIZE)
+    lut.SetRange(scalar_range[0], scalar_range[1])
+    table = np.column_stack([np.interp(positions, control_points[:,0], control_points[:,channel]) for channel in xrange(1, 4)])
+    for i in xrange(COLORMAP_TABLE_SIZE):
+        lut.SetTableValue(i, table[i,0], table[i,1], table[i,2], 1.0)
+    lut.Build()
+    return lut
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+depth buffer picking - world coordinates and actors under the cursor from the last rendered frame
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+
+''' depth picking parameters '''
+DEPTH_PICK_TOLERANCE = 2.0      # pixels around the picked surface within which actor bounds count as under the cursor
+
+class DepthPicker(object):
+    '''
+    answers picks from the depth buffer of the last rendered frame - only the depth under the cursor is read, and the
+    actors under it are looked up in the canvas spatial index, so a pick costs the same however often frames are rendered
+    '''
+    def __init__(self, renderer, actors_to_tree_widget_items, spatial_index, refresh_index):
+        self.renderer = renderer
+        self.actors_to_tree_widget_items = actors_to_tree_widget_items
+        self.spatial_index = spatial_index
+        self.refresh_index = refresh_index      # brings the spatial index up to date with the actors that moved
+        self.picker = vtk.vtkPropPicker()
+        self.picker.PickFromListOn()
+
+    def GetDepth(self, x, y):
+        # depth buffer value (0 at the near plane, 1 at the far plane / background) at display position x, y
+        width, height = self.renderer.GetRenderWindow().GetSize()
+        if x < 0 or y < 0 or x >= width or y >= height:
+            return 1.0
+        return float(self.renderer.GetRenderWindow().GetZbufferDataAtPoint(x, y))
+
+    def DisplayToWorld(self, x, y, z):
+        self.renderer.SetDisplayPoint(x, y, z)
+        self.renderer.DisplayToWorld()
+        world = self.renderer.GetWorldPoint()
+        if world[3] == 0.0:
+            return None
+        return np.array(world[0:3])/world[3]
+
+    def PickWorldPosition(self, x, y):
+        # world position of the surface under display position x, y - None over the background
+        z = self.GetDepth(x, y)
+        if z >= 1.0:
+            return None
+        position = self.DisplayToWorld(x, y, z)
+        return None if position is None else position.tolist()
+
+    def PickActor(self, x, y):
+        '''
+        Given a display position, return (actor, tree widget item, world position) of the scene actor under it, or
+        (None, None, world position) - the actor is found among the visible ones whose indexed bounds come within a few
+        pixels of the depth buffer position, and only those are ray picked when the bounds alone cannot tell them apart.
+        '''
+        z = self.GetDepth(x, y)
+        if z >= 1.0:
+            return None, None, None
+        position = self.DisplayToWorld(x, y, z)
+        if position is None:
+            return None, None, None
+        # a few pixels of tolerance at the picked depth, so points and lines lying exactly on their bounds are found
+        neighbour = self.DisplayToWorld(x+1, y, z)
+        pixel_size = np.linalg.norm(neighbour - position) if neighbour is not None else 0.0
+        tolerance = max(DEPTH_PICK_TOLERANCE*pixel_size, 1e-6)
+        self.refresh_index()
+        box = np.column_stack((position - tolerance, position + tolerance)).ravel()
+        candidates = [actor for actor in self.spatial_index.QueryBox(box) if actor.GetVisibility()]
+        if len(candidates) == 0:
+            return None, None, position.tolist()
+        if len(candidates) == 1:
+            actor = candidates[0]
+        else:
+            self.picker.InitializePickList()
+            for candidate in candidates:
+                self.picker.AddPickList(candidate)
+            if self.picker.Pick(x, y, 0, self.renderer):
+                actor = self.picker.GetViewProp()
+            else:
+                # fall back to the tightest bounds
+                bounds = np.array([self.spatial_index.GetBounds(candidate) for candidate in candidates], dtype=float)
+                volumes = np.prod(bounds[:,1::2] - bounds[:,0::2] + tolerance, axis=1)
+                actor = candidates[np.argmin(volumes)]
+        return actor, self.actors_to_tree_widget_items.get(actor), position.tolist()
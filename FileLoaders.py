@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+point cloud and mesh file loaders - binary PLY, PCD and .npy files are memory mapped, and each array is copied out of
+the mapping once
+'''
+
+''' standard libs '''
+import os
+import warnings
+import numpy as np
+
+''' PLY/PCD property types to numpy types '''
+PLY_TYPES = {'char': 'i1', 'uchar': 'u1', 'short': 'i2', 'ushort': 'u2', 'int': 'i4', 'uint': 'u4', 'float': 'f4', 'double': 'f8',
+             'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2', 'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8'}
+PCD_TYPES = {('F', 4): 'f4', ('F', 8): 'f8', ('U', 1): 'u1', ('U', 2): 'u2', ('U', 4): 'u4', ('U', 8): 'u8',
+             ('I', 1): 'i1', ('I', 2): 'i2', ('I', 4): 'i4', ('I', 8): 'i8'}
+
+def _readHeader(file_path, end_marker):
+    # header lines up to and including the one starting with end_marker, and the byte offset of the data after it
+    lines = []
+    with open(file_path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if len(line) == 0:
+                raise ValueError('no ' + end_marker + ' line in the header of ' + file_path)
+            line = line.decode('ascii', 'ignore').strip()
+            lines.append(line)
+            if line.startswith(end_marker):
+                return lines, f.tell()
+
+def _columns(records, names, dtype):
+    # copy the named fields of a structured (memory mapped) array into one (N x len(names)) array - the one copy of the data
+    columns = np.empty((len(records), len(names)), dtype=dtype)
+    for i, name in enumerate(names):
+        columns[:,i] = records[name]
+    return columns
+
+def _colors(records, names):
+    if all([name in names for name in ['red', 'green', 'blue']]):
+        return _columns(records, ['red', 'green', 'blue'], np.uint8)
+    if all([name in names for name in ['r', 'g', 'b']]):
+        return _columns(records, ['r', 'g', 'b'], np.uint8)
+    return None
+
+def loadPLY(file_path):
+    '''
+    Given a binary PLY file path, return (vertices, faces, colors, normals) - vertices are (N x 3), faces (M x 3)
+    triangle indices (polygons are fanned into triangles, None for point clouds), colors (N x 3) uint8 and normals
+    (N x 3), both None if the file has none.
+    '''
+    lines, data_offset = _readHeader(file_path, 'end_header')
+    if len(lines) == 0 or lines[0] != 'ply':
+        raise ValueError(file_path + ' is not a PLY file')
+
+    byte_order = None
+    elements = []
+    for line in lines:
+        tokens = line.split()
+        if len(tokens) == 0:
+            continue
+        if tokens[0] == 'format':
+            if tokens[1] == 'binary_little_endian':
+                byte_order = '<'
+            elif tokens[1] == 'binary_big_endian':
+                byte_order = '>'
+            else:
+                raise ValueError('only binary PLY files are supported, ' + file_path + ' is ' + tokens[1])
+        elif tokens[0] == 'element':
+            elements.append({'name': tokens[1], 'count': int(tokens[2]), 'properties': [], 'list': None})
+        elif tokens[0] == 'property' and tokens[1] == 'list':
+            elements[-1]['list'] = (byte_order + PLY_TYPES[tokens[2]], byte_order + PLY_TYPES[tokens[3]], tokens[4])
+        elif tokens[0] == 'property':
+            elements[-1]['properties'].append((tokens[2], byte_order + PLY_TYPES[tokens[1]]))
+
+    vertices = faces = colors = normals = None
+    offset = data_offset
+    for element in elements:
+        if element['list'] is None:
+            dtype = np.dtype(element['properties'])
+            records = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(element['count'],))
+            offset += dtype.itemsize*element['count']
+            if element['name'] == 'vertex':
+                names = dtype.names
+                vertices = _columns(records, ['x', 'y', 'z'], np.result_type(records.dtype['x'].newbyteorder('='), np.float32))
+                colors = _colors(records, names)
+                if all([name in names for name in ['nx', 'ny', 'nz']]):
+                    normals = _columns(records, ['nx', 'ny', 'nz'], np.float32)
+        elif element['name'] == 'face' and len(element['properties']) == 0:
+            faces, offset = _readFaces(file_path, offset, element['count'], element['list'][0], element['list'][1])
+        else:
+            warn_str = 'skipping the rest of ' + file_path + ': list element ' + element['name'] + ' is not supported'
+            warnings.warn(warn_str, RuntimeWarning)
+            break
+
+    if vertices is None:
+        raise ValueError('no vertex element in ' + file_path)
+    return vertices, faces, colors, normals
+
+def _readFaces(file_path, offset, count, count_type, index_type):
+    # faces of equal size (the usual case - all triangles or all quads) are one fixed-size record each and are read in a
+    # single vectorized pass, mixed polygons are walked face by face
+    if count == 0:
+        return None, offset
+    count_size = np.dtype(count_type).itemsize
+    index_size = np.dtype(index_type).itemsize
+    first_count = int(np.memmap(file_path, dtype=count_type, mode='r', offset=offset, shape=(1,))[0])
+    dtype = np.dtype([('count', count_type), ('indices', index_type, (first_count,))])
+    if os.path.getsize(file_path) >= offset + dtype.itemsize*count:
+        records = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+        if np.all(records['count'] == first_count):
+            return _fanTriangles(np.asarray(records['indices'], dtype=np.int64)), offset + dtype.itemsize*count
+
+    data = np.memmap(file_path, dtype=np.uint8, mode='r', offset=offset)
+    triangles = []
+    position = 0
+    for i in xrange(count):
+        num_indices = int(np.frombuffer(data[position:position+count_size].tobytes(), dtype=count_type)[0])
+        position += count_size
+        indices = np.frombuffer(data[position:position+num_indices*index_size].tobytes(), dtype=index_type)
+        position += num_indices*index_size
+        triangles.append(_fanTriangles(indices[None,:].astype(np.int64)))
+    return np.vstack(triangles), offset + position
+
+def _fanTriangles(polygons):
+    # (M x K) polygons to (M*(K-2) x 3) triangles, fanned around each polygon's first vertex
+    num_corners = np.shape(polygons)[1]
+    if num_corners == 3:
+        return polygons
+    triangles = np.empty((np.shape(polygons)[0], num_corners-2, 3), dtype=polygons.dtype)
+    triangles[:,:,0] = polygons[:,0:1]
+    triangles[:,:,1] = polygons[:,1:-1]
+    triangles[:,:,2] = polygons[:,2:]
+    return triangles.reshape(-1, 3)
+
+def loadPCD(file_path):
+    '''
+    Given a PCD file path (binary or ascii data), return (points, colors) - points are (N x 3), colors (N x 3) uint8
+    or None. Packed rgb/rgba fields are unpacked.
+    '''
+    lines, data_offset = _readHeader(file_path, 'DATA')
+    header = {}
+    for line in lines:
+        tokens = line.split()
+        if len(tokens) > 0 and not tokens[0].startswith('#'):
+            header[tokens[0]] = tokens[1:]
+    names = header['FIELDS']
+    sizes = [int(size) for size in header['SIZE']]
+    types = header['TYPE']
+    counts = [int(count) for count in header.get('COUNT', ['1']*len(names))]
+    num_points = int(header['POINTS'][0])
+    data_type = header['DATA'][0]
+
+    # padding fields are all named '_' - numpy needs unique names
+    fields = []
+    for i, (name, size, field_type, count) in enumerate(zip(names, sizes, types, counts)):
+        name = name if name != '_' else '_' + str(i)
+        fields.append((name, '<' + PCD_TYPES[(field_type, size)]) if count == 1 else (name, '<' + PCD_TYPES[(field_type, size)], (count,)))
+    dtype = np.dtype(fields)
+
+    if data_type == 'binary':
+        records = np.memmap(file_path, dtype=dtype, mode='r', offset=data_offset, shape=(num_points,))
+    elif data_type == 'ascii':
+        # packed colors are parsed as doubles, which hold every 32 bit value exactly
+        ascii_dtype = np.dtype([(name, '<f8') if name in ['rgb', 'rgba'] else (name, dtype.fields[name][0]) for name in dtype.names])
+        records = np.loadtxt(file_path, dtype=ascii_dtype, skiprows=len(lines), ndmin=1)
+    else:
+        raise ValueError('PCD data type ' + data_type + ' of ' + file_path + ' is not supported')
+
+    points = _columns(records, ['x', 'y', 'z'], np.result_type(records.dtype['x'].newbyteorder('='), np.float32))
+    colors = None
+    for name in ['rgb', 'rgba']:
+        if name in dtype.names:
+            if data_type == 'binary' and records.dtype[name].itemsize == 4:
+                # binary rgb is the packed integer's bits, whatever TYPE says
+                packed = np.ascontiguousarray(records[name]).view(np.uint32)
+            else:
+                # ascii rgb is written as the packed integer's value, even when TYPE is F
+                packed = np.asarray(records[name]).astype(np.uint32)
+            colors = np.empty((num_points, 3), dtype=np.uint8)
+            colors[:,0] = (packed >> 16) & 255
+            colors[:,1] = (packed >> 8) & 255
+            colors[:,2] = packed & 255
+    if colors is None:
+        colors = _colors(records, dtype.names)
+    return points, colors
+
+def loadNPY(file_path):
+    '''
+    Given a .npy file path holding an (N x 3) xyz or (N x 6) xyz+rgb array, return (points, colors) - colors are (N x 3)
+    uint8 or None.
+    '''
+    array = np.load(file_path, mmap_mode='r')
+    if array.ndim != 2 or np.shape(array)[1] not in [3, 6]:
+        raise ValueError(file_path + ' holds a ' + str(np.shape(array)) + ' array, not (N x 3) or (N x 6)')
+    points = np.array(array[:,0:3], dtype=np.result_type(array.dtype, np.float32))
+    colors = None
+    if np.shape(array)[1] == 6:
+        colors = np.array(array[:,3:6], dtype=np.uint8)
+    return points, colors
+
+def loadPointCloudFile(file_path):
+    # (points, colors) from a .ply, .pcd or .npy file
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.ply':
+        vertices, faces, colors, normals = loadPLY(file_path)
+        return vertices, colors
+    elif extension == '.pcd':
+        return loadPCD(file_path)
+    elif extension == '.npy':
+        return loadNPY(file_path)
+    raise ValueError('unsupported point cloud file type: ' + file_path)
@@ -166,15 +166,13 @@ class ActorPropertiesDock(QtGui.QDockWidget):
 
     def actorFrameAxesVisibility(self, state):
         if state == 2:
-            self.tree_object.axes_visible = True
+            self.parent.setActorFrameAxesVisible(self.tree_object, True)
         else:
-            self.tree_object.axes_visible = False
-        self.parent.vtk_main_canvas.setActorVisibility(self.tree_object.axes, self.tree_object.axes_visible)
+            self.parent.setActorFrameAxesVisible(self.tree_object, False)
 
     def actorFrameAxesScale(self):
         scale = self.axesSpinBox.value()
-        self.tree_object.axes_scale = scale
-        self.parent.vtk_main_canvas.setActorScale(self.tree_object.axes, scale)
+        self.parent.setActorFrameAxesScale(self.tree_object, scale)
 
     def alphaChanged(self):
         alpha = self.alphaSpinBox.value()
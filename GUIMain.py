@@ -80,6 +80,14 @@ class MainApp(QtGui.QMainWindow):
     set_actor_linewidth_signal = QtCore.pyqtSignal(list, float)
     set_actor_visibility_signal = QtCore.pyqtSignal(list, bool)
     set_actor_mode_signal = QtCore.pyqtSignal(list, str)
+    set_actor_frame_axes_visibility_signal = QtCore.pyqtSignal(list, bool)
+    append_trajectory_signal = QtCore.pyqtSignal(list, object, object)
+    update_grid_map_signal = QtCore.pyqtSignal(list, int, int, object)
+    insert_voxels_signal = QtCore.pyqtSignal(list, object, object)
+    clear_voxels_signal = QtCore.pyqtSignal(list, object)
+    set_point_cloud_scalar_range_signal = QtCore.pyqtSignal(list, float, float)
+    set_camera_follow_signal = QtCore.pyqtSignal(list, bool)
+    actors_within_radius_signal = QtCore.pyqtSignal(object, float)
 
     # GUI signals
     background_light_signal = QtCore.pyqtSignal(bool)
@@ -89,6 +97,8 @@ class MainApp(QtGui.QMainWindow):
         super(MainApp,self).__init__()
         # dictionary to keep track of actors/icons that correspond to tree widget items - used to handle Qt4->vtk scene changes
         self.tree_widget_items_to_objects = {}
+        # level lists of the actors found by the last actors within radius query
+        self.actors_within_radius = []
         self.ui = None
         self.vtk_main_canvas = None
         self.setup()
@@ -141,6 +151,7 @@ class MainApp(QtGui.QMainWindow):
         self.treeWidgetTextEditing = False
         self.treeWidgetPreviousText = None
         self.treeWidgetPreviousSelected = None
+        self.ui.treeWidgetActors.setSelectionMode(QtGui.QAbstractItemView.ExtendedSelection)        # rubber-band selection selects many
         self.ui.treeWidgetActors.selectionModel().selectionChanged.connect(self.treeItemSelected)
 
         # setup API triggers
@@ -163,6 +174,14 @@ class MainApp(QtGui.QMainWindow):
         self.set_actor_linewidth_signal.connect(self.setActorLineWidth)
         self.set_actor_visibility_signal.connect(self.setActorVisibility)
         self.set_actor_mode_signal.connect(self.setActorMode)
+        self.set_actor_frame_axes_visibility_signal.connect(self.setActorFrameAxesVisibility)
+        self.append_trajectory_signal.connect(self.appendTrajectory)
+        self.update_grid_map_signal.connect(self.updateGridMap)
+        self.insert_voxels_signal.connect(self.insertVoxels)
+        self.clear_voxels_signal.connect(self.clearVoxels)
+        self.set_point_cloud_scalar_range_signal.connect(self.setPointCloudScalarRange)
+        self.set_camera_follow_signal.connect(self.setCameraFollow)
+        self.actors_within_radius_signal.connect(self.getActorsWithinRadius)
 
     def start(self, timer_update=False, timer_fps=30):
         # startup the vtk canvas
@@ -182,6 +201,10 @@ class MainApp(QtGui.QMainWindow):
             # no object selected, return
             self.ui.actorPropertiesDock.display('empty')
             return
+        if len(treeWidgetItems) > 1:
+            # the properties dock edits a single object - a multiple selection shows none
+            self.ui.actorPropertiesDock.display('empty')
+            return
         treeWidgetItem = treeWidgetItems[0]
         actor_tree_widget_ID = str(treeWidgetItem.text(1))
         if actor_tree_widget_ID == 'orientation axes':
@@ -196,6 +219,20 @@ class MainApp(QtGui.QMainWindow):
         else:
             self.ui.actorPropertiesDock.display('empty')
 
+    def selectTreeWidgetItems(self, treeWidgetItems):
+        # replace the selection (i.e. with the actors in a rubber-band rectangle) - selectionChanged is held back while
+        # the items are selected one by one, and the properties dock is updated once for the whole selection
+        selection_model = self.ui.treeWidgetActors.selectionModel()
+        selection_model.blockSignals(True)
+        self.ui.treeWidgetActors.clearSelection()
+        for treeWidgetItem in treeWidgetItems:
+            treeWidgetItem.setSelected(True)
+        selection_model.blockSignals(False)
+        self.ui.treeWidgetActors.viewport().update()
+        if len(treeWidgetItems) > 0:
+            self.ui.treeWidgetActors.scrollToItem(treeWidgetItems[0])
+        self.treeItemSelected()
+
     def treeItemChanged(self, treeWidgetItem):
         # on modification of a tree widget item (i.e. visibility checkbox)
         self.ui.treeWidgetActors.blockSignals(True)
@@ -223,11 +260,11 @@ class MainApp(QtGui.QMainWindow):
 
     def treeItemContextMenu(self, position):
         # create context menu when right-clicking on a tree object - add primitives/directories, rename, set offset/orientation, apply transform, remove
-        treeWidgetItems = self.ui.treeWidgetActors.selectedItems()
-        if len(treeWidgetItems) == 0:
-            # no object selected
+        # the menu acts on the item under the cursor, which need not be the first of a multiple selection
+        treeWidgetItem = self.ui.treeWidgetActors.itemAt(position)
+        if treeWidgetItem is None:
+            # no object under the cursor
             return
-        treeWidgetItem = treeWidgetItems[0]
         actor_tree_widget_ID = str(treeWidgetItem.text(1))
         if actor_tree_widget_ID == 'orientation axes':
             # we dont allow any changes to the orientation axes except for visibility
@@ -247,6 +284,15 @@ class MainApp(QtGui.QMainWindow):
         resetTransformAction = menu.addAction("Reset Transform")
         resetTransformAction.triggered.connect(lambda: self.treeItemRecurseResetTransform(treeWidgetItem))
         menu.addSeparator()
+        if self.vtk_main_canvas.isCameraFollowing(tree_object.transform):
+            stopFollowAction = menu.addAction("Stop Camera Follow")
+            stopFollowAction.triggered.connect(lambda: self.vtk_main_canvas.stopCameraFollow())
+        else:
+            followAction = menu.addAction("Camera Follow")
+            followAction.triggered.connect(lambda: self.vtk_main_canvas.startCameraFollow(tree_object.transform))
+            followHeadingAction = menu.addAction("Camera Follow (with heading)")
+            followHeadingAction.triggered.connect(lambda: self.vtk_main_canvas.startCameraFollow(tree_object.transform, True))
+        menu.addSeparator()
         if tree_object_type == DIR_TYPE:
             addPrimitiveAction = menu.addAction("Add Primitive")
             addPrimitiveAction.triggered.connect(lambda: self.treeItemAddPrimitive(treeWidgetItem))
@@ -496,11 +542,11 @@ class MainApp(QtGui.QMainWindow):
         # recursively remove a tree object from the tree
         tree_object = self.tree_widget_items_to_objects[treeWidgetItem]
         tree_object_type = tree_object.object_type
+        self.vtk_main_canvas.stopCameraFollow(tree_object.transform)
         if tree_object_type == ACTOR_TYPE or tree_object_type == BILLBOARD_TYPE or tree_object_type == AXES_TYPE:
             actor = tree_object.actor
             self.vtk_main_canvas.removeActor(actor)
-            axes = tree_object.axes
-            self.vtk_main_canvas.removeActorFrameAxes(axes)
+            self.setActorFrameAxesVisible(tree_object, False)
             del self.tree_widget_items_to_objects[treeWidgetItem]
         elif tree_object_type == DIR_TYPE:
             # recurse through children of this tree widget, removing them
@@ -540,6 +586,10 @@ class MainApp(QtGui.QMainWindow):
         actor = Primitives.Grid(full_length, cell_length)
         self.addActor(level_list, actor, Primitives.PRIMITIVE_GRID)
 
+    def addAdaptiveGrid(self, level_list):
+        actor = Primitives.AdaptiveGrid()
+        self.addActor(level_list, actor, Primitives.PRIMITIVE_ADAPTIVE_GRID)
+
     def addAxes(self, level_list):
         actor = Primitives.Axes()
         self.addActor(level_list, actor, Primitives.PRIMITIVE_AXES)
@@ -742,27 +792,40 @@ class MainApp(QtGui.QMainWindow):
         # finally, all checks passed, so add the actor to the vtk scene
         if add_bool:
             self.vtk_main_canvas.addActor(new_tree_widget_item, actor)
-            # add an axes for this actor to indicate the orientation of its frame
+            # the axes indicating the orientation of this actor's frame are only created once they are made visible
             self.addActorFrameAxes(new_tree_widget_item)
-            # setup actor and axes transforms
+            # setup actor transform
             parent_tree_widget_item = new_tree_widget_item.parent()
             if parent_tree_widget_item is not None:
                 parent_tree_object = self.tree_widget_items_to_objects[parent_tree_widget_item]
                 new_tree_object.transform.PostMultiply()
                 new_tree_object.transform.Concatenate(parent_tree_object.transform)
                 new_tree_object.actor.SetUserTransform(new_tree_object.transform)
-                new_tree_object.axes.SetUserTransform(new_tree_object.transform)
         self.ui.treeWidgetActors.blockSignals(False)
         self.emit(QtCore.SIGNAL('addActorStatus'), Status.OK)
 
     def addActorFrameAxes(self, tree_widget_item):
-        # add the axes to the vtk scene
-        axes = self.vtk_main_canvas.addActorFrameAxes(tree_widget_item)
-        # add the axes to our dict mapping tree widgets to actors
-        self.tree_widget_items_to_objects[tree_widget_item].axes = axes
+        # setup the frame axes properties - the vtk axes actor itself is created lazily by setActorFrameAxesVisible
+        self.tree_widget_items_to_objects[tree_widget_item].axes = None
         self.tree_widget_items_to_objects[tree_widget_item].axes_scale = 1.0
         self.tree_widget_items_to_objects[tree_widget_item].axes_visible = False
 
+    def setActorFrameAxesVisible(self, tree_object, visible):
+        # create the frame axes when first made visible, and release them when hidden again
+        if visible:
+            if tree_object.axes is None:
+                tree_object.axes = self.vtk_main_canvas.addActorFrameAxes(tree_object.actor.GetUserTransform(), tree_object.axes_scale)
+        else:
+            if tree_object.axes is not None:
+                self.vtk_main_canvas.removeActorFrameAxes(tree_object.axes)
+                tree_object.axes = None
+        tree_object.axes_visible = visible
+
+    def setActorFrameAxesScale(self, tree_object, scale):
+        tree_object.axes_scale = scale
+        if tree_object.axes is not None:
+            self.vtk_main_canvas.setActorScale(tree_object.axes, scale)
+
     def setActor(self, level_list, actor, actor_type):
         treeWidgetItem = self._getActorTreeWidgetItemFromLevelList(level_list)
         tree_object = self._getActorTreeObjectFromLevelList(level_list)
@@ -776,6 +839,8 @@ class MainApp(QtGui.QMainWindow):
         tree_object.actor = actor
         tree_object.actor_type = actor_type
         tree_object.actor.SetUserTransform(tree_object.transform)
+        if tree_object.axes is not None:
+            tree_object.axes.SetUserTransform(tree_object.transform)
         self.vtk_main_canvas.setActorVisibility(tree_object.actor, tree_object.actor_visible)
         self.vtk_main_canvas.setActorOpacity(tree_object.actor, tree_object.alpha)
         self.vtk_main_canvas.setActorPointSize(tree_object.actor, tree_object.point_size)
@@ -794,6 +859,112 @@ class MainApp(QtGui.QMainWindow):
             self.vtk_main_canvas.setActorToPoints(tree_object.actor)
         self.emit(QtCore.SIGNAL('setActorStatus'), Status.OK)
 
+    def appendTrajectory(self, level_list, points, colors):
+        tree_object = self._getActorTreeObjectFromLevelList(level_list)
+        if tree_object is None:
+            warn_str = "appendTrajectory failed: an actor does not exist at the level list: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('appendTrajectoryStatus'), Status.NONEXISTING_PATH)
+            return
+        if tree_object.actor_type != Primitives.PRIMITIVE_TRAJECTORY:
+            warn_str = "appendTrajectory failed: the actor at the level list is not a trajectory: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('appendTrajectoryStatus'), Status.MISMATCHED_TYPE)
+            return
+        tree_object.actor.Append(points, colors)
+        self.vtk_main_canvas.requestUpdate(None, None)
+        self.emit(QtCore.SIGNAL('appendTrajectoryStatus'), Status.OK)
+
+    def updateGridMap(self, level_list, row0, col0, patch):
+        tree_object = self._getActorTreeObjectFromLevelList(level_list)
+        if tree_object is None:
+            warn_str = "updateGridMap failed: an actor does not exist at the level list: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('updateGridMapStatus'), Status.NONEXISTING_PATH)
+            return
+        if tree_object.actor_type != Primitives.PRIMITIVE_GRID_MAP:
+            warn_str = "updateGridMap failed: the actor at the level list is not a grid map: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('updateGridMapStatus'), Status.MISMATCHED_TYPE)
+            return
+        tree_object.actor.Update(row0, col0, patch)
+        self.vtk_main_canvas.requestUpdate(None, None)
+        self.emit(QtCore.SIGNAL('updateGridMapStatus'), Status.OK)
+
+    def insertVoxels(self, level_list, indices, colors):
+        tree_object = self._getActorTreeObjectFromLevelList(level_list)
+        if tree_object is None:
+            warn_str = "insertVoxels failed: an actor does not exist at the level list: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('insertVoxelsStatus'), Status.NONEXISTING_PATH)
+            return
+        if tree_object.actor_type != Primitives.PRIMITIVE_VOXEL_MAP:
+            warn_str = "insertVoxels failed: the actor at the level list is not a voxel map: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('insertVoxelsStatus'), Status.MISMATCHED_TYPE)
+            return
+        tree_object.actor.Insert(indices, colors)
+        self.vtk_main_canvas.requestUpdate(None, None)
+        self.emit(QtCore.SIGNAL('insertVoxelsStatus'), Status.OK)
+
+    def clearVoxels(self, level_list, indices):
+        tree_object = self._getActorTreeObjectFromLevelList(level_list)
+        if tree_object is None:
+            warn_str = "clearVoxels failed: an actor does not exist at the level list: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('clearVoxelsStatus'), Status.NONEXISTING_PATH)
+            return
+        if tree_object.actor_type != Primitives.PRIMITIVE_VOXEL_MAP:
+            warn_str = "clearVoxels failed: the actor at the level list is not a voxel map: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('clearVoxelsStatus'), Status.MISMATCHED_TYPE)
+            return
+        tree_object.actor.Clear(indices)
+        self.vtk_main_canvas.requestUpdate(None, None)
+        self.emit(QtCore.SIGNAL('clearVoxelsStatus'), Status.OK)
+
+    def setPointCloudScalarRange(self, level_list, minimum, maximum):
+        tree_object = self._getActorTreeObjectFromLevelList(level_list)
+        if tree_object is None:
+            warn_str = "setPointCloudScalarRange failed: an actor does not exist at the level list: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('setPointCloudScalarRangeStatus'), Status.NONEXISTING_PATH)
+            return
+        if tree_object.actor_type != Primitives.PRIMITIVE_POINT_CLOUD:
+            warn_str = "setPointCloudScalarRange failed: the actor at the level list is not a point cloud: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('setPointCloudScalarRangeStatus'), Status.MISMATCHED_TYPE)
+            return
+        # only the mapper range changes - the points and scalars stay where they are
+        tree_object.actor.GetMapper().SetScalarRange(minimum, maximum)
+        self.vtk_main_canvas.requestUpdate(None, None)
+        self.emit(QtCore.SIGNAL('setPointCloudScalarRangeStatus'), Status.OK)
+
+    def setCameraFollow(self, level_list, orientation):
+        # an empty level list stops following - otherwise follow the actor, or else the directory, at the level list
+        if len(level_list) == 0:
+            self.vtk_main_canvas.stopCameraFollow()
+            self.emit(QtCore.SIGNAL('setCameraFollowStatus'), Status.OK)
+            return
+        tree_object = None
+        for tree_widget_ID in ['/'.join(level_list), '/'.join(level_list) + '/']:
+            tree_widget_list = self.ui.treeWidgetActors.findItems(tree_widget_ID, QtCore.Qt.MatchExactly|QtCore.Qt.MatchRecursive, 1)
+            if len(tree_widget_list) > 0:
+                tree_object = self.tree_widget_items_to_objects[tree_widget_list[0]]
+                break
+        if tree_object is None:
+            warn_str = "setCameraFollow failed: an actor or directory does not exist at the level list: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('setCameraFollowStatus'), Status.NONEXISTING_PATH)
+            return
+        self.vtk_main_canvas.startCameraFollow(tree_object.transform, orientation)
+        self.emit(QtCore.SIGNAL('setCameraFollowStatus'), Status.OK)
+
+    def getActorsWithinRadius(self, center, radius):
+        tree_widget_items = self.vtk_main_canvas.getActorsWithinRadius(center, radius)
+        self.actors_within_radius = [str(tree_widget_item.text(1)).split('/') for tree_widget_item in tree_widget_items]
+        self.emit(QtCore.SIGNAL('actorsWithinRadiusStatus'), Status.OK)
+
     def removeActor(self, level_list):
         treeWidgetItem = self._getActorTreeWidgetItemFromLevelList(level_list)
         tree_object = self._getActorTreeObjectFromLevelList(level_list)
@@ -803,9 +974,9 @@ class MainApp(QtGui.QMainWindow):
             self.emit(QtCore.SIGNAL('removeActorStatus'), Status.NONEXISTING_PATH)
             return
         actor = tree_object.actor
+        self.vtk_main_canvas.stopCameraFollow(tree_object.transform)
         self.vtk_main_canvas.removeActor(actor)
-        axes = tree_object.axes
-        self.vtk_main_canvas.removeActorFrameAxes(axes)
+        self.setActorFrameAxesVisible(tree_object, False)
         del self.tree_widget_items_to_objects[treeWidgetItem]
         parent_tree_widget = treeWidgetItem.parent()
         if parent_tree_widget is None:
@@ -869,6 +1040,7 @@ class MainApp(QtGui.QMainWindow):
             return
         tree_object = self.tree_widget_items_to_objects[treeWidgetItem]
         tree_object_type = tree_object.object_type
+        self.vtk_main_canvas.stopCameraFollow(tree_object.transform)
         # recurse through children of this tree widget, removing them
         while treeWidgetItem.childCount() != 0:
             child_tree_widget = treeWidgetItem.child(0)
@@ -965,6 +1137,19 @@ class MainApp(QtGui.QMainWindow):
             tree_object.actor_visible = visibility
         self.emit(QtCore.SIGNAL('setActorVisibleStatus'), Status.OK)
 
+    def setActorFrameAxesVisibility(self, level_list, visibility):
+        tree_object = self._getActorTreeObjectFromLevelList(level_list)
+        if tree_object is None:
+            warn_str = "setActorFrameAxesVisibility failed: an actor does not exist at the level list: " + str(level_list)
+            warnings.warn(warn_str, RuntimeWarning)
+            self.emit(QtCore.SIGNAL('setActorFrameAxesVisibilityStatus'), Status.NONEXISTING_PATH)
+            return
+        if tree_object.actor is not None:
+            self.setActorFrameAxesVisible(tree_object, visibility)
+            if self.ui.actorPropertiesDock.tree_object is tree_object:
+                self.ui.actorPropertiesDock.display('actor', tree_object)
+        self.emit(QtCore.SIGNAL('setActorFrameAxesVisibilityStatus'), Status.OK)
+
     def setActorOpacity(self, level_list, opacity):
         tree_object = self._getActorTreeObjectFromLevelList(level_list)
         if tree_object is None:
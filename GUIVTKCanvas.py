@@ -11,6 +11,7 @@ main UI VTK canvas
 
 ''' standard libs '''
 import math
+import time
 import warnings
 import numpy as np
 
@@ -24,6 +25,11 @@ from TerrainInteractorStyle import TerrainInteractorStyle
 from TopDownInteractorStyle import TopDownInteractorStyle
 import Primitives
 import Billboards
+import Grids
+import DepthPicking
+import InteractiveDetail
+import OctreePointClouds
+import SpatialIndex
 import TransformUtils
 import GUIPrimitiveDialog
 import GUITransformDialog
@@ -38,6 +44,20 @@ ACTOR_TYPE = 'actor'
 BILLBOARD_TYPE = 'billboard'
 AXES_TYPE = 'axes'
 
+''' camera follow parameters '''
+CAMERA_FOLLOW_SMOOTH_TIME = 0.3     # seconds for the camera to (critically damped) catch up with the followed node
+CAMERA_FOLLOW_FRAME_MS = 33         # render interval while the camera is still catching up
+CAMERA_FOLLOW_SETTLED = 1e-4        # fraction of the view size below which the camera counts as caught up
+
+def _smoothDamp(current, target, velocity, dt, smooth_time=CAMERA_FOLLOW_SMOOTH_TIME):
+    # critically damped spring step towards target (Game Programming Gems 4, 1.10) - returns the new value and velocity
+    omega = 2.0/smooth_time
+    x = omega*dt
+    decay = 1.0/(1.0 + x + 0.48*x*x + 0.235*x*x*x)
+    change = current - target
+    temp = (velocity + omega*change)*dt
+    return target + (change + temp)*decay, (velocity - omega*temp)*decay
+
 class VTKCanvas(QtGui.QFrame):
     ''' the Qt4 frame that holds the main VTK canvas '''
 
@@ -55,6 +75,44 @@ class VTKCanvas(QtGui.QFrame):
         # setup the vtk renderers - one for objects, one for overlay icons/text (which always renders on top)
         self.vtk_renderer = vtk.vtkRenderer()
 
+        # actors that adapt their level of detail to the camera - updated once per frame, right before the renderer draws
+        self.lod_actors = set()
+        self.lod_render_pending = False
+        self.vtk_renderer.AddObserver('StartEvent', self.updateLevelOfDetail)
+
+        # camera follow - the transform of the tree node the camera follows, and the smoothing state
+        self.follow_transform = None
+        self.follow_orientation = False
+        self.follow_camera = None
+        self.follow_velocity = np.zeros(3)
+        self.follow_yaw = None
+        self.follow_yaw_velocity = 0.0
+        self.follow_time = None
+
+        # reduced detail while the camera moves - full detail comes back once the camera has been still for a moment
+        self.interactive_detail = InteractiveDetail.InteractiveDetail()
+        self.interactive_timer = QtCore.QTimer()
+        self.interactive_timer.setSingleShot(True)
+        self.interactive_timer.timeout.connect(self.endInteractiveDetail)
+        self.frame_axes = set()
+
+        # loose octree over the world bounds of the 3D scene actors - for region queries and rubber-band selection
+        self.spatial_index = SpatialIndex.SpatialIndex()
+        # actors are re-filed only when a Modified event says their bounds may have changed
+        self.bounds_tracker = SpatialIndex.ActorBoundsTracker(self.spatial_index)
+
+        # world coordinates and actors under the cursor, from the depth buffer of the last frame and the spatial index
+        self.depth_picker = DepthPicking.DepthPicker(self.vtk_renderer, self.actors_to_tree_widget_items, self.spatial_index,
+                                                     self.refreshSpatialIndex)
+
+        # view frustum culling - actors whose bounds are off screen are hidden before each frame, and shown again when
+        # they come back into view
+        self.frustum_culling = True
+        self.culled = set()
+        self.in_view = set()        # indexed actors inside the view at the last culling
+        self.cull_pending = set()   # actors whose bounds or visibility changed since the last culling
+        self.cull_view = None       # camera modification time and aspect ratio at the last culling
+
         # setup the vtk interactor
         self.vtk_interactor = QVTKRenderWindowInteractor(self)
 
@@ -78,6 +136,221 @@ class VTKCanvas(QtGui.QFrame):
         # request a render update of the scene
         self.vtk_render_window.Render()
 
+    def updateLevelOfDetail(self, obj, event):
+        # the followed node moves the camera first, so levels of detail are chosen for this frame's view
+        following = self.updateCameraFollow()
+        self.cullActors()
+        streaming = False
+        for actor in self.lod_actors:
+            if not actor.GetVisibility():
+                continue
+            if actor.UpdateLOD(self.vtk_renderer):
+                streaming = True
+        if (following or streaming) and not self.lod_render_pending:
+            # the camera is still catching up, or an actor is still loading data in the background - render again shortly
+            self.lod_render_pending = True
+            QtCore.QTimer.singleShot(CAMERA_FOLLOW_FRAME_MS if following else 100, self.renderStreamedData)
+
+    def renderStreamedData(self):
+        self.lod_render_pending = False
+        self.vtk_interactor.Render()
+
+    def setInteractorStyle(self, style):
+        # the camera interactions of the style switch the scene to interactive detail
+        style.AddObserver('StartInteractionEvent', self.startInteractiveDetail)
+        style.AddObserver('InteractionEvent', self.startInteractiveDetail)
+        style.AddObserver('EndInteractionEvent', self.idleInteractiveDetail)
+        style.picker = self.depth_picker
+        style.selection_callback = self.selectActorsInRectangle
+        self.vtk_interactor.SetInteractorStyle(style)
+
+    def pickActor(self, x, y):
+        # (actor, tree widget item, world position) under display position x, y - see DepthPicking.DepthPicker.PickActor
+        return self.depth_picker.PickActor(x, y)
+
+    def pickWorldPosition(self, x, y):
+        return self.depth_picker.PickWorldPosition(x, y)
+
+    def isSpatiallyIndexed(self, actor):
+        # billboards and overlays are sized in pixels, and the adaptive grid spans whatever the camera sees - neither has
+        # meaningful world bounds
+        return actor.IsA('vtkProp3D') and not Billboards.isBillboard(actor) and not isinstance(actor, Grids.AdaptiveGrid)
+
+    def refreshSpatialIndex(self):
+        # re-file the actors whose data, mapper or transforms were modified since the last refresh, and return them -
+        # they are culled again on the next frame
+        moved = self.bounds_tracker.Refresh()
+        self.cull_pending |= moved
+        return moved
+
+    def isCullable(self, actor):
+        # octree point clouds only have bounds for the nodes already loaded, and already cull their nodes to the view
+        return not isinstance(actor, OctreePointClouds.OctreePointCloud)
+
+    def setFrustumCulling(self, enabled):
+        self.frustum_culling = enabled
+        if not enabled:
+            for actor in self.culled:
+                actor.VisibilityOn()
+            self.culled = set()
+        # every actor is tested again once culling resumes
+        self.in_view = set()
+        self.cull_view = None
+        self.cull_pending = set(self.spatial_index.items)
+        self.vtk_interactor.Render()
+
+    def cullActors(self):
+        '''
+        Hide the visible actors whose bounds left the view, and show the culled ones that came back into it - only the
+        actors whose in-view state changed, or whose bounds or visibility changed, are touched, and nothing is done
+        while neither they nor the camera changed. Actors hidden by the user are never culled, so their visibility
+        stays their own.
+        '''
+        if not self.frustum_culling:
+            return
+        self.refreshSpatialIndex()
+        camera = self.vtk_renderer.GetActiveCamera()
+        aspect = self.vtk_renderer.GetTiledAspectRatio()
+        view = (camera.GetMTime(), aspect)
+        if view == self.cull_view and len(self.cull_pending) == 0:
+            return
+        self.cull_view = view
+        pending = self.cull_pending
+        self.cull_pending = set()
+
+        planes = [0.0]*24
+        camera.GetFrustumPlanes(aspect, planes)
+        # only the side planes - the near and far planes come from the clipping range, which is fitted to the visible
+        # actors only, so testing against them would keep actors beyond it culled for good
+        in_view = set(self.spatial_index.QueryFrustum(np.reshape(planes, (6, 4))[0:4]))
+        entered = in_view - self.in_view
+        left = self.in_view - in_view
+        self.in_view = in_view
+
+        # culled actors back in view, or no longer indexed (i.e. their data was cleared)
+        restored = [actor for actor in entered | pending if actor in self.culled and (actor in in_view or actor not in self.spatial_index)]
+        for actor in restored:
+            actor.VisibilityOn()
+            self.culled.discard(actor)
+
+        for actor in left | (pending - in_view):
+            if actor in self.spatial_index and actor not in self.culled and actor.GetVisibility() and self.isCullable(actor):
+                actor.VisibilityOff()
+                self.culled.add(actor)
+
+        if len(restored) > 0:
+            # the clipping range was fitted without the restored actors
+            self.vtk_renderer.ResetCameraClippingRange()
+
+    def getActorsWithinRadius(self, center, radius):
+        # tree widget items of the actors whose bounds come within radius of the world position center
+        self.refreshSpatialIndex()
+        return [self.actors_to_tree_widget_items[actor] for actor in self.spatial_index.QuerySphere(center, radius)]
+
+    def getActorsInRectangle(self, x0, y0, x1, y1):
+        # visible actors whose bounds reach into the view volume behind the display rectangle (x0, y0) - (x1, y1)
+        corners = []
+        for z in [0.0, 1.0]:
+            for x, y in [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]:
+                self.vtk_renderer.SetDisplayPoint(x, y, z)
+                self.vtk_renderer.DisplayToWorld()
+                world = self.vtk_renderer.GetWorldPoint()
+                corners.append([world[0]/world[3], world[1]/world[3], world[2]/world[3]])
+        self.refreshSpatialIndex()
+        return [actor for actor in self.spatial_index.QueryFrustum(SpatialIndex.frustumPlanes(corners)) if actor.GetVisibility()]
+
+    def selectActorsInRectangle(self, x0, y0, x1, y1):
+        # rubber-band selection - select the tree widget items of the actors in the display rectangle
+        actors = self.getActorsInRectangle(x0, y0, x1, y1)
+        self.Qt4GUI.selectTreeWidgetItems([self.actors_to_tree_widget_items[actor] for actor in actors])
+
+    def startInteractiveDetail(self, obj, event):
+        self.interactive_timer.start(InteractiveDetail.INTERACTIVE_IDLE_MS)
+        if not self.interactive_detail.active:
+            actors = self.actors_to_tree_widget_items.keys()
+            hide_actors = [actor for actor in actors if Billboards.isBillboard(actor)] + list(self.frame_axes)
+            self.interactive_detail.Enter(actors, hide_actors)
+
+    def idleInteractiveDetail(self, obj, event):
+        # the interaction ended (i.e. mouse release, or a single wheel step) - full detail after the idle time, unless it resumes
+        self.interactive_timer.start(InteractiveDetail.INTERACTIVE_IDLE_MS)
+
+    def endInteractiveDetail(self):
+        if self.interactive_detail.active:
+            self.interactive_detail.Leave()
+            self.vtk_interactor.Render()
+
+    def startCameraFollow(self, transform, orientation=False):
+        # lock the camera focal point (and with orientation, the camera heading) to a tree node's world transform
+        self.follow_transform = transform
+        self.follow_orientation = orientation
+        self.follow_camera = None
+        self.vtk_interactor.Render()
+
+    def stopCameraFollow(self, transform=None):
+        # stop following - only if following transform, when given
+        if transform is None or transform is self.follow_transform:
+            self.follow_transform = None
+
+    def isCameraFollowing(self, transform):
+        return self.follow_transform is not None and transform is self.follow_transform
+
+    def updateCameraFollow(self):
+        # called once per frame - steps the camera towards the followed node, and returns True until it has caught up
+        if self.follow_transform is None:
+            return False
+        camera = self.vtk_renderer.GetActiveCamera()
+        now = time.time()
+        if camera is not self.follow_camera:
+            # following just started, or the camera was replaced (i.e. perspective/top down switch) - start from rest
+            self.follow_camera = camera
+            self.follow_velocity = np.zeros(3)
+            self.follow_yaw = None
+            self.follow_yaw_velocity = 0.0
+            self.follow_time = now
+        dt = min(now - self.follow_time, 0.1)
+        self.follow_time = now
+
+        focal_point = np.array(camera.GetFocalPoint())
+        target = np.array(self.follow_transform.GetPosition())
+        if not self.camera_perspective:
+            # top down - the camera only follows in the ground plane
+            target[2] = focal_point[2]
+        new_focal_point, self.follow_velocity = _smoothDamp(focal_point, target, self.follow_velocity, dt)
+        offset = np.array(camera.GetPosition()) - focal_point
+        camera.SetFocalPoint(new_focal_point)
+        camera.SetPosition(new_focal_point + offset)
+        moving = np.linalg.norm(target - new_focal_point) + np.linalg.norm(self.follow_velocity)*dt > CAMERA_FOLLOW_SETTLED*self._viewSize(camera)
+
+        if self.follow_orientation:
+            # keep the camera at the same heading relative to the node - terrain turns about the vertical through the
+            # focal point, top down rolls the view so the node keeps pointing the same way on screen
+            target_yaw = self.follow_transform.GetOrientation()[2]
+            if self.follow_yaw is None:
+                self.follow_yaw = target_yaw
+            target_yaw = self.follow_yaw + (target_yaw - self.follow_yaw + 180.0) % 360.0 - 180.0
+            new_yaw, self.follow_yaw_velocity = _smoothDamp(np.array([self.follow_yaw]), np.array([target_yaw]), np.array([self.follow_yaw_velocity]), dt)
+            self.follow_yaw_velocity = self.follow_yaw_velocity[0]
+            delta = new_yaw[0] - self.follow_yaw
+            self.follow_yaw = new_yaw[0]
+            if self.camera_perspective:
+                camera.Azimuth(delta)
+            else:
+                camera.Roll(-delta)
+            camera.OrthogonalizeViewUp()
+            moving = moving or abs(target_yaw - new_yaw[0]) > 0.01 or abs(self.follow_yaw_velocity) > 0.01
+
+        self.vtk_renderer.ResetCameraClippingRange()
+        if self.vtk_interactor.GetLightFollowCamera():
+            self.vtk_renderer.UpdateLightsGeometryToFollowCamera()
+        return moving
+
+    def _viewSize(self, camera):
+        # rough size of the visible world, to judge when the camera has caught up
+        if camera.GetParallelProjection():
+            return camera.GetParallelScale()
+        return camera.GetDistance()
+
     def start(self):
         # setup the vtk background - as default, set to light
         self.vtk_renderer.GradientBackgroundOn()
@@ -95,8 +368,8 @@ class VTKCanvas(QtGui.QFrame):
         # add the orientation axes to the bottom left of the canvas
         self.Qt4GUI.addOrientationAxes()
         
-        # setup the default base grid - 1x1km, 10m squares
-        self.Qt4GUI.addGrid(['grids', '1 km x 1 km, 10 m'], 1000, 10)
+        # setup the default base grid - spacing and extent follow the camera
+        self.Qt4GUI.addAdaptiveGrid(['grids', 'adaptive grid'])
 
         # startup vtk
         self.vtk_interactor.Initialize()
@@ -114,7 +387,7 @@ class VTKCanvas(QtGui.QFrame):
         self.Qt4GUI.camera_perspective_signal.emit(True)
         if not self.camera_perspective:
             self.vtk_renderer.SetActiveCamera(vtk.vtkCamera())
-            self.vtk_interactor.SetInteractorStyle(TerrainInteractorStyle())
+            self.setInteractorStyle(TerrainInteractorStyle())
             self.vtk_renderer.GetActiveCamera().SetViewUp(0,0,1)
             self.vtk_renderer.GetActiveCamera().SetPosition(0,1,10)
             self.vtk_renderer.GetActiveCamera().SetFocalPoint(0,0,0)
@@ -133,7 +406,7 @@ class VTKCanvas(QtGui.QFrame):
             curr_pos = [curr_fp[0], curr_fp[1]+1, 10]
             curr_fp = [curr_fp[0], curr_fp[1], 0]
             self.vtk_renderer.SetActiveCamera(vtk.vtkCamera())
-            self.vtk_interactor.SetInteractorStyle(TerrainInteractorStyle())
+            self.setInteractorStyle(TerrainInteractorStyle())
             self.vtk_renderer.GetActiveCamera().SetViewUp(0,0,1)
             self.vtk_renderer.GetActiveCamera().SetPosition(curr_pos)
             self.vtk_renderer.GetActiveCamera().SetFocalPoint(curr_fp)
@@ -149,7 +422,7 @@ class VTKCanvas(QtGui.QFrame):
         self.Qt4GUI.camera_perspective_signal.emit(False)
         if self.camera_perspective:
             self.vtk_renderer.SetActiveCamera(vtk.vtkCamera())
-            self.vtk_interactor.SetInteractorStyle(TopDownInteractorStyle())
+            self.setInteractorStyle(TopDownInteractorStyle())
             self.vtk_renderer.GetActiveCamera().SetViewUp(0,1,0)
             self.vtk_renderer.GetActiveCamera().ParallelProjectionOn()
             self.vtk_renderer.GetActiveCamera().SetParallelScale(1000)
@@ -170,7 +443,7 @@ class VTKCanvas(QtGui.QFrame):
             curr_pos = [curr_fp[0], curr_fp[1], 1e4]
             curr_fp = [curr_fp[0], curr_fp[1], 0]
             self.vtk_renderer.SetActiveCamera(vtk.vtkCamera())
-            self.vtk_interactor.SetInteractorStyle(TopDownInteractorStyle())
+            self.setInteractorStyle(TopDownInteractorStyle())
             self.vtk_renderer.GetActiveCamera().SetViewUp(0,1,0)
             self.vtk_renderer.GetActiveCamera().ParallelProjectionOn()
             self.vtk_renderer.GetActiveCamera().SetParallelScale(1000)
@@ -196,25 +469,43 @@ class VTKCanvas(QtGui.QFrame):
         self.vtk_renderer.SetBackground2(60.0/255,80.0/255,110.0/255)
         self.vtk_interactor.Render()
 
-    def addActorFrameAxes(self, tree_widget):
+    def addActorFrameAxes(self, transform, scale):
         frame_axes = Primitives.Axes()
         frame_axes.AxisLabelsOff()
-        frame_axes.VisibilityOff()
+        frame_axes.SetTotalLength(scale, scale, scale)
+        frame_axes.SetUserTransform(transform)
+        self.frame_axes.add(frame_axes)
         self.vtk_renderer.AddActor(frame_axes)
         self.vtk_interactor.Render()
         return frame_axes
 
     def removeActorFrameAxes(self, actor):
+        self.frame_axes.discard(actor)
+        self.interactive_detail.Forget(actor)
         self.vtk_renderer.RemoveActor(actor)
         self.vtk_interactor.Render()
 
     def addActor(self, tree_widget, actor):
         self.actors_to_tree_widget_items[actor] = tree_widget
+        if hasattr(actor, 'UpdateLOD'):
+            self.lod_actors.add(actor)
+        if self.isSpatiallyIndexed(actor):
+            self.bounds_tracker.Add(actor)
         self.vtk_renderer.AddActor(actor)
         self.vtk_interactor.Render()
 
     def removeActor(self, actor):
         del self.actors_to_tree_widget_items[actor]
+        self.lod_actors.discard(actor)
+        self.interactive_detail.Forget(actor)
+        self.bounds_tracker.Remove(actor)
+        self.in_view.discard(actor)
+        self.cull_pending.discard(actor)
+        if actor in self.culled:
+            self.culled.discard(actor)
+            actor.VisibilityOn()
+        if hasattr(actor, 'StopLoading'):
+            actor.StopLoading()
         self.vtk_renderer.RemoveActor(actor)
         self.vtk_interactor.Render()
 
@@ -223,6 +514,12 @@ class VTKCanvas(QtGui.QFrame):
         self.addActor(tree_widget, actor)
 
     def setActorVisibility(self, actor, visible):
+        # the user's visibility wins over culling, even when the change is deferred - a culled actor made visible is
+        # culled again on the next frame if still off screen
+        self.culled.discard(actor)
+        self.cull_pending.add(actor)
+        if self.interactive_detail.SetVisibility(actor, visible):
+            return
         if visible:
             actor.VisibilityOn()
         else:
@@ -233,7 +530,7 @@ class VTKCanvas(QtGui.QFrame):
         if actor.GetClassName() == "vtkAxesActor":
             actor.SetTotalLength(scale, scale, scale)
         else:
-            if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+            if Billboards.isBillboard(actor):
                 # billboards have no scaling
                 return
             actor.SetScale(scale)
@@ -243,7 +540,7 @@ class VTKCanvas(QtGui.QFrame):
         if actor.GetClassName() == "vtkAxesActor":
             return actor.GetTotalLength()
         else:
-            if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+            if Billboards.isBillboard(actor):
                 # billboards have no scaling
                 return [1,1,1]
             return actor.GetScale()
@@ -270,7 +567,7 @@ class VTKCanvas(QtGui.QFrame):
         return actor.GetProperty().GetLineWidth()
 
     def setActorToSurface(self, actor):
-        if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+        if Billboards.isBillboard(actor):
             # billboards have no render mode
             return
         actor.GetProperty().EdgeVisibilityOff()
@@ -278,7 +575,7 @@ class VTKCanvas(QtGui.QFrame):
         self.vtk_interactor.Render()
 
     def setActorToWireframe(self, actor):
-        if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+        if Billboards.isBillboard(actor):
             # billboards have no render mode
             return
         actor.GetProperty().EdgeVisibilityOff()
@@ -286,7 +583,7 @@ class VTKCanvas(QtGui.QFrame):
         self.vtk_interactor.Render()
 
     def setActorToSurfaceEdges(self, actor):
-        if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+        if Billboards.isBillboard(actor):
             # billboards have no render mode
             return
         actor.GetProperty().EdgeVisibilityOn()
@@ -294,7 +591,7 @@ class VTKCanvas(QtGui.QFrame):
         self.vtk_interactor.Render()
 
     def setActorToPoints(self, actor):
-        if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+        if Billboards.isBillboard(actor):
             # billboards have no render mode
             return
         actor.GetProperty().EdgeVisibilityOff()
@@ -302,7 +599,7 @@ class VTKCanvas(QtGui.QFrame):
         self.vtk_interactor.Render()
 
     def getActorRenderMode(self, actor):
-        if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+        if Billboards.isBillboard(actor):
             # billboards have no render mode
             return None, None
         edge = actor.GetProperty().GetEdgeVisibility()
@@ -317,8 +614,13 @@ class VTKCanvas(QtGui.QFrame):
         self.vtk_interactor.Render()
 
     def setActorTexture(self, actor, image_path):
-        if actor.__class__ == Billboards.TextBillboard:
-            # text billboards have no texture
+        if isinstance(actor, (Billboards.TextBillboard, Billboards.LabelLayer, Billboards.SpriteLayer)):
+            # text billboards have no texture, label and sprite layers draw from their atlas
+            return
+        if isinstance(actor, Billboards.ImageBillboard):
+            # image billboards draw from the shared image atlas
+            actor.SetImage(image_path)
+            self.vtk_interactor.Render()
             return
         if image_path[-4:].lower() == '.jpg' or image_path[-4:].lower() == '.jpeg':
             reader = vtk.vtkJPEGReader()
@@ -347,7 +649,7 @@ class VTKCanvas(QtGui.QFrame):
         self.vtk_interactor.Render()
 
     def setActorOffset(self, actor, x_offset, y_offset, z_offset):
-        if actor.__class__ == Billboards.TextBillboard or actor.__class__ == Billboards.ImageBillboard:
+        if Billboards.isBillboard(actor):
             # billboards are unaffected by offset changes
             pass
         else:
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+grid map classes
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+''' grid map parameters '''
+GRIDMAP_TILE_SIZE = 256         # cells per tile side - a tile is one texture, and is re-uploaded as a whole when any of its cells change
+GRIDMAP_UNKNOWN_COLOR = [128, 128, 128, 255]    # color of NaN (unknown) cells of scalar maps
+
+def valuesToColors(values, value_range):
+    '''
+    Given an array of scalar cell values and a (min, max) range, return (... x 4) uint8 RGBA colors - min maps to
+    white and max to black (i.e. free/occupied for occupancy maps), NaN maps to GRIDMAP_UNKNOWN_COLOR.
+    '''
+    values = np.asarray(values, dtype=float)
+    scaled = (values - value_range[0])/float(value_range[1] - value_range[0])
+    gray = np.uint8(255) - (np.clip(np.nan_to_num(scaled), 0.0, 1.0)*255).astype(np.uint8)
+    colors = np.empty(np.shape(values) + (4,), dtype=np.uint8)
+    colors[...,0:3] = gray[...,None]
+    colors[...,3] = 255
+    colors[np.isnan(values)] = GRIDMAP_UNKNOWN_COLOR
+    return colors
+
+class GridMap(vtk.vtkAssembly):
+    ''' a 2D grid map in the z=0 plane, drawn as one textured quad per tile so that small changes only re-upload the tiles they touch '''
+    def __init__(self, grid, origin, resolution, value_range=(0.0, 1.0), tile_size=GRIDMAP_TILE_SIZE):
+        # grid[row, col] covers x = origin[0] + [col, col+1)*resolution, y = origin[1] + [row, row+1)*resolution - grid is
+        # either scalar (rows x cols, i.e. occupancy probabilities or depths, NaN for unknown) or uint8 colors (rows x cols x 3/4)
+        if np.ndim(grid) == 2:
+            self.grid = np.array(grid, dtype=float)
+        else:
+            self.grid = np.array(grid, dtype=np.uint8)
+        self.origin = np.zeros(3)
+        self.origin[0:len(origin)] = origin
+        self.resolution = float(resolution)
+        self.value_range = value_range
+        self.tile_size = tile_size
+
+        # all tiles share one property, so the actor properties dock treats the grid map like a single actor
+        self.property = vtk.vtkProperty()
+        self.property.LightingOff()
+
+        num_rows, num_cols = np.shape(self.grid)[0:2]
+        self.num_tile_rows = int(math.ceil(float(num_rows)/tile_size))
+        self.num_tile_cols = int(math.ceil(float(num_cols)/tile_size))
+        self.tile_colors = {}
+        self.tile_images = {}
+        for tile_row in xrange(self.num_tile_rows):
+            for tile_col in xrange(self.num_tile_cols):
+                self._addTile(tile_row, tile_col)
+
+    def GetProperty(self):
+        return self.property
+
+    def SetTexture(self, texture):
+        # the grid map is its own texture
+        pass
+
+    def GetGrid(self):
+        return self.grid
+
+    def Update(self, row0, col0, patch):
+        # write patch into the grid at (row0, col0) - cells outside the grid are ignored, and only touched tiles are re-uploaded
+        patch = np.asarray(patch)
+        num_rows, num_cols = np.shape(self.grid)[0:2]
+        r0, c0 = max(row0, 0), max(col0, 0)
+        r1, c1 = min(row0 + np.shape(patch)[0], num_rows), min(col0 + np.shape(patch)[1], num_cols)
+        if r1 <= r0 or c1 <= c0:
+            return
+        self.grid[r0:r1, c0:c1] = patch[r0-row0:r1-row0, c0-col0:c1-col0]
+
+        for tile_row in xrange(r0//self.tile_size, (r1-1)//self.tile_size + 1):
+            for tile_col in xrange(c0//self.tile_size, (c1-1)//self.tile_size + 1):
+                # the part of the change that falls in this tile
+                tile_r0, tile_c0 = tile_row*self.tile_size, tile_col*self.tile_size
+                rr0, rr1 = max(r0, tile_r0), min(r1, tile_r0 + self.tile_size)
+                cc0, cc1 = max(c0, tile_c0), min(c1, tile_c0 + self.tile_size)
+                colors = self.tile_colors[(tile_row, tile_col)]
+                colors[rr0-tile_r0:rr1-tile_r0, cc0-tile_c0:cc1-tile_c0] = self._colors(self.grid[rr0:rr1, cc0:cc1])
+                self.tile_images[(tile_row, tile_col)].GetPointData().GetScalars().Modified()
+                self.tile_images[(tile_row, tile_col)].Modified()
+
+    def _colors(self, cells):
+        # RGBA colors of a block of cells
+        if cells.ndim == 3:
+            colors = np.empty(np.shape(cells)[0:2] + (4,), dtype=np.uint8)
+            colors[...,0:np.shape(cells)[2]] = cells[...,0:4]
+            if np.shape(cells)[2] < 4:
+                colors[...,3] = 255
+            return colors
+        return valuesToColors(cells, self.value_range)
+
+    def _addTile(self, tile_row, tile_col):
+        r0, c0 = tile_row*self.tile_size, tile_col*self.tile_size
+        r1, c1 = min(r0 + self.tile_size, np.shape(self.grid)[0]), min(c0 + self.tile_size, np.shape(self.grid)[1])
+
+        # the texture references the tile color buffer directly (deep=0) - updates write into the buffer and mark it modified
+        colors = np.ascontiguousarray(self._colors(self.grid[r0:r1, c0:c1]))
+        image = vtk.vtkImageData()
+        image.SetDimensions(c1-c0, r1-r0, 1)
+        image.SetScalarTypeToUnsignedChar()
+        image.SetNumberOfScalarComponents(4)
+        image.GetPointData().SetScalars(nps.numpy_to_vtk(colors.reshape(-1, 4), deep=0))
+        self.tile_colors[(tile_row, tile_col)] = colors
+        self.tile_images[(tile_row, tile_col)] = image
+
+        texture = vtk.vtkTexture()
+        texture.SetInput(image)
+        texture.InterpolateOff()
+        texture.RepeatOff()
+
+        quad = vtk.vtkPlaneSource()
+        quad.SetOrigin(self.origin[0] + c0*self.resolution, self.origin[1] + r0*self.resolution, self.origin[2])
+        quad.SetPoint1(self.origin[0] + c1*self.resolution, self.origin[1] + r0*self.resolution, self.origin[2])
+        quad.SetPoint2(self.origin[0] + c0*self.resolution, self.origin[1] + r1*self.resolution, self.origin[2])
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputConnection(quad.GetOutputPort())
+
+        actor = vtk.vtkActor()
+        actor.SetMapper(mapper)
+        actor.SetTexture(texture)
+        actor.SetProperty(self.property)
+        self.AddPart(actor)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+grid classes
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+''' custom libs '''
+import CameraUtils
+import VTKUtils
+
+''' adaptive grid parameters '''
+GRID_PIXEL_SPACING = 25         # target on-screen distance between grid lines, in pixels
+GRID_MAX_LINES = 200            # maximum number of lines drawn along each axis - bounds the draw cost at any zoom
+GRID_BLOCK = 10                 # the drawn extent snaps to multiples of this many cells, so panning rarely regenerates the grid
+
+def _niceSpacing(min_spacing):
+    # smallest spacing of the form {1,2,5}x10^k that is at least min_spacing
+    exponent = math.floor(math.log10(min_spacing))
+    for mantissa in [1.0, 2.0, 5.0, 10.0]:
+        spacing = mantissa*10.0**exponent
+        if spacing >= min_spacing:
+            return spacing
+    return 10.0**(exponent+1)
+
+def gridLines(x_min, x_max, y_min, y_max, spacing):
+    '''
+    Given an extent and spacing in the z=0 plane, return the (N x 3) end points of the grid lines - lines of constant
+    y followed by lines of constant x, two points per line.
+    '''
+    ys = y_min + spacing*np.arange(int(round((y_max - y_min)/spacing)) + 1)
+    xs = x_min + spacing*np.arange(int(round((x_max - x_min)/spacing)) + 1)
+    points = np.zeros((2*(len(ys) + len(xs)), 3))
+    points[0:2*len(ys):2,0] = x_min
+    points[1:2*len(ys):2,0] = x_max
+    points[0:2*len(ys),1] = np.repeat(ys, 2)
+    points[2*len(ys)::2,1] = y_min
+    points[2*len(ys)+1::2,1] = y_max
+    points[2*len(ys):,0] = np.repeat(xs, 2)
+    return points
+
+class AdaptiveGrid(vtk.vtkActor):
+    ''' a ground grid in the z=0 plane of its frame that picks its spacing and extent from the camera '''
+    def __init__(self):
+        self.spacing = None
+        self.extent = None
+
+        self.points = vtk.vtkPoints()
+        self.lines = vtk.vtkCellArray()
+
+        self.polydata = vtk.vtkPolyData()
+        self.polydata.SetPoints(self.points)
+        self.polydata.SetLines(self.lines)
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInput(self.polydata)
+
+        self.SetMapper(mapper)
+
+    def GetSpacing(self):
+        return self.spacing
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - the grid is only regenerated when its spacing or snapped extent changes
+        width, height = renderer.GetSize()
+        if width <= 0 or height <= 0:
+            return
+
+        # the camera is handled in the grid frame, so the grid follows any transform it is placed under
+        world_to_grid = vtk.vtkMatrix4x4()
+        vtk.vtkMatrix4x4.Invert(self.GetMatrix(), world_to_grid)
+
+        # ground points seen at the corners and the center of the viewport - rays that miss the plane (i.e. above the
+        # horizon) are cut off at the far clipping plane
+        ground = []
+        for (x, y) in [(0, 0), (width-1, 0), (0, height-1), (width-1, height-1), ((width-1)/2.0, (height-1)/2.0)]:
+            near = self._displayToGrid(renderer, world_to_grid, x, y, 0.0)
+            far = self._displayToGrid(renderer, world_to_grid, x, y, 1.0)
+            if (near[2] > 0) != (far[2] > 0) and near[2] != far[2]:
+                ground.append(near + (far - near)*(near[2]/(near[2] - far[2])))
+            else:
+                ground.append(far)
+        ground = np.array(ground)[:,0:2]
+        center = ground[-1]
+
+        # line spacing from the size of a pixel around the focal point
+        scale = max(self.GetScale())
+        pixel_size = CameraUtils.getWorldPixelSize(renderer)/scale
+        spacing = _niceSpacing(max(GRID_PIXEL_SPACING*pixel_size, 1e-9))
+
+        # visible extent snapped outwards to whole blocks, and clamped around the view center to bound the line count
+        block = GRID_BLOCK*spacing
+        half_max = (GRID_MAX_LINES//2)*spacing
+        lower = np.maximum(np.floor(np.min(ground, axis=0)/block)*block, np.floor((center - half_max)/block)*block)
+        upper = np.minimum(np.ceil(np.max(ground, axis=0)/block)*block, np.ceil((center + half_max)/block)*block)
+        upper = np.maximum(upper, lower + block)
+        extent = (lower[0], upper[0], lower[1], upper[1])
+
+        if spacing != self.spacing or extent != self.extent:
+            self.spacing = spacing
+            self.extent = extent
+            self._updatePolyData()
+
+    def _displayToGrid(self, renderer, world_to_grid, x, y, z):
+        renderer.SetDisplayPoint(x, y, z)
+        renderer.DisplayToWorld()
+        world = renderer.GetWorldPoint()
+        if world[3] != 0:
+            world = [world[0]/world[3], world[1]/world[3], world[2]/world[3], 1.0]
+        return np.array(world_to_grid.MultiplyPoint(world)[0:3])
+
+    def _updatePolyData(self):
+        points = gridLines(self.extent[0], self.extent[1], self.extent[2], self.extent[3], self.spacing)
+        num_lines = len(points)//2
+        self.points.SetData(nps.numpy_to_vtk(points, deep=1))
+        VTKUtils.numpyToCellArray(np.arange(2*num_lines).reshape(num_lines, 2), self.lines)
+        self.polydata.Modified()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+heightmap classes
+'''
+
+''' standard libs '''
+import math
+import collections
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+''' custom libs '''
+import CameraUtils
+
+''' heightmap parameters '''
+HEIGHTMAP_TILE_SIZE = 128       # cells per tile side - tiles are the unit of level of detail selection
+HEIGHTMAP_PIXEL_CELL = 4.0      # coarsest allowed on-screen size of a drawn cell, in pixels
+HEIGHTMAP_INTERACTIVE_LEVELS = 1    # levels coarser than the view needs while the camera moves
+HEIGHTMAP_CACHE_FACTOR = 2.0    # tile levels not drawn are kept (least recently drawn dropped first) up to this many times the drawn points
+
+def _sampleIndices(first, last, stride):
+    # every stride'th index from first to last, always including last so neighbouring tiles share their border
+    indices = np.arange(first, last+1, stride)
+    if indices[-1] != last:
+        indices = np.append(indices, last)
+    return indices
+
+class Heightmap(vtk.vtkAssembly):
+    '''
+    a regular grid of heights (i.e. a DEM or bathymetry survey), split into tiles that are drawn at camera-dependent
+    resolution - one actor per tile, so a tile changing level only swaps its own polydata
+    '''
+    def __init__(self, z_grid, origin, spacing, color_array=None, tile_size=HEIGHTMAP_TILE_SIZE):
+        # z_grid[row, col] is the height at x = origin[0] + col*spacing[0], y = origin[1] + row*spacing[1] - NaN marks cells without data
+        self.z_grid = np.asarray(z_grid, dtype=float)
+        self.origin = np.zeros(3)
+        self.origin[0:len(origin)] = origin
+        self.spacing = np.ones(2)*spacing
+        self.color_array = None
+        if color_array is not None:
+            # per-vertex colors, (rows x cols x 3/4)
+            self.color_array = np.asarray(color_array)
+        self.tile_size = tile_size
+
+        num_rows, num_cols = np.shape(self.z_grid)
+        if num_rows < 2 or num_cols < 2:
+            warn_str = 'heightmap needs at least 2 x 2 heights, got ' + str(num_rows) + ' x ' + str(num_cols)
+            warnings.warn(warn_str, RuntimeWarning)
+
+        # tiles cover [r0, r1] x [c0, c1] - neighbouring tiles share their border row/column
+        self.tiles = []
+        for r0 in xrange(0, max(num_rows-1, 1), tile_size):
+            for c0 in xrange(0, max(num_cols-1, 1), tile_size):
+                self.tiles.append((r0, min(r0+tile_size, num_rows-1), c0, min(c0+tile_size, num_cols-1)))
+
+        # local bounds of every tile, for the camera distance tests
+        self.tile_bounds = np.zeros((len(self.tiles), 6))
+        for i, (r0, r1, c0, c1) in enumerate(self.tiles):
+            heights = self.z_grid[r0:r1+1, c0:c1+1]
+            z_min, z_max = (np.nanmin(heights), np.nanmax(heights)) if not np.all(np.isnan(heights)) else (0.0, 0.0)
+            self.tile_bounds[i] = [self.origin[0] + c0*self.spacing[0], self.origin[0] + c1*self.spacing[0],
+                                   self.origin[1] + r0*self.spacing[1], self.origin[1] + r1*self.spacing[1],
+                                   self.origin[2] + z_min, self.origin[2] + z_max]
+
+        # level k samples every 2^k'th height - the coarsest level draws each tile as a single cell
+        self.num_levels = int(math.ceil(math.log(max(tile_size, 1), 2))) + 1
+        self.tile_levels = np.zeros(len(self.tiles), dtype=int)
+        self.tile_cache = collections.OrderedDict()     # (tile, level) -> polydata, least recently drawn first
+        self.cached_points = 0
+        self.drawn_points = 0
+        self.interactive_levels = 0
+
+        # all tiles share one property, so the actor properties dock treats the heightmap like a single actor
+        self.property = vtk.vtkProperty()
+        self.tile_actors = []
+        for i, (r0, r1, c0, c1) in enumerate(self.tiles):
+            mapper = vtk.vtkPolyDataMapper()
+            actor = vtk.vtkActor()
+            actor.SetMapper(mapper)
+            actor.SetProperty(self.property)
+            # tile points are relative to the tile corner, so they keep their precision in float32 far from the origin
+            actor.SetPosition(self.tile_bounds[i,0], self.tile_bounds[i,2], self.tile_bounds[i,4])
+            self.tile_actors.append(actor)
+            self.AddPart(actor)
+
+        self.tile_levels[:] = self.num_levels - 1
+        self._updateTiles(np.arange(len(self.tiles)))
+
+    def GetProperty(self):
+        return self.property
+
+    def SetTexture(self, texture):
+        for actor in self.tile_actors:
+            actor.SetTexture(texture)
+
+    def GetTileLevels(self):
+        return self.tile_levels
+
+    def SetInteractive(self, interactive):
+        # coarser tiles while the camera moves - applied on the next frame
+        self.interactive_levels = HEIGHTMAP_INTERACTIVE_LEVELS if interactive else 0
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - each tile is drawn with the coarsest level whose cells stay below
+        # HEIGHTMAP_PIXEL_CELL pixels at its distance from the camera
+        if len(self.tiles) == 0:
+            return
+        world_to_local = vtk.vtkMatrix4x4()
+        vtk.vtkMatrix4x4.Invert(self.GetMatrix(), world_to_local)
+        camera_position = list(renderer.GetActiveCamera().GetPosition()) + [1.0]
+        camera_position = np.array(world_to_local.MultiplyPoint(camera_position)[0:3])
+
+        # distance from the camera to the closest point of every tile - the heightmap scale cancels out for perspective cameras
+        closest = np.clip(camera_position, self.tile_bounds[:,0::2], self.tile_bounds[:,1::2])
+        distances = np.sqrt(np.sum((closest - camera_position)**2, axis=1))
+        scale = max(self.GetScale())
+        pixel_sizes = CameraUtils.getPixelSizeAtDistance(renderer, distances*scale)/scale
+
+        strides = HEIGHTMAP_PIXEL_CELL*pixel_sizes/np.min(self.spacing)
+        levels = np.floor(np.log2(np.maximum(strides, 1.0))).astype(int) + self.interactive_levels
+        levels = np.clip(levels, 0, self.num_levels-1)
+
+        changed = np.nonzero(levels != self.tile_levels)[0]
+        if len(changed) > 0:
+            self.tile_levels = levels
+            self._updateTiles(changed)
+
+    def _tileGeometry(self, tile_index, level):
+        # polydata of a tile at a level - cached, since the camera moves back and forth between levels
+        key = (tile_index, level)
+        polydata = self.tile_cache.pop(key, None)
+        if polydata is not None:
+            self.tile_cache[key] = polydata
+            return polydata
+
+        r0, r1, c0, c1 = self.tiles[tile_index]
+        stride = 2**level
+        rows = _sampleIndices(r0, r1, stride)
+        cols = _sampleIndices(c0, c1, stride)
+        num_rows, num_cols = len(rows), len(cols)
+
+        heights = self.z_grid[np.ix_(rows, cols)]
+        points = np.zeros((num_rows, num_cols, 3))
+        points[:,:,0] = self.origin[0] + self.spacing[0]*cols[None,:]
+        points[:,:,1] = self.origin[1] + self.spacing[1]*rows[:,None]
+        points[:,:,2] = self.origin[2] + heights
+        ids = np.arange(num_rows*num_cols).reshape(num_rows, num_cols)
+
+        # two triangles per cell
+        a, b, c, d = ids[:-1,:-1].ravel(), ids[:-1,1:].ravel(), ids[1:,1:].ravel(), ids[1:,:-1].ravel()
+        triangles = np.vstack((np.column_stack((a, b, c)), np.column_stack((a, c, d))))
+
+        # skirts hang down from tile borders that face another tile, hiding the cracks between tiles drawn at different levels
+        z_min, z_max = self.tile_bounds[tile_index,4], self.tile_bounds[tile_index,5]
+        skirt_depth = (z_max - z_min) + stride*np.max(self.spacing)
+        border_ids = []
+        if r0 > 0:
+            border_ids.append(ids[0,:])
+        if r1 < np.shape(self.z_grid)[0]-1:
+            border_ids.append(ids[-1,::-1])
+        if c0 > 0:
+            border_ids.append(ids[::-1,0])
+        if c1 < np.shape(self.z_grid)[1]-1:
+            border_ids.append(ids[:,-1])
+        points = points.reshape(-1, 3)
+        skirt_points = []
+        num_points = len(points)
+        for border in border_ids:
+            skirt_ids = num_points + np.arange(len(border))
+            skirt_points.append(points[border] - [0.0, 0.0, skirt_depth])
+            num_points += len(border)
+            a, b, c, d = border[:-1], border[1:], skirt_ids[1:], skirt_ids[:-1]
+            triangles = np.vstack((triangles, np.column_stack((a, b, c)), np.column_stack((a, c, d))))
+        all_ids = np.concatenate([ids.ravel()] + border_ids)
+        if len(skirt_points) > 0:
+            points = np.vstack([points] + skirt_points)
+
+        # cells touching missing heights are dropped, and the missing heights are flattened so they don't spoil the bounds
+        missing = np.isnan(points[:,2])
+        if np.any(missing):
+            triangles = triangles[~np.any(missing[triangles], axis=1)]
+            points[missing,2] = self.origin[2] + z_min
+
+        # float32 points relative to the tile corner, where its actor is placed
+        points -= self.tile_bounds[tile_index,0::2]
+        vtk_points = vtk.vtkPoints()
+        vtk_points.SetData(nps.numpy_to_vtk(points.astype(np.float32), deep=1))
+
+        cell_ids = np.empty((len(triangles), 4), dtype=nps.ID_TYPE_CODE)
+        cell_ids[:,0] = 3
+        cell_ids[:,1:] = triangles
+        cells = vtk.vtkCellArray()
+        cells.SetCells(len(triangles), nps.numpy_to_vtkIdTypeArray(cell_ids.ravel(), deep=1))
+
+        polydata = vtk.vtkPolyData()
+        polydata.SetPoints(vtk_points)
+        polydata.SetPolys(cells)
+        if self.color_array is not None:
+            colors = self.color_array[np.ix_(rows, cols)].reshape(num_rows*num_cols, -1)[all_ids]
+            colors = nps.numpy_to_vtk(np.ascontiguousarray(colors), deep=1)
+            colors.SetName("Colors")
+            polydata.GetPointData().SetScalars(colors)
+
+        self.tile_cache[key] = polydata
+        self.cached_points += polydata.GetNumberOfPoints()
+        return polydata
+
+    def _updateTiles(self, tile_indices):
+        # swap the polydata of the tiles whose level changed, then drop the least recently drawn levels beyond the cache limit
+        for tile_index in tile_indices:
+            mapper = self.tile_actors[tile_index].GetMapper()
+            previous = mapper.GetInput()
+            if previous is not None:
+                self.drawn_points -= previous.GetNumberOfPoints()
+            polydata = self._tileGeometry(tile_index, self.tile_levels[tile_index])
+            mapper.SetInput(polydata)
+            self.drawn_points += polydata.GetNumberOfPoints()
+
+        drawn = set(zip(xrange(len(self.tiles)), self.tile_levels))
+        for key in list(self.tile_cache.keys()):
+            if self.cached_points - self.drawn_points <= HEIGHTMAP_CACHE_FACTOR*self.drawn_points:
+                break
+            if key not in drawn:
+                self.cached_points -= self.tile_cache.pop(key).GetNumberOfPoints()
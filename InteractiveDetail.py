@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+interactive level of detail - a cheaper scene while the camera is being moved
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+''' interactive detail parameters '''
+INTERACTIVE_POINT_BUDGET = 1000000  # points drawn over all point clouds while the camera moves
+INTERACTIVE_IDLE_MS = 300           # full detail comes back once the camera has been still for this long
+
+def pointPolyData(actor):
+    # the polydata of an actor that draws only vertices (i.e. a point cloud), or None
+    if not actor.IsA('vtkActor') or hasattr(actor, 'SetInteractive'):
+        return None
+    mapper = actor.GetMapper()
+    if mapper is None:
+        return None
+    polydata = mapper.GetInput()
+    if polydata is None or not polydata.IsA('vtkPolyData'):
+        return None
+    if polydata.GetNumberOfVerts() == 0 or polydata.GetNumberOfLines() + polydata.GetNumberOfPolys() + polydata.GetNumberOfStrips() > 0:
+        return None
+    return polydata
+
+def decimatedPointPolyData(polydata, keep):
+    '''
+    Given a vertex-only polydata and the number of vertices to keep, return a new polydata with every n'th vertex and
+    its point and cell data - or None if the polydata has vertex cells of more than one point.
+    '''
+    num_verts = polydata.GetNumberOfVerts()
+    connectivity = nps.vtk_to_numpy(polydata.GetVerts().GetData())
+    if len(connectivity) != 2*num_verts:
+        return None
+    cell_ids = np.arange(0, num_verts, int(math.ceil(float(num_verts)/max(keep, 1))))
+    point_ids = connectivity[1::2][cell_ids]
+    num_points = len(point_ids)
+
+    points = vtk.vtkPoints()
+    points.SetData(nps.numpy_to_vtk(nps.vtk_to_numpy(polydata.GetPoints().GetData())[point_ids], deep=1))
+
+    verts_ids = np.empty((num_points, 2), dtype=nps.ID_TYPE_CODE)
+    verts_ids[:,0] = 1
+    verts_ids[:,1] = np.arange(num_points)
+    verts = vtk.vtkCellArray()
+    verts.SetCells(num_points, nps.numpy_to_vtkIdTypeArray(verts_ids.ravel(), deep=1))
+
+    decimated = vtk.vtkPolyData()
+    decimated.SetPoints(points)
+    decimated.SetVerts(verts)
+    for data, decimated_data, ids in [(polydata.GetPointData(), decimated.GetPointData(), point_ids), (polydata.GetCellData(), decimated.GetCellData(), cell_ids)]:
+        scalars = data.GetScalars()
+        if scalars is not None:
+            decimated_scalars = nps.numpy_to_vtk(nps.vtk_to_numpy(scalars)[ids], deep=1, array_type=scalars.GetDataType())
+            decimated_scalars.SetName(scalars.GetName())
+            decimated_data.SetScalars(decimated_scalars)
+    return decimated
+
+class InteractiveDetail(object):
+    ''' switches the scene to reduced detail while the camera moves, and back again '''
+    def __init__(self, point_budget=INTERACTIVE_POINT_BUDGET):
+        self.point_budget = point_budget
+        self.active = False
+        self.decimated = {}             # actor -> (polydata, polydata modified time, keep, decimated polydata)
+        self.swapped = []               # (actor, full detail polydata) of point clouds drawn decimated
+        self.hidden = []                # actors hidden while the camera moves
+        self.interactive_actors = []    # actors told to switch to their own interactive detail
+
+    def Enter(self, actors, hide_actors):
+        # actors are all scene actors, hide_actors the ones not drawn at all while the camera moves (i.e. billboards)
+        if self.active:
+            return
+        self.active = True
+        for actor in actors:
+            if hasattr(actor, 'SetInteractive'):
+                actor.SetInteractive(True)
+                self.interactive_actors.append(actor)
+
+        # point clouds share the interactive budget in proportion to their size
+        clouds = []
+        for actor in actors:
+            polydata = pointPolyData(actor)
+            if polydata is not None and actor.GetVisibility():
+                clouds.append((actor, polydata))
+        total = sum([polydata.GetNumberOfVerts() for (actor, polydata) in clouds])
+        if total > self.point_budget:
+            for actor, polydata in clouds:
+                keep = max(int(polydata.GetNumberOfVerts()*float(self.point_budget)/total), 1)
+                decimated = self._decimated(actor, polydata, keep)
+                if decimated is not None:
+                    actor.GetMapper().SetInput(decimated)
+                    self.swapped.append((actor, polydata))
+
+        for actor in hide_actors:
+            if actor.GetVisibility():
+                actor.VisibilityOff()
+                self.hidden.append(actor)
+
+    def Leave(self):
+        # back to full detail
+        if not self.active:
+            return
+        self.active = False
+        for actor in self.interactive_actors:
+            actor.SetInteractive(False)
+        for actor, polydata in self.swapped:
+            actor.GetMapper().SetInput(polydata)
+        for actor in self.hidden:
+            actor.VisibilityOn()
+        self.interactive_actors = []
+        self.swapped = []
+        self.hidden = []
+
+    def SetVisibility(self, actor, visible):
+        # visibility changes to actors hidden while the camera moves take effect when it stops - returns True if the
+        # change was deferred
+        if actor not in self.hidden:
+            return False
+        if not visible:
+            self.hidden.remove(actor)
+        return True
+
+    def Forget(self, actor):
+        # an actor left the scene
+        self.decimated.pop(actor, None)
+        self.swapped = [(swapped_actor, polydata) for (swapped_actor, polydata) in self.swapped if swapped_actor is not actor]
+        self.hidden = [hidden_actor for hidden_actor in self.hidden if hidden_actor is not actor]
+        self.interactive_actors = [interactive_actor for interactive_actor in self.interactive_actors if interactive_actor is not actor]
+
+    def _decimated(self, actor, polydata, keep):
+        # decimated clouds are kept between interactions, until the cloud changes or its share of the budget does
+        cached = self.decimated.get(actor)
+        if cached is not None and cached[0] is polydata and cached[1] == polydata.GetMTime() and cached[2] == keep:
+            return cached[3]
+        decimated = decimatedPointPolyData(polydata, keep)
+        if decimated is None:
+            warn_str = 'point cloud with multi-point vertex cells is drawn at full detail while the camera moves'
+            warnings.warn(warn_str, RuntimeWarning)
+        self.decimated[actor] = (polydata, polydata.GetMTime(), keep, decimated)
+        return decimated
@@ -21,7 +21,9 @@ from PyQt4 import QtCore, QtGui, uic
 
 ''' custom libs '''
 from GUIMain import MainApp
+import PointClouds
 import Primitives
+import Status
 
 @contextmanager
 def wait_signal(signal_origin, signal_name, return_status_list, timeout=10000):
@@ -77,6 +79,10 @@ class LightFieldAPI(object):
         actor = Primitives.Grid(fulllength, celllength)
         return self.addActor(levellist, actor, Primitives.PRIMITIVE_GRID)
 
+    def addAdaptiveGrid(self, levellist):
+        actor = Primitives.AdaptiveGrid()
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_ADAPTIVE_GRID)
+
     def addAxes(self, levellist):
         actor = Primitives.Axes()
         return self.addActor(levellist, actor, Primitives.PRIMITIVE_AXES)
@@ -117,18 +123,125 @@ class LightFieldAPI(object):
         actor = Primitives.TriangleStrip(vertices, colors)
         return self.addActor(levellist, actor, Primitives.PRIMITIVE_TRIANGLE_STRIP)
 
+    def addMesh(self, levellist, vertices, faces, vertexcolors=None, normals=None):
+        actor = Primitives.Mesh(vertices, faces, vertexcolors, normals)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_MESH)
+
+    def setMesh(self, levellist, vertices, faces, vertexcolors=None, normals=None):
+        actor = Primitives.Mesh(vertices, faces, vertexcolors, normals)
+        return self.setActor(levellist, actor, Primitives.PRIMITIVE_MESH)
+
+    def addHeightmap(self, levellist, zgrid, origin, spacing, colors=None):
+        actor = Primitives.Heightmap(zgrid, origin, spacing, colors)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_HEIGHTMAP)
+
+    def addGridMap(self, levellist, grid, origin, resolution, valuerange=(0.0, 1.0)):
+        actor = Primitives.GridMap(grid, origin, resolution, valuerange)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_GRID_MAP)
+
+    def updateGridMap(self, levellist, row0, col0, patch):
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'updateGridMapStatus', return_status_list):
+            self.main_window.update_grid_map_signal.emit(levellist, row0, col0, patch)
+        return_status = return_status_list[0]
+        return return_status
+
+    def addVoxelMap(self, levellist, voxelsize, origin=(0.0, 0.0, 0.0)):
+        actor = Primitives.VoxelMap(voxelsize, origin)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_VOXEL_MAP)
+
+    def insertVoxels(self, levellist, indices, colors=None):
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'insertVoxelsStatus', return_status_list):
+            self.main_window.insert_voxels_signal.emit(levellist, indices, colors)
+        return_status = return_status_list[0]
+        return return_status
+
+    def clearVoxels(self, levellist, indices=None):
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'clearVoxelsStatus', return_status_list):
+            self.main_window.clear_voxels_signal.emit(levellist, indices)
+        return_status = return_status_list[0]
+        return return_status
+
     def addLineStrip(self, levellist, vertices, colors=None):
         actor = Primitives.LineStrip(vertices, colors)
         return self.addActor(levellist, actor, Primitives.PRIMITIVE_LINE_STRIP)
 
-    def addPointCloud(self, levellist, points, colors=None):
-        actor = Primitives.PointCloud(points, colors)
+    def addTrajectory(self, levellist, maxlength=None):
+        actor = Primitives.Trajectory(maxlength)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_TRAJECTORY)
+
+    def appendTrajectory(self, levellist, points, colors=None):
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'appendTrajectoryStatus', return_status_list):
+            self.main_window.append_trajectory_signal.emit(levellist, points, colors)
+        return_status = return_status_list[0]
+        return return_status
+
+    def addPointCloud(self, levellist, points, colors=None, budget=None, decimation=None, scalars=None, colormap=None, scalarrange=None):
+        actor = Primitives.PointCloud(points, colors, budget, decimation, scalars, colormap, scalarrange)
         return self.addActor(levellist, actor, Primitives.PRIMITIVE_POINT_CLOUD)
 
-    def setPointCloud(self, levellist, points, colors=None):
-        actor = Primitives.PointCloud(points, colors)
+    def setPointCloud(self, levellist, points, colors=None, budget=None, decimation=None, scalars=None, colormap=None, scalarrange=None):
+        actor = Primitives.PointCloud(points, colors, budget, decimation, scalars, colormap, scalarrange)
         return self.setActor(levellist, actor, Primitives.PRIMITIVE_POINT_CLOUD)
 
+    def setPointCloudScalarRange(self, levellist, minimum, maximum):
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'setPointCloudScalarRangeStatus', return_status_list):
+            self.main_window.set_point_cloud_scalar_range_signal.emit(levellist, minimum, maximum)
+        return_status = return_status_list[0]
+        return return_status
+
+    def addPointCloudFile(self, levellist, filepath, budget=None, decimation=None):
+        actor = Primitives.PointCloudFile(filepath, budget, decimation)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_POINT_CLOUD)
+
+    def addOctreePointCloud(self, levellist, octreedir, budget=None):
+        actor = Primitives.OctreePointCloud(octreedir, budget)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_OCTREE_POINT_CLOUD)
+
+    def setPointCloudBudget(self, budget, decimation=PointClouds.DECIMATE_VOXEL_GRID):
+        # global point budget for point clouds added/set without a budget of their own - None removes the limit
+        PointClouds.setDefaultPointBudget(budget, decimation)
+        return Status.OK
+
+    def addLabels(self, levellist, positions, labels, priorities=None, textsize=None):
+        actor = Primitives.Labels(positions, labels, priorities, textsize)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_LABELS)
+
+    def setLabels(self, levellist, positions, labels, priorities=None, textsize=None):
+        actor = Primitives.Labels(positions, labels, priorities, textsize)
+        return self.setActor(levellist, actor, Primitives.PRIMITIVE_LABELS)
+
+    def addSprites(self, levellist, positions, imagepaths, width=None, height=None):
+        actor = Primitives.Sprites(positions, imagepaths, width, height)
+        return self.addActor(levellist, actor, Primitives.PRIMITIVE_SPRITES)
+
+    def setSprites(self, levellist, positions, imagepaths, width=None, height=None):
+        actor = Primitives.Sprites(positions, imagepaths, width, height)
+        return self.setActor(levellist, actor, Primitives.PRIMITIVE_SPRITES)
+
+    def followCamera(self, levellist, orientation=False):
+        # smoothly keep the camera on an actor or directory - with orientation, the camera also turns with its heading
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'setCameraFollowStatus', return_status_list):
+            self.main_window.set_camera_follow_signal.emit(levellist, orientation)
+        return_status = return_status_list[0]
+        return return_status
+
+    def stopFollowCamera(self):
+        return self.followCamera([])
+
+    def getActorsWithinRadius(self, center, radius):
+        # (status, level lists of the actors whose bounds come within radius of the world position center)
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'actorsWithinRadiusStatus', return_status_list):
+            self.main_window.actors_within_radius_signal.emit(center, radius)
+        return_status = return_status_list[0]
+        return return_status, self.main_window.actors_within_radius
+
     def addDirectory(self, levellist):
         return_status_list = ['request']
         with wait_signal(self.main_window, 'addDirectoryStatus', return_status_list):
@@ -200,6 +313,13 @@ class LightFieldAPI(object):
         return_status = return_status_list[0]
         return return_status
 
+    def setActorFrameAxesVisibility(self, levellist, visibility):
+        return_status_list = ['request']
+        with wait_signal(self.main_window, 'setActorFrameAxesVisibilityStatus', return_status_list):
+            self.main_window.set_actor_frame_axes_visibility_signal.emit(levellist, visibility)
+        return_status = return_status_list[0]
+        return return_status
+
     def setActorLineWidth(self, levellist, linewidth):
         return_status_list = ['request']
         with wait_signal(self.main_window, 'setActorLineWidthStatus', return_status_list):
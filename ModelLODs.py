@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+model level of detail - decimated versions of models, cached next to the model file and switched by projected size
+'''
+
+''' standard libs '''
+import os
+import math
+import collections
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+
+''' custom libs '''
+import CameraUtils
+
+''' model level of detail parameters '''
+MODEL_LOD_MIN_TRIANGLES = 300       # levels stop once a level has at most this many triangles
+MODEL_LOD_REDUCTION = 0.75          # each level keeps a quarter of the triangles of the previous one
+MODEL_LOD_FULL_PIXELS = 400.0       # models larger than this on screen are drawn at full resolution - each level halves it
+MODEL_LOD_CACHE_EXTENSION = '.vtp'
+MODEL_LOD_INTERACTIVE_LEVELS = 2    # levels coarser than the view needs while the camera moves
+MODEL_LOD_SHARED_MODELS = 16        # models whose levels are kept in memory - every actor of a model shares its levels
+_shared_levels = collections.OrderedDict()
+
+def _cachePath(model_path, level):
+    return model_path + '.lod' + str(level) + MODEL_LOD_CACHE_EXTENSION
+
+def _readCachedLevel(model_path, level):
+    # a cached level is only used if it is newer than the model
+    cache_path = _cachePath(model_path, level)
+    if not os.path.isfile(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(model_path):
+        return None
+    reader = vtk.vtkXMLPolyDataReader()
+    reader.SetFileName(cache_path)
+    reader.Update()
+    polydata = vtk.vtkPolyData()
+    polydata.DeepCopy(reader.GetOutput())
+    return polydata
+
+def _writeCachedLevel(model_path, level, polydata):
+    cache_path = _cachePath(model_path, level)
+    writer = vtk.vtkXMLPolyDataWriter()
+    writer.SetFileName(cache_path)
+    writer.SetInput(polydata)
+    writer.SetDataModeToBinary()
+    if not writer.Write():
+        warn_str = 'could not cache model level of detail at ' + cache_path
+        warnings.warn(warn_str, RuntimeWarning)
+
+def _decimate(polydata, target_reduction):
+    triangles = vtk.vtkTriangleFilter()
+    triangles.SetInput(polydata)
+
+    decimation = vtk.vtkQuadricDecimation()
+    decimation.SetInputConnection(triangles.GetOutputPort())
+    decimation.SetTargetReduction(target_reduction)
+    if hasattr(decimation, 'AttributeErrorMetricOn'):
+        # keep texture coordinates and normals, where this vtk version can
+        decimation.AttributeErrorMetricOn()
+    decimation.Update()
+
+    decimated = vtk.vtkPolyData()
+    decimated.DeepCopy(decimation.GetOutput())
+    return decimated
+
+def buildLevels(model_path, polydata):
+    '''
+    Given a model file path and its polydata, return a list of polydata levels - level 0 is the model itself, each
+    following level has a quarter of the triangles of the one before. Levels are read from the cache next to the model
+    when it is up to date, and decimated (and cached) otherwise.
+    '''
+    levels = [polydata]
+    level = 1
+    num_triangles = polydata.GetNumberOfPolys()
+    while num_triangles > MODEL_LOD_MIN_TRIANGLES:
+        decimated = _readCachedLevel(model_path, level)
+        if decimated is None:
+            decimated = _decimate(polydata, 1.0 - (1.0 - MODEL_LOD_REDUCTION)**level)
+            _writeCachedLevel(model_path, level, decimated)
+        if decimated.GetNumberOfPolys() >= num_triangles:
+            # the decimation could not simplify any further
+            break
+        levels.append(decimated)
+        num_triangles = decimated.GetNumberOfPolys()
+        level += 1
+    return levels
+
+def sharedLevels(model_path, read_model):
+    '''
+    Given a model file path and a function reading it as polydata, return its levels (see buildLevels) - the levels of
+    the last MODEL_LOD_SHARED_MODELS models are kept, so a fleet of identical vehicles reads and stores them once. The
+    shared levels must be treated as immutable by the mappers that draw them.
+    '''
+    key = (os.path.abspath(model_path), os.path.getmtime(model_path))
+    levels = _shared_levels.pop(key, None)
+    if levels is None:
+        levels = buildLevels(model_path, read_model())
+    _shared_levels[key] = levels
+    while len(_shared_levels) > MODEL_LOD_SHARED_MODELS:
+        # evicted levels live on for as long as actors still draw them
+        _shared_levels.popitem(last=False)
+    return levels
+
+def ClearSharedLevels():
+    _shared_levels.clear()
+
+class ModelLOD(vtk.vtkActor):
+    ''' a model drawn at the level of detail matching its size on screen '''
+    def __init__(self, model_path, read_model):
+        # read_model returns the model polydata, and is only called when the model's levels are not already shared
+        self.levels = sharedLevels(model_path, read_model)
+        self.level = 0
+        self.view_level = 0
+        self.interactive_levels = 0
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInput(self.levels[0])
+
+        self.SetMapper(mapper)
+
+    def GetNumberOfLevels(self):
+        return len(self.levels)
+
+    def SetLevel(self, level):
+        level = min(max(level, 0), len(self.levels)-1)
+        if level != self.level:
+            self.level = level
+            self.GetMapper().SetInput(self.levels[level])
+
+    def SetInteractive(self, interactive):
+        # coarser levels while the camera moves
+        self.interactive_levels = MODEL_LOD_INTERACTIVE_LEVELS if interactive else 0
+        self.SetLevel(self.view_level + self.interactive_levels)
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - level k is drawn while the model spans less than MODEL_LOD_FULL_PIXELS/2^k pixels
+        if len(self.levels) == 1:
+            return
+        bounds = self.GetBounds()
+        if bounds[0] > bounds[1]:
+            return
+        bounds = np.reshape(bounds, (3, 2))
+        diameter = np.linalg.norm(bounds[:,1] - bounds[:,0])
+        center = np.mean(bounds, axis=1)
+        distance = max(np.linalg.norm(np.array(renderer.GetActiveCamera().GetPosition()) - center) - diameter/2.0, 0.0)
+        pixels = diameter/max(CameraUtils.getPixelSizeAtDistance(renderer, distance), 1e-12)
+        if pixels >= MODEL_LOD_FULL_PIXELS:
+            self.view_level = 0
+        else:
+            self.view_level = int(math.floor(math.log(MODEL_LOD_FULL_PIXELS/max(pixels, 1e-12), 2)))
+        self.SetLevel(self.view_level + self.interactive_levels)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+out-of-core octree point clouds - streamed from disk by view
+
+An octree directory (written by BuildPointCloudOctree.py) holds:
+  index.json        - the octree cube, coordinate offset and the number of points in every node
+  <node>.xyz        - the node's points, float32 (N x 3), relative to the offset
+  <node>.rgb        - the node's colors, uint8 (N x 3), if the octree has colors
+Nodes are named by their path from the root - 'r' is the root, 'r5' its 5th child (octant bits x=1, y=2, z=4), and so
+on. Every node holds a uniform sample of the points in its cube that were not taken by its ancestors, so drawing any
+subtree from the root gives a coarse-to-fine view of the data.
+'''
+
+''' standard libs '''
+import os
+import math
+import json
+import heapq
+import Queue
+import threading
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+''' octree format '''
+OCTREE_INDEX_FILE = 'index.json'
+OCTREE_POINTS_EXTENSION = '.xyz'
+OCTREE_COLORS_EXTENSION = '.rgb'
+OCTREE_ROOT = 'r'
+
+''' octree streaming parameters '''
+OCTREE_POINT_BUDGET = 2000000   # default maximum number of points drawn
+OCTREE_CACHE_FACTOR = 2.0       # nodes that left the view stay resident until this many times the point budget is loaded
+OCTREE_INTERACTIVE_FACTOR = 0.25    # fraction of the point budget drawn while the camera moves
+
+def nodeCube(name, lower, size):
+    # lower corner and size of the cube of a node, given the lower corner and size of the root cube
+    lower = np.array(lower, dtype=float)
+    for octant in name[1:]:
+        size /= 2.0
+        octant = int(octant)
+        lower += size*np.array([octant & 1, (octant >> 1) & 1, (octant >> 2) & 1])
+    return lower, size
+
+def loadNode(octree_dir, name, has_colors):
+    # read a node from its memory-mapped files - the copy pulls the data off disk, so the caller never touches the mapping
+    points = np.array(np.memmap(os.path.join(octree_dir, name + OCTREE_POINTS_EXTENSION), dtype=np.float32, mode='r')).reshape(-1, 3)
+    colors = None
+    if has_colors:
+        colors = np.array(np.memmap(os.path.join(octree_dir, name + OCTREE_COLORS_EXTENSION), dtype=np.uint8, mode='r')).reshape(-1, 3)
+    return points, colors
+
+def _loaderThread(octree_dir, has_colors, requests, results, wanted):
+    # load requested nodes in the background - requests for nodes that left the view before their turn are dropped
+    while True:
+        name = requests.get()
+        if name is None:
+            return
+        if name not in wanted[0]:
+            results.put((name, None))
+            continue
+        try:
+            results.put((name, loadNode(octree_dir, name, has_colors)))
+        except (IOError, ValueError) as e:
+            warn_str = 'failed to load octree node ' + name + ' from ' + octree_dir + ': ' + str(e)
+            warnings.warn(warn_str, RuntimeWarning)
+            results.put((name, None))
+
+class OctreePointCloud(vtk.vtkAssembly):
+    '''
+    a point cloud too large for memory, drawn from the octree nodes that best fill a point budget in the current view -
+    drawn nodes are copied into slots of float32 buffers that the vtk arrays reference, so a node arriving or leaving
+    only writes its own slot, and the single part actor is placed at the octree offset so points stay float32
+    '''
+    def __init__(self, octree_dir, point_budget=OCTREE_POINT_BUDGET):
+        self.octree_dir = octree_dir
+        self.point_budget = point_budget
+        self.interactive = False
+        with open(os.path.join(octree_dir, OCTREE_INDEX_FILE), 'r') as f:
+            index = json.load(f)
+        self.offset = np.array(index['offset'], dtype=float)
+        self.lower = np.array(index['lower'], dtype=float)
+        self.size = float(index['size'])
+        self.has_colors = bool(index['has_colors'])
+        self.node_counts = dict([(str(name), count) for (name, count) in index['nodes'].iteritems()])
+        self.node_children = {}
+        for name in self.node_counts:
+            self.node_children[name] = [name + str(octant) for octant in xrange(8) if name + str(octant) in self.node_counts]
+
+        # nodes in memory, and the last frame each of them was wanted
+        self.resident = {}
+        self.resident_points = 0
+        self.last_used = {}
+        self.frame = 0
+        self.pending = set()
+        self.drawn = None
+
+        # point_buffer[0:used] is drawn - slots[name] = (start, count) of a drawn node, and holes are freed slots, which
+        # repeat the first point of the drawn node hole_node until a node is written over them
+        self.point_buffer = np.zeros((0, 3), dtype=np.float32)
+        self.color_buffer = np.zeros((0, 3), dtype=np.uint8) if self.has_colors else None
+        # id_buffer[i] = (1, i) - one vertex cell per point
+        self.id_buffer = np.zeros((0, 2), dtype=nps.ID_TYPE_CODE)
+        self.used = 0
+        self.slots = {}
+        self.holes = []
+        self.hole_node = None
+        self.drawn_points = 0
+
+        # wanted is a single-element list, so the loader thread sees the latest set without locking
+        self.wanted = [set()]
+        self.requests = Queue.Queue()
+        self.results = Queue.Queue()
+        self.loader = threading.Thread(target=_loaderThread, args=(octree_dir, self.has_colors, self.requests, self.results, self.wanted))
+        self.loader.daemon = True
+        self.loader.start()
+
+        self.points = vtk.vtkPoints()
+        self.verts = vtk.vtkCellArray()
+        self.polydata = vtk.vtkPolyData()
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInput(self.polydata)
+
+        self.property = vtk.vtkProperty()
+        self.cloud_actor = vtk.vtkActor()
+        self.cloud_actor.SetMapper(mapper)
+        self.cloud_actor.SetProperty(self.property)
+        self.cloud_actor.SetPosition(self.offset)
+        self.AddPart(self.cloud_actor)
+
+    def GetProperty(self):
+        return self.property
+
+    def SetTexture(self, texture):
+        self.cloud_actor.SetTexture(texture)
+
+    def GetNumberOfDrawnPoints(self):
+        return self.drawn_points
+
+    def SetPointBudget(self, point_budget):
+        self.point_budget = point_budget
+
+    def SetInteractive(self, interactive):
+        # draw the coarsest part of the budget while the camera moves - applied on the next frame
+        self.interactive = interactive
+
+    def StopLoading(self):
+        self.requests.put(None)
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - returns True while nodes are still streaming in, so the canvas renders again
+        self.frame += 1
+        visible = self._visibleNodes(renderer)
+        self.wanted[0] = set(visible)
+        for name in visible:
+            self.last_used[name] = self.frame
+            if name not in self.resident and name not in self.pending:
+                self.pending.add(name)
+                self.requests.put(name)
+
+        while True:
+            try:
+                name, data = self.results.get_nowait()
+            except Queue.Empty:
+                break
+            self.pending.discard(name)
+            if data is not None and name not in self.resident:
+                self.resident[name] = data
+                self.resident_points += len(data[0])
+        self._evict()
+
+        drawn = tuple([name for name in visible if name in self.resident])
+        if drawn != self.drawn:
+            self.drawn = drawn
+            self._updatePolyData()
+        return len(self.pending) > 0
+
+    def _visibleNodes(self, renderer):
+        # best-first traversal of the nodes inside the view frustum, largest on screen first, until the point budget is spent
+        camera = renderer.GetActiveCamera()
+        planes = [0.0]*24
+        camera.GetFrustumPlanes(renderer.GetTiledAspectRatio(), planes)
+        matrix = self.GetMatrix()
+        local_to_world = np.array([[matrix.GetElement(i, j) for j in xrange(4)] for i in xrange(4)])
+        # frustum planes (normals pointing inwards) and camera position in the octree frame
+        planes = np.dot(np.reshape(planes, (6, 4)), local_to_world)
+        world_to_local = np.linalg.inv(local_to_world)
+        camera_position = np.dot(world_to_local, list(camera.GetPosition()) + [1.0])[0:3] - self.offset
+
+        point_budget = self.point_budget*OCTREE_INTERACTIVE_FACTOR if self.interactive else self.point_budget
+        visible = []
+        total = 0
+        heap = []
+        if OCTREE_ROOT in self.node_counts:
+            heapq.heappush(heap, (0.0, OCTREE_ROOT))
+        while len(heap) > 0:
+            priority, name = heapq.heappop(heap)
+            count = self.node_counts[name]
+            if total + count > point_budget:
+                continue
+            visible.append(name)
+            total += count
+            for child in self.node_children[name]:
+                lower, size = nodeCube(child, self.lower, self.size)
+                if not self._inFrustum(planes, lower + self.offset, size):
+                    continue
+                closest = np.clip(camera_position, lower, lower + size)
+                distance = max(np.sqrt(np.sum((closest - camera_position)**2)), 1e-9)
+                heapq.heappush(heap, (-size/distance, child))
+        return visible
+
+    def _inFrustum(self, planes, lower, size):
+        # a cube is outside if its corner furthest along some plane normal is still behind that plane
+        corners = lower + size*(planes[:,0:3] > 0)
+        return np.all(np.sum(planes[:,0:3]*corners, axis=1) + planes[:,3] >= 0)
+
+    def _evict(self):
+        # drop the least recently wanted nodes once the cache exceeds its budget - nodes in view are never dropped
+        limit = OCTREE_CACHE_FACTOR*self.point_budget
+        if self.resident_points <= limit:
+            return
+        for name in sorted(self.resident.keys(), key=lambda name: self.last_used.get(name, 0)):
+            if self.resident_points <= limit or self.last_used.get(name, 0) == self.frame:
+                break
+            self.resident_points -= len(self.resident[name][0])
+            del self.resident[name]
+
+    def _updatePolyData(self):
+        # free the slots of the nodes that left, and write the nodes that arrived into holes or after the drawn points
+        drawn = set(self.drawn)
+        for name in [name for name in self.slots if name not in drawn]:
+            self._freeSlot(name)
+        added = [name for name in self.drawn if name not in self.slots]
+        self._reserve(sum([len(self.resident[name][0]) for name in added]))
+        for name in added:
+            self._fillSlot(name)
+
+        if self.used == 0:
+            self.polydata.Initialize()
+        else:
+            # the vtk arrays reference the buffers directly (deep=0) - only the drawn range is handed over
+            self.points.SetData(nps.numpy_to_vtk(self.point_buffer[:self.used], deep=0))
+            self.verts.SetCells(self.used, nps.numpy_to_vtkIdTypeArray(self.id_buffer[:self.used].ravel(), deep=0))
+            self.polydata.SetPoints(self.points)
+            self.polydata.SetVerts(self.verts)
+            if self.has_colors:
+                colors = nps.numpy_to_vtk(self.color_buffer[:self.used], deep=0)
+                colors.SetName("Colors")
+                self.polydata.GetPointData().SetScalars(colors)
+        self.polydata.Modified()
+        # the assembly bounds follow its part, but only the assembly is observed by the canvas
+        self.Modified()
+
+    def _freeSlot(self, name):
+        start, count = self.slots.pop(name)
+        self.drawn_points -= count
+        if len(self.slots) == 0:
+            self.used = 0
+            self.holes = []
+            self.hole_node = None
+            return
+        if name == self.hole_node or self.hole_node is None:
+            # the holes follow another drawn node - the shallowest, which is the last to leave the view
+            self.hole_node = min(self.slots.keys(), key=len)
+            for hole in self.holes:
+                self._repeatHoleNode(hole)
+        if start + count == self.used:
+            self.used = start
+            return
+        self.holes.append((start, count))
+        self._repeatHoleNode((start, count))
+
+    def _repeatHoleNode(self, hole):
+        # a hole repeats a drawn point, so it draws nothing new and leaves the bounds alone
+        start, count = hole
+        first = self.slots[self.hole_node][0]
+        self.point_buffer[start:start+count] = self.point_buffer[first]
+        if self.has_colors:
+            self.color_buffer[start:start+count] = self.color_buffer[first]
+
+    def _fillSlot(self, name):
+        points, colors = self.resident[name]
+        count = len(points)
+        start = None
+        for i, (hole_start, hole_count) in enumerate(self.holes):
+            if hole_count >= count:
+                start = hole_start
+                if hole_count > count:
+                    self.holes[i] = (hole_start + count, hole_count - count)
+                else:
+                    del self.holes[i]
+                break
+        if start is None:
+            start = self.used
+            self.used += count
+        self.point_buffer[start:start+count] = points
+        if self.has_colors:
+            self.color_buffer[start:start+count] = colors
+        self.slots[name] = (start, count)
+        self.drawn_points += count
+
+    def _reserve(self, num_new):
+        # make room for num_new points after the drawn ones - compact the slots to the front of the buffers, and double their
+        # capacity whenever the drawn points would fill more than half of them, so each point is moved O(1) times on average
+        capacity = len(self.point_buffer)
+        if self.used + num_new <= capacity:
+            return
+        new_capacity = max(capacity, 1024)
+        while self.drawn_points + num_new > new_capacity//2:
+            new_capacity *= 2
+
+        point_buffer = np.empty((new_capacity, 3), dtype=np.float32)
+        color_buffer = np.empty((new_capacity, 3), dtype=np.uint8) if self.has_colors else None
+        used = 0
+        for name, (start, count) in self.slots.items():
+            point_buffer[used:used+count] = self.point_buffer[start:start+count]
+            if self.has_colors:
+                color_buffer[used:used+count] = self.color_buffer[start:start+count]
+            self.slots[name] = (used, count)
+            used += count
+        self.point_buffer = point_buffer
+        self.color_buffer = color_buffer
+        if new_capacity != capacity:
+            self.id_buffer = np.empty((new_capacity, 2), dtype=nps.ID_TYPE_CODE)
+            self.id_buffer[:,0] = 1
+            self.id_buffer[:,1] = np.arange(new_capacity)
+        self.used = used
+        self.holes = []
+        self.hole_node = None
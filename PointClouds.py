@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+point cloud preprocessing - downsampling and decimation before upload
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' decimation methods '''
+DECIMATE_VOXEL_GRID = 'voxelgrid'   # one point (the centroid) per occupied voxel
+DECIMATE_RANDOM = 'random'          # uniformly random subset
+DECIMATE_STRIDE = 'stride'          # every n'th point
+
+''' global point budget - applies to point clouds added without a budget of their own, None for no limit '''
+default_point_budget = None
+default_decimation = DECIMATE_VOXEL_GRID
+
+def setDefaultPointBudget(budget, decimation=DECIMATE_VOXEL_GRID):
+    global default_point_budget, default_decimation
+    default_point_budget = budget
+    default_decimation = decimation
+
+def _voxelIds(numpy_array, voxel_size):
+    # a dense id (0..num_voxels-1) per point, identifying the occupied voxel it falls in - voxels are grouped by sorting
+    # their integer coordinates, so no flattened index can overflow however fine the voxels are
+    voxels = np.floor((numpy_array - np.min(numpy_array, axis=0))/voxel_size).astype(np.int64)
+    order = np.lexsort((voxels[:,2], voxels[:,1], voxels[:,0]))
+    sorted_voxels = voxels[order]
+    new_voxel = np.any(sorted_voxels[1:] != sorted_voxels[:-1], axis=1)
+    ids = np.empty(len(numpy_array), dtype=np.int64)
+    ids[order] = np.concatenate(([0], np.cumsum(new_voxel)))
+    return ids, (int(np.count_nonzero(new_voxel)) + 1 if len(numpy_array) > 0 else 0)
+
+def voxelGridDownsample(numpy_array, color_array, voxel_size):
+    '''
+    Given (N x 3) points, optional (N x C) colors and a voxel size, return the centroid (and mean color) of the
+    points in each occupied voxel.
+    '''
+    ids, num_voxels = _voxelIds(numpy_array, voxel_size)
+    counts = np.bincount(ids, minlength=num_voxels)
+    centroids = np.empty((num_voxels, 3))
+    for axis in xrange(3):
+        centroids[:,axis] = np.bincount(ids, weights=numpy_array[:,axis], minlength=num_voxels)/counts
+    if color_array is None:
+        return centroids, None
+    colors = np.empty((num_voxels, np.shape(color_array)[1]))
+    for channel in xrange(np.shape(color_array)[1]):
+        colors[:,channel] = np.bincount(ids, weights=color_array[:,channel], minlength=num_voxels)/counts
+    if np.issubdtype(color_array.dtype, np.integer):
+        colors = np.round(colors)
+    return centroids, colors.astype(color_array.dtype)
+
+def voxelGridDownsampleToBudget(numpy_array, color_array, budget):
+    # start from the voxel size that would split the extent into budget voxels, then grow it until at most budget
+    # voxels are occupied - each step assumes a volumetric cloud (count ~ size^-3), which undershoots for surfaces and
+    # lines, so the search approaches the budget from above in a few steps
+    extent = np.max(numpy_array, axis=0) - np.min(numpy_array, axis=0)
+    extent = extent[extent > 1e-6*max(np.max(extent), 1e-9)]
+    if len(extent) == 0:
+        return np.mean(numpy_array, axis=0)[None,:], None if color_array is None else color_array[0:1]
+    voxel_size = (np.prod(extent)/budget)**(1.0/len(extent))
+    for i in xrange(64):
+        ids, num_voxels = _voxelIds(numpy_array, voxel_size)
+        if num_voxels <= budget:
+            break
+        voxel_size *= max((float(num_voxels)/budget)**(1.0/3.0), 1.05)
+    return voxelGridDownsample(numpy_array, color_array, voxel_size)
+
+def randomDecimate(numpy_array, color_array, budget):
+    # the kept points stay in their original order
+    ids = np.sort(np.random.choice(len(numpy_array), budget, replace=False))
+    return numpy_array[ids], None if color_array is None else color_array[ids]
+
+def strideDecimate(numpy_array, color_array, budget):
+    stride = int(math.ceil(float(len(numpy_array))/budget))
+    return numpy_array[::stride], None if color_array is None else color_array[::stride]
+
+def decimate(numpy_array, color_array, budget, decimation=DECIMATE_VOXEL_GRID):
+    '''
+    Given (N x 3) points, optional (N x C) colors, a point budget and a decimation method, return at most budget
+    points (and colors). Point clouds within budget are returned unchanged.
+    '''
+    if budget is None or len(numpy_array) <= budget:
+        return numpy_array, color_array
+    budget = max(int(budget), 1)
+    if decimation == DECIMATE_VOXEL_GRID:
+        return voxelGridDownsampleToBudget(numpy_array, color_array, budget)
+    elif decimation == DECIMATE_RANDOM:
+        return randomDecimate(numpy_array, color_array, budget)
+    elif decimation == DECIMATE_STRIDE:
+        return strideDecimate(numpy_array, color_array, budget)
+    warn_str = 'unknown point cloud decimation method: ' + str(decimation) + ', falling back to stride decimation'
+    warnings.warn(warn_str, RuntimeWarning)
+    return strideDecimate(numpy_array, color_array, budget)
@@ -11,6 +11,7 @@ primitive actor constructors
 
 ''' standard libs '''
 import math
+import collections
 import warnings
 import numpy as np
 
@@ -20,9 +21,21 @@ from vtk.util import numpy_support as nps
 
 ''' custom libs '''
 import Billboards
+import Colormaps
+import FileLoaders
+import GridMaps
+import Grids
+import Heightmaps
+import ModelLODs
+import OctreePointClouds
+import PointClouds
+import Trajectories
+import VoxelMaps
+import VTKUtils
 
 ''' primitives add-able via gui '''
 PRIMITIVE_GRID = 'grid'
+PRIMITIVE_ADAPTIVE_GRID = 'adaptivegrid'         # ground grid whose spacing and extent follow the camera
 PRIMITIVE_AXES = 'axes'
 PRIMITIVE_ARROW = 'arrow'
 PRIMITIVE_BOX = 'box'
@@ -41,63 +54,145 @@ PRIMITIVE_TRIANGLE_LIST = 'trianglelist'
 PRIMITIVE_QUAD = 'quad'
 PRIMITIVE_TEXTURED_QUAD = 'texturedquad'
 PRIMITIVE_POINT_CLOUD = 'pointcloud'
+PRIMITIVE_OCTREE_POINT_CLOUD = 'octreepointcloud'  # out-of-core point cloud streamed from an on-disk octree
+PRIMITIVE_MESH = 'mesh'                         # indexed triangle mesh from shared vertex and face arrays
+PRIMITIVE_TRAJECTORY = 'trajectory'             # appendable line strip (e.g. vehicle track trails)
+PRIMITIVE_HEIGHTMAP = 'heightmap'               # tiled terrain surface from a regular grid of heights
+PRIMITIVE_GRID_MAP = 'gridmap'                  # tiled 2D occupancy/bathymetry map, updated in place
+PRIMITIVE_VOXEL_MAP = 'voxelmap'                # sparse 3D occupancy map, updated in place
 PRIMITIVE_MODEL = 'model'                       # only .obj files supported right now
 PRIMITIVE_TEXT_BILLBOARD = 'textbillboard'      # special custom primitive for text icons - handled specially by our interactors and render loop
 PRIMITIVE_IMAGE_BILLBOARD = 'imagebillboard'    # special custom primitive for image icons - handled specially by our interactors and render loop
+PRIMITIVE_LABELS = 'labels'                     # many text labels in a single actor, placed by priority without overlap
+PRIMITIVE_SPRITES = 'sprites'                   # many image icons in a single actor, drawn from the shared image atlas
+
+''' cache of procedural source outputs, keyed by primitive type and parameters - least recently used first '''
+SOURCE_CACHE_SIZE = 64          # outputs kept - primitives re-created with ever-changing parameters only churn the oldest
+_source_cache = collections.OrderedDict()
+
+def _cachedSourceOutput(key, make_source):
+    # identical parametric primitives share one tessellated polydata - the cached output is detached from its source
+    # so that it is never re-executed, and must be treated as immutable by the mappers that share it
+    polydata = _source_cache.pop(key, None)
+    if polydata is None:
+        source = make_source()
+        source.Update()
+        polydata = vtk.vtkPolyData()
+        polydata.DeepCopy(source.GetOutput())
+    _source_cache[key] = polydata
+    while len(_source_cache) > SOURCE_CACHE_SIZE:
+        # evicted outputs live on for as long as actors still draw them
+        _source_cache.popitem(last=False)
+    return polydata
+
+def _cachedSourceActor(key, make_source):
+    # make_source builds the vtk source, and is only called when key is not cached
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInput(_cachedSourceOutput(key, make_source))
 
-def _convertLineStripToLineList(numpy_array):
-    if np.shape(numpy_array)[0] == 3:
-        numpy_array = np.transpose(numpy_array)
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+
+    return actor
+
+def ClearSourceCache():
+    # release cached geometry - actors that already share an output keep their reference to it
+    _source_cache.clear()
+
+def _numpyToVTKArray(numpy_array, copy=True, numpy_arrays=None):
+    # with copy=False the vtk array uses the numpy memory directly - numpy_support does not keep the numpy array alive, so
+    # it is appended to numpy_arrays, which the caller stores on the actor drawing it
+    numpy_array = np.ascontiguousarray(numpy_array)
+    if copy:
+        return nps.numpy_to_vtk(numpy_array, deep=1)
+    numpy_arrays.append(numpy_array)
+    return nps.numpy_to_vtk(numpy_array, deep=0)
+
+''' vectorized strip/loop to list conversions - lists are gathered from strips in a single fancy-indexing pass '''
+
+def _lineStripSegmentIds(len_array):
+    # (N-1 x 2) point ids of the segments of a line strip: [[0,1],[1,2],...]
+    return np.arange(len_array-1)[:,None] + np.arange(2)
+
+def _lineLoopSegmentIds(len_array):
+    # (N x 2) point ids of the segments of a line loop: [[0,1],[1,2],...,[N-1,0]]
+    return _lineStripSegmentIds(len_array+1) % len_array
+
+def _triangleStripTriangleIds(len_array):
+    # (N-2 x 3) point ids of the triangles of a triangle strip: [[0,1,2],[1,2,3],...]
+    return np.arange(len_array-2)[:,None] + np.arange(3)
+
+def _expandColorsToCells(color_array, num_points, cell_ids):
+    # colors are applied per cell - per-point colors are expanded so that each cell takes the color of its last point
+    if np.shape(color_array)[0] == num_points and num_points != np.shape(cell_ids)[0]:
+        return color_array[cell_ids[:,-1]]
+    return color_array
+
+def _lineListPolyData(numpy_array, color_array):
+    # numpy_array and color_array are row-major (one point/color per row)
     len_array = np.shape(numpy_array)[0]
 
-    new_numpy_array = np.zeros((len_array+(len_array-2), 3))
-    new_numpy_array[0,:] = numpy_array[0,:]
-    idx = 1
-    for i in xrange(1,len_array-1):
-        new_numpy_array[idx,:] = numpy_array[i,:]
-        new_numpy_array[idx+1,:] = numpy_array[i,:]
-        idx += 2
-    new_numpy_array[-1,:] = numpy_array[-1,:]
+    points = vtk.vtkPoints()
+    points.SetNumberOfPoints(len_array)
+    points.SetData(nps.numpy_to_vtk(np.ascontiguousarray(numpy_array), deep=1))
 
-    return new_numpy_array
+    num_lines = len_array//2
+    line_ids = np.arange(2*num_lines).reshape(num_lines, 2)
 
-def _convertLineLoopToLineList(numpy_array):
-    if np.shape(numpy_array)[0] == 3:
-        numpy_array = np.transpose(numpy_array)
+    polygon = vtk.vtkPolyData()
+    polygon.SetPoints(points)
+    polygon.SetLines(VTKUtils.numpyToCellArray(line_ids))
+
+    # color
+    if color_array is not None:
+        color_array = _expandColorsToCells(color_array, len_array, line_ids)
+        colors = nps.numpy_to_vtk(np.ascontiguousarray(color_array), deep=1)
+        colors.SetName("Colors")
+        polygon.GetCellData().SetScalars(colors)
+
+    return polygon
+
+def _triangleListPolyData(numpy_array, color_array):
+    # numpy_array and color_array are row-major (one point/color per row)
     len_array = np.shape(numpy_array)[0]
 
-    new_numpy_array = np.zeros((2*len_array, 3))
-    new_numpy_array[0,:] = numpy_array[0,:]
-    idx = 1
-    for i in xrange(1,len_array):
-        new_numpy_array[idx,:] = numpy_array[i,:]
-        new_numpy_array[idx+1,:] = numpy_array[i,:]
-        idx += 2
-    new_numpy_array[-1,:] = numpy_array[0,:]
+    points = vtk.vtkPoints()
+    points.SetNumberOfPoints(len_array)
+    points.SetData(nps.numpy_to_vtk(np.ascontiguousarray(numpy_array), deep=1))
+
+    num_triangles = len_array//3
+    triangle_ids = np.arange(3*num_triangles).reshape(num_triangles, 3)
 
-    return new_numpy_array
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points)
+    polydata.SetPolys(VTKUtils.numpyToCellArray(triangle_ids))
 
-def LineStrip(numpy_array, color_array=None):
+    # color
     if color_array is not None:
-        numpy_array = _convertLineStripToLineList(numpy_array)
-        return LineList(numpy_array, color_array)
+        color_array = _expandColorsToCells(color_array, len_array, triangle_ids)
+        colors = nps.numpy_to_vtk(np.ascontiguousarray(color_array), deep=1)
+        colors.SetName("Colors")
+        polydata.GetCellData().SetScalars(colors)
+
+    return polydata
 
+def LineStrip(numpy_array, color_array=None):
     if np.shape(numpy_array)[0] == 3:
         numpy_array = np.transpose(numpy_array)
     len_array = np.shape(numpy_array)[0]
 
-    points = vtk.vtkPoints()
-    points.SetNumberOfPoints(len_array)
-    points.SetData(nps.numpy_to_vtk(numpy_array, deep=1))
-
-    lines = vtk.vtkCellArray()
-    lines.InsertNextCell(len_array)
-    for i in xrange(len_array):
-        lines.InsertCellPoint(i)
+    if color_array is None:
+        # uncolored strips are drawn as trajectories, which simplify themselves when zoomed out
+        actor = Trajectories.Trajectory(capacity=max(len_array, 1))
+        actor.Append(numpy_array)
+        return actor
 
-    polygon = vtk.vtkPolyData()
-    polygon.SetPoints(points)
-    polygon.SetLines(lines)
+    if np.shape(color_array)[0] == 3:
+        color_array = np.transpose(color_array)
+    # per-vertex colors become per-segment colors of the equivalent line list
+    segment_ids = _lineStripSegmentIds(len_array)
+    color_array = _expandColorsToCells(color_array, len_array, segment_ids)
+    polygon = _lineListPolyData(np.asarray(numpy_array, dtype=float)[segment_ids.ravel()], color_array)
 
     polygonMapper = vtk.vtkPolyDataMapper()
     polygonMapper.SetInputConnection(polygon.GetProducerPort())
@@ -110,34 +205,11 @@ def LineStrip(numpy_array, color_array=None):
 def LineList(numpy_array, color_array=None):
     if np.shape(numpy_array)[0] == 3:
         numpy_array = np.transpose(numpy_array)
-    len_array = np.shape(numpy_array)[0]
-
-    points = vtk.vtkPoints()
-    points.SetNumberOfPoints(len_array)
-    points.SetData(nps.numpy_to_vtk(numpy_array, deep=1))
-
-    lines = vtk.vtkCellArray()
-    num_lines = len_array/2
-    line_count = 0
-    for i in xrange(0, len_array, 2):
-        lines.InsertNextCell(2)
-        lines.InsertCellPoint(i)
-        lines.InsertCellPoint(i+1)
-        line_count += 1
-        if line_count == num_lines:
-            break
-
-    polygon = vtk.vtkPolyData()
-    polygon.SetPoints(points)
-    polygon.SetLines(lines)
-
-    # color
     if color_array is not None:
         if np.shape(color_array)[0] == 3:
             color_array = np.transpose(color_array)
-        colors = nps.numpy_to_vtk(color_array, deep=1)
-        colors.SetName("Colors")
-        polygon.GetCellData().SetScalars(colors)
+
+    polygon = _lineListPolyData(numpy_array, color_array)
 
     polygonMapper = vtk.vtkPolyDataMapper()
     polygonMapper.SetInputConnection(polygon.GetProducerPort())
@@ -148,27 +220,24 @@ def LineList(numpy_array, color_array=None):
     return actor
 
 def LineLoop(numpy_array, color_array=None):
-    if color_array is not None:
-        numpy_array = _convertLineLoopToLineList(numpy_array)
-        return LineList(numpy_array, color_array)
-
     if np.shape(numpy_array)[0] == 3:
         numpy_array = np.transpose(numpy_array)
     len_array = np.shape(numpy_array)[0]
 
-    points = vtk.vtkPoints()
-    points.SetNumberOfPoints(len_array)
-    points.SetData(nps.numpy_to_vtk(numpy_array, deep=1))
-
-    lines = vtk.vtkCellArray()
-    lines.InsertNextCell(len_array+1)
-    for i in xrange(len_array):
-        lines.InsertCellPoint(i)
-    lines.InsertCellPoint(0)
-
-    polygon = vtk.vtkPolyData()
-    polygon.SetPoints(points)
-    polygon.SetLines(lines)
+    if color_array is not None:
+        if np.shape(color_array)[0] == 3:
+            color_array = np.transpose(color_array)
+        # a loop has as many segments as vertices - colors are per segment, segment i running from vertex i to i+1
+        segment_ids = _lineLoopSegmentIds(len_array)
+        polygon = _lineListPolyData(np.asarray(numpy_array, dtype=float)[segment_ids.ravel()], color_array)
+    else:
+        points = vtk.vtkPoints()
+        points.SetNumberOfPoints(len_array)
+        points.SetData(nps.numpy_to_vtk(np.ascontiguousarray(numpy_array), deep=1))
+
+        polygon = vtk.vtkPolyData()
+        polygon.SetPoints(points)
+        polygon.SetLines(VTKUtils.numpyToCellArray(np.arange(len_array+1)[None,:] % len_array))
 
     polygonMapper = vtk.vtkPolyDataMapper()
     polygonMapper.SetInputConnection(polygon.GetProducerPort())
@@ -178,45 +247,45 @@ def LineLoop(numpy_array, color_array=None):
 
     return actor
 
-def _convertTriangleStripToTriangleList(numpy_array):
+def TriangleStrip(numpy_array, color_array=None):
     if np.shape(numpy_array)[0] == 3:
         numpy_array = np.transpose(numpy_array)
     len_array = np.shape(numpy_array)[0]
 
-    new_numpy_array = np.zeros(((3*(len_array-1))-3, 3))
-    idx = 0
-    for i in xrange(2,len_array):
-        new_numpy_array[idx,:] = numpy_array[i-2,:]
-        new_numpy_array[idx+1,:] = numpy_array[i-1,:]
-        new_numpy_array[idx+2,:] = numpy_array[i,:]
-        idx += 3
+    if color_array is not None:
+        if np.shape(color_array)[0] == 3:
+            color_array = np.transpose(color_array)
+        # per-vertex colors become per-triangle colors of the equivalent triangle list
+        triangle_ids = _triangleStripTriangleIds(len_array)
+        color_array = _expandColorsToCells(color_array, len_array, triangle_ids)
+        polydata = _triangleListPolyData(np.asarray(numpy_array, dtype=float)[triangle_ids.ravel()], color_array)
+    else:
+        points = vtk.vtkPoints()
+        points.SetNumberOfPoints(len_array)
+        points.SetData(nps.numpy_to_vtk(np.ascontiguousarray(numpy_array), deep=1))
 
-    return new_numpy_array
+        cells = VTKUtils.numpyToCellArray(np.arange(len_array)[None,:])
 
-def TriangleStrip(numpy_array, color_array=None):
-    if color_array is not None:
-        numpy_array = _convertTriangleStripToTriangleList(numpy_array)
-        return TriangleList(numpy_array, color_array)
+        polydata = vtk.vtkPolyData()
+        polydata.SetPoints(points)
+        polydata.SetStrips(cells)
 
+    mapper = vtk.vtkDataSetMapper()
+    mapper.SetInput(polydata)
+     
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+
+    return actor
+
+def TriangleList(numpy_array, color_array=None):
     if np.shape(numpy_array)[0] == 3:
         numpy_array = np.transpose(numpy_array)
-    len_array = np.shape(numpy_array)[0]
-
-    points = vtk.vtkPoints()
-    points.SetNumberOfPoints(len_array)
-    points.SetData(nps.numpy_to_vtk(numpy_array, deep=1))
+    if color_array is not None:
+        if np.shape(color_array)[0] == 3:
+            color_array = np.transpose(color_array)
 
-    triangleStrip = vtk.vtkTriangleStrip()
-    triangleStrip.GetPointIds().SetNumberOfIds(len_array)
-    for i in xrange(len_array):
-        triangleStrip.GetPointIds().SetId(i,i)
-     
-    cells = vtk.vtkCellArray()
-    cells.InsertNextCell(triangleStrip)
-     
-    polydata = vtk.vtkPolyData()
-    polydata.SetPoints(points)
-    polydata.SetStrips(cells)
+    polydata = _triangleListPolyData(numpy_array, color_array)
 
     mapper = vtk.vtkDataSetMapper()
     mapper.SetInput(polydata)
@@ -226,47 +295,70 @@ def TriangleStrip(numpy_array, color_array=None):
 
     return actor
 
-def TriangleList(numpy_array, color_array=None):
-    if np.shape(numpy_array)[0] == 3:
+def Trajectory(max_length=None):
+    actor = Trajectories.Trajectory(max_length)
+
+    return actor
+
+def _meshPolyData(numpy_array, face_array, color_array, normal_array, copy, numpy_arrays):
+    # (3 x N) arrays are transposed - a (3 x 3) array is already one vertex/face per row (i.e. a single triangle)
+    if np.shape(numpy_array)[0] == 3 and np.shape(numpy_array)[1] != 3:
         numpy_array = np.transpose(numpy_array)
+    if np.shape(face_array)[0] == 3 and np.shape(face_array)[1] != 3:
+        face_array = np.transpose(face_array)
     len_array = np.shape(numpy_array)[0]
 
     points = vtk.vtkPoints()
     points.SetNumberOfPoints(len_array)
-    points.SetData(nps.numpy_to_vtk(numpy_array, deep=1))
+    points.SetData(_numpyToVTKArray(numpy_array, copy, numpy_arrays))
 
-    cells = vtk.vtkCellArray()
-    num_triangles = len_array/3
-    triangle_count = 0
-    for i in xrange(0, len_array, 3):
-        triangle = vtk.vtkTriangle()
-        triangle.GetPointIds().SetNumberOfIds(3)
-        triangle.GetPointIds().SetId(0,i)
-        triangle.GetPointIds().SetId(1,i+1)
-        triangle.GetPointIds().SetId(2,i+2)
-        cells.InsertNextCell(triangle)
-        triangle_count += 1
-        if triangle_count == num_triangles:
-            break
-     
+    # faces index into the shared vertices, so each vertex is stored only once
     polydata = vtk.vtkPolyData()
     polydata.SetPoints(points)
-    polydata.SetPolys(cells)
+    polydata.SetPolys(VTKUtils.numpyToCellArray(face_array))
 
-    # color
+    # per-vertex color
     if color_array is not None:
-        if np.shape(color_array)[0] == 3:
+        if np.shape(color_array)[0] == 3 and np.shape(color_array)[1] != 3:
             color_array = np.transpose(color_array)
-        colors = nps.numpy_to_vtk(color_array, deep=1)
+        colors = _numpyToVTKArray(color_array, copy, numpy_arrays)
         colors.SetName("Colors")
-        polydata.GetCellData().SetScalars(colors)
+        polydata.GetPointData().SetScalars(colors)
 
-    mapper = vtk.vtkDataSetMapper()
+    # per-vertex normals
+    if normal_array is not None:
+        if np.shape(normal_array)[0] == 3 and np.shape(normal_array)[1] != 3:
+            normal_array = np.transpose(normal_array)
+        normals = _numpyToVTKArray(normal_array, copy, numpy_arrays)
+        normals.SetName("Normals")
+        polydata.GetPointData().SetNormals(normals)
+
+    return polydata
+
+def Mesh(numpy_array, face_array, color_array=None, normal_array=None, copy=True):
+    numpy_arrays = []
+    polydata = _meshPolyData(numpy_array, face_array, color_array, normal_array, copy, numpy_arrays)
+
+    mapper = vtk.vtkPolyDataMapper()
     mapper.SetInput(polydata)
-     
+
     actor = vtk.vtkActor()
     actor.SetMapper(mapper)
+    # the numpy memory of uncopied vtk arrays lives as long as the actor
+    actor.numpy_arrays = numpy_arrays
+
+    return actor
+
+def Heightmap(z_grid, origin, spacing, color_array=None):
+    actor = Heightmaps.Heightmap(z_grid, origin, spacing, color_array)
+    return actor
 
+def GridMap(grid, origin, resolution, value_range=(0.0, 1.0)):
+    actor = GridMaps.GridMap(grid, origin, resolution, value_range)
+    return actor
+
+def VoxelMap(voxel_size, origin=(0.0, 0.0, 0.0)):
+    actor = VoxelMaps.VoxelMap(voxel_size, origin)
     return actor
 
 def Quad(numpy_array):
@@ -351,53 +443,86 @@ def TexturedQuad(numpy_array, image_path):
 
     return actor
 
-def PointCloud(numpy_array, color_array=None):
+def PointCloud(numpy_array, color_array=None, point_budget=None, decimation=None, scalar_array=None, colormap=None, scalar_range=None, copy=True):
     if np.shape(numpy_array)[0] == 3:
         numpy_array = np.transpose(numpy_array)
+    if color_array is not None:
+        if np.shape(color_array)[0] == 3:
+            color_array = np.transpose(color_array)
+
+    # a scalar field (i.e. intensity, depth, time) is colored by the mapper through a lookup table, instead of explicit colors
+    if scalar_array is not None:
+        if color_array is not None:
+            warn_str = 'PointCloud given both colors and scalars - the colors are ignored'
+            warnings.warn(warn_str, RuntimeWarning)
+        scalar_array = np.ravel(scalar_array)
+        if scalar_range is None:
+            scalar_range = (float(np.nanmin(scalar_array)), float(np.nanmax(scalar_array)))
+        color_array = scalar_array[:,None]
+
+    # clouds over budget are decimated before anything is uploaded - the per-actor budget overrides the global one
+    if point_budget is None:
+        point_budget = PointClouds.default_point_budget
+    if decimation is None:
+        decimation = PointClouds.default_decimation
+    numpy_array, color_array = PointClouds.decimate(np.asarray(numpy_array), None if color_array is None else np.asarray(color_array), point_budget, decimation)
     len_array = np.shape(numpy_array)[0]
+    numpy_arrays = []
 
     points = vtk.vtkPoints()
     points.SetNumberOfPoints(len_array)
-    points.SetData(nps.numpy_to_vtk(numpy_array, deep=1))
+    points.SetData(_numpyToVTKArray(numpy_array, copy, numpy_arrays))
+
+    verts = VTKUtils.numpyToCellArray(np.arange(len_array)[:,None])
 
-    verts = vtk.vtkCellArray()
-    for i in xrange(len_array):
-        verts.InsertNextCell(1)
-        verts.InsertCellPoint(i)
-     
     polydata = vtk.vtkPolyData()
     polydata.SetPoints(points)
     polydata.SetVerts(verts)
 
     # color
     if color_array is not None:
-        if np.shape(color_array)[0] == 3:
-            color_array = np.transpose(color_array)
-        colors = nps.numpy_to_vtk(color_array, deep=1)
-        colors.SetName("Colors")
+        colors = _numpyToVTKArray(color_array, copy, numpy_arrays)
+        colors.SetName("Scalars" if scalar_array is not None else "Colors")
         polydata.GetCellData().SetScalars(colors)
 
     mapper = vtk.vtkDataSetMapper()
     mapper.SetInput(polydata)
+    if scalar_array is not None:
+        mapper.SetLookupTable(Colormaps.LookupTable(Colormaps.COLORMAP_DEFAULT if colormap is None else colormap, scalar_range))
+        mapper.SetColorModeToMapScalars()
+        mapper.SetScalarRange(scalar_range[0], scalar_range[1])
      
     actor = vtk.vtkActor()
     actor.SetMapper(mapper)
+    # the numpy memory of uncopied vtk arrays lives as long as the actor
+    actor.numpy_arrays = numpy_arrays
+
+    return actor
 
+def PointCloudFile(file_path, point_budget=None, decimation=None):
+    # the loaders return arrays copied once out of the memory mapped file, which are handed to vtk without another copy
+    numpy_array, color_array = FileLoaders.loadPointCloudFile(file_path)
+    actor = PointCloud(numpy_array, color_array, point_budget, decimation, copy=False)
+    return actor
+
+def OctreePointCloud(octree_dir, point_budget=None):
+    if point_budget is None:
+        point_budget = OctreePointClouds.OCTREE_POINT_BUDGET
+    actor = OctreePointClouds.OctreePointCloud(octree_dir, point_budget)
     return actor
 
 def Model(model_path, model_image_path=None):
     if model_path[-4:].lower() == '.obj':
-        reader = vtk.vtkOBJReader()
-        reader.SetFileName(model_path)
-        reader.Update()
+        def readModel():
+            reader = vtk.vtkOBJReader()
+            reader.SetFileName(model_path)
+            reader.Update()
 
-        polyData = reader.GetOutput()
+            return reader.GetOutput()
 
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInput(polyData)
-
-        objActor = vtk.vtkActor()
-        objActor.SetMapper(mapper)
+        # decimated levels of detail are generated (or read from their cache next to the model) on the first load, and
+        # shared by every actor of the model
+        objActor = ModelLODs.ModelLOD(model_path, readModel)
 
         # texture from image
         if model_image_path is not None:
@@ -417,6 +542,16 @@ def Model(model_path, model_image_path=None):
             objActor.SetTexture(texture)
 
         return objActor
+    elif model_path[-4:].lower() == '.ply':
+        vertices, faces, colors, normals = FileLoaders.loadPLY(model_path)
+        if faces is None:
+            return PointCloud(vertices, colors, copy=False)
+
+        def readModel():
+            # the shared levels outlive this load, so they copy off the memory-mapped file
+            return _meshPolyData(vertices, faces, colors, normals, copy=True, numpy_arrays=[])
+
+        return ModelLODs.ModelLOD(model_path, readModel)
 
 def CustomTextBillboard(text, text_size=None):
     actor = Billboards.TextBillboard(text, text_size)
@@ -428,48 +563,36 @@ def CustomImageBillboard(image_path, width=None, height=None):
 
     return actor
 
+def Labels(numpy_array, labels, priority_array=None, text_size=None):
+    actor = Billboards.LabelLayer(numpy_array, labels, priority_array, text_size)
+
+    return actor
+
+def Sprites(numpy_array, image_paths, width=None, height=None):
+    actor = Billboards.SpriteLayer(numpy_array, image_paths, width, height)
+
+    return actor
+
 def Grid(full_length, cell_length):
     num_cols = int(math.ceil(float(full_length)/cell_length))
     if (num_cols%2) == 1:   # even number of cols/rows
         num_cols += 1
     full_length = num_cols*cell_length
 
-    gridPoints = vtk.vtkPoints()
-    for i in xrange(num_cols+1):
-        p0 = [-full_length/2.0, -full_length/2.0 + i*cell_length, 0.0]
-        p1 = [full_length/2.0, -full_length/2.0 + i*cell_length, 0.0]
-        if (i%2) == 1:
-            gridPoints.InsertNextPoint(p0)
-            gridPoints.InsertNextPoint(p1)
-        else:
-            gridPoints.InsertNextPoint(p1)
-            gridPoints.InsertNextPoint(p0)
-    for i in xrange(num_cols+1):
-        p0 = [-full_length/2.0 + i*cell_length, -full_length/2.0, 0.0]
-        p1 = [-full_length/2.0 + i*cell_length, full_length/2.0, 0.0]
-        if (i%2) == 1:
-            gridPoints.InsertNextPoint(p0)
-            gridPoints.InsertNextPoint(p1)
-        else:
-            gridPoints.InsertNextPoint(p1)
-            gridPoints.InsertNextPoint(p0)
-
-    baseGrid = vtk.vtkStructuredGrid()
-    baseGrid.SetDimensions(4*(num_cols+1),1,1)
-    baseGrid.SetPoints(gridPoints)
-
-    outlineFilter = vtk.vtkStructuredGridGeometryFilter()
-    outlineFilter.SetInputConnection(baseGrid.GetProducerPort())
-    outlineFilter.Update()
+    polygon = _lineListPolyData(Grids.gridLines(-full_length/2.0, full_length/2.0, -full_length/2.0, full_length/2.0, cell_length), None)
 
     mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(outlineFilter.GetOutputPort())
+    mapper.SetInputConnection(polygon.GetProducerPort())
 
     actor = vtk.vtkActor()
     actor.SetMapper(mapper)
 
     return actor
 
+def AdaptiveGrid():
+    actor = Grids.AdaptiveGrid()
+    return actor
+
 def Axes():
     axes = vtk.vtkAxesActor()
     axes.SetShaftTypeToCylinder()
@@ -485,75 +608,60 @@ def Axes():
     return axes
 
 def Arrow(res):
-    arrowSource = vtk.vtkArrowSource()
-    arrowSource.SetTipResolution(res)
-    arrowSource.SetShaftResolution(res)
-
-    mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(arrowSource.GetOutputPort())
+    def source():
+        arrowSource = vtk.vtkArrowSource()
+        arrowSource.SetTipResolution(res)
+        arrowSource.SetShaftResolution(res)
 
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
+        return arrowSource
 
-    return actor
+    return _cachedSourceActor((PRIMITIVE_ARROW, res), source)
 
 def Box(x_length, y_length, z_length):
-    cubeSource = vtk.vtkCubeSource()
-    cubeSource.SetXLength(x_length)
-    cubeSource.SetYLength(y_length)
-    cubeSource.SetZLength(z_length)
+    def source():
+        cubeSource = vtk.vtkCubeSource()
+        cubeSource.SetXLength(x_length)
+        cubeSource.SetYLength(y_length)
+        cubeSource.SetZLength(z_length)
 
-    mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(cubeSource.GetOutputPort())
+        return cubeSource
 
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
-
-    return actor
+    return _cachedSourceActor((PRIMITIVE_BOX, x_length, y_length, z_length), source)
 
 def Sphere(radius, tres, pres):
-    sphereSource = vtk.vtkSphereSource()
-    sphereSource.SetRadius(radius)
-    sphereSource.SetThetaResolution(tres)
-    sphereSource.SetPhiResolution(pres)
+    def source():
+        sphereSource = vtk.vtkSphereSource()
+        sphereSource.SetRadius(radius)
+        sphereSource.SetThetaResolution(tres)
+        sphereSource.SetPhiResolution(pres)
 
-    mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(sphereSource.GetOutputPort())
+        return sphereSource
 
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
-
-    return actor
+    return _cachedSourceActor((PRIMITIVE_SPHERE, radius, tres, pres), source)
 
 def Cylinder(radius, height, res):
-    cylinderSource = vtk.vtkCylinderSource()
-    cylinderSource.SetRadius(radius)
-    cylinderSource.SetHeight(height)
-    cylinderSource.SetResolution(res)
+    def source():
+        cylinderSource = vtk.vtkCylinderSource()
+        cylinderSource.SetRadius(radius)
+        cylinderSource.SetHeight(height)
+        cylinderSource.SetResolution(res)
 
-    mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(cylinderSource.GetOutputPort())
+        return cylinderSource
 
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
-
-    return actor
+    return _cachedSourceActor((PRIMITIVE_CYLINDER, radius, height, res), source)
 
 def Ellipsoid(radius_x, radius_y, radius_z):
-    ellipsoid = vtk.vtkParametricEllipsoid()
-    ellipsoid.SetXRadius(radius_x)
-    ellipsoid.SetYRadius(radius_y)
-    ellipsoid.SetZRadius(radius_z)
-    parametricSource = vtk.vtkParametricFunctionSource()
-    parametricSource.SetParametricFunction(ellipsoid)
+    def source():
+        ellipsoid = vtk.vtkParametricEllipsoid()
+        ellipsoid.SetXRadius(radius_x)
+        ellipsoid.SetYRadius(radius_y)
+        ellipsoid.SetZRadius(radius_z)
+        parametricSource = vtk.vtkParametricFunctionSource()
+        parametricSource.SetParametricFunction(ellipsoid)
 
-    mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(parametricSource.GetOutputPort())
+        return parametricSource
 
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
-
-    return actor
+    return _cachedSourceActor((PRIMITIVE_ELLIPSOID, radius_x, radius_y, radius_z), source)
 
 def Ellipsoid_deprecated(a0, a1, a2, a3, a4, a5, a6, a7, a8, a9, bounds, sample_dims):
     #create an ellipsoid using a implicit quadric
@@ -583,30 +691,24 @@ def Ellipsoid_deprecated(a0, a1, a2, a3, a4, a5, a6, a7, a8, a9, bounds, sample_
     return actor
 
 def Cone(radius, height, res):
-    coneSource = vtk.vtkConeSource()
-    coneSource.SetRadius(radius)
-    coneSource.SetHeight(height)
-    coneSource.SetResolution(res)
-
-    mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(coneSource.GetOutputPort())
+    def source():
+        coneSource = vtk.vtkConeSource()
+        coneSource.SetRadius(radius)
+        coneSource.SetHeight(height)
+        coneSource.SetResolution(res)
 
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
+        return coneSource
 
-    return actor
+    return _cachedSourceActor((PRIMITIVE_CONE, radius, height, res), source)
 
 def Torus(radius_ring, radius_cross_section):
-    ellipsoid = vtk.vtkParametricTorus()
-    ellipsoid.SetRingRadius(radius_ring)
-    ellipsoid.SetCrossSectionRadius(radius_cross_section)
-    parametricSource = vtk.vtkParametricFunctionSource()
-    parametricSource.SetParametricFunction(ellipsoid)
-
-    mapper = vtk.vtkPolyDataMapper()
-    mapper.SetInputConnection(parametricSource.GetOutputPort())
+    def source():
+        ellipsoid = vtk.vtkParametricTorus()
+        ellipsoid.SetRingRadius(radius_ring)
+        ellipsoid.SetCrossSectionRadius(radius_cross_section)
+        parametricSource = vtk.vtkParametricFunctionSource()
+        parametricSource.SetParametricFunction(ellipsoid)
 
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
+        return parametricSource
 
-    return actor
\ No newline at end of file
+    return _cachedSourceActor((PRIMITIVE_TORUS, radius_ring, radius_cross_section), source)
\ No newline at end of file
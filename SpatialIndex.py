@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+spatial index - a loose octree over the world bounds of scene actors, for region queries, selection and culling
+
+The octree has no root cube, so the scene can grow in any direction: level k is a grid of cubes of side 2^k world
+units, each the octant of a level k+1 cube. An item is stored in the single level k cell that holds its center, at the
+level where its size fits a cell - since every cell is queried as its loose cube (twice its side, around the same
+center), the item is always inside the loose cube of its cell.
+'''
+
+''' standard libs '''
+import math
+import numpy as np
+
+''' spatial index parameters '''
+SPATIAL_INDEX_MIN_LEVEL = -10       # the smallest cells (for points and tiny actors) have a side of 2^-10 world units
+
+def _level(size):
+    # the level whose cell side is at least size
+    if size <= 0.0:
+        return SPATIAL_INDEX_MIN_LEVEL
+    return max(int(math.ceil(math.log(size, 2))), SPATIAL_INDEX_MIN_LEVEL)
+
+def boxesInFrustum(planes, lower, upper):
+    # boolean per (N x 3) box - a box is outside if its corner furthest along some inward plane normal is still behind that plane
+    planes = np.reshape(planes, (-1, 4))
+    corners = np.where(planes[:,None,0:3] > 0, upper[None,:,:], lower[None,:,:])
+    return np.all(np.sum(planes[:,None,0:3]*corners, axis=2) + planes[:,3:4] >= 0, axis=0)
+
+def frustumPlanes(corners):
+    '''
+    Given the 8 corners of a frustum - the near quad then the far quad, both in the same order around - return its
+    (6 x 4) plane equations, with normals pointing into the frustum.
+    '''
+    corners = np.reshape(corners, (8, 3)).astype(float)
+    center = np.mean(corners, axis=0)
+    faces = [(0, 1, 2), (4, 6, 5)] + [(i, (i+1)%4, i+4) for i in xrange(4)]
+    planes = np.empty((6, 4))
+    for i, (a, b, c) in enumerate(faces):
+        normal = np.cross(corners[b] - corners[a], corners[c] - corners[a])
+        normal /= max(np.linalg.norm(normal), 1e-12)
+        d = -np.dot(normal, corners[a])
+        if np.dot(normal, center) + d < 0:
+            normal, d = -normal, -d
+        planes[i,0:3] = normal
+        planes[i,3] = d
+    return planes
+
+class SpatialIndex(object):
+    ''' a loose octree of (item, axis aligned bounds) - items are any hashable objects, i.e. actors '''
+    def __init__(self):
+        self.items = {}         # item -> (level, cell, bounds as (xmin, xmax, ymin, ymax, zmin, zmax))
+        self.cells = {}         # level -> {cell (ix, iy, iz): set of items}
+        self.cell_arrays = {}   # level -> (cells as an (M x 3) array, list of cells) - rebuilt when the level changes
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def Update(self, item, bounds):
+        '''
+        Given an item and its bounds, insert it or move it to where its bounds now are - items with unchanged bounds
+        cost a tuple comparison, and items with empty bounds (xmin > xmax) are removed.
+        '''
+        entry = self.items.get(item)
+        if bounds is None or bounds[0] > bounds[1]:
+            if entry is not None:
+                self.Remove(item)
+            return
+        bounds = tuple(bounds)
+        if entry is not None and entry[2] == bounds:
+            return
+        bounds_array = np.reshape(bounds, (3, 2))
+        level = _level(np.max(bounds_array[:,1] - bounds_array[:,0]))
+        size = 2.0**level
+        cell = tuple(np.floor(np.mean(bounds_array, axis=1)/size).astype(int))
+        if entry is not None and entry[0] == level and entry[1] == cell:
+            # moved within its cell
+            self.items[item] = (level, cell, bounds)
+            return
+        if entry is not None:
+            self.Remove(item)
+        self.items[item] = (level, cell, bounds)
+        level_cells = self.cells.setdefault(level, {})
+        if cell not in level_cells:
+            level_cells[cell] = set()
+            self.cell_arrays.pop(level, None)
+        level_cells[cell].add(item)
+
+    def Insert(self, item, bounds):
+        self.Update(item, bounds)
+
+    def Remove(self, item):
+        entry = self.items.pop(item, None)
+        if entry is None:
+            return
+        level, cell, bounds = entry
+        level_cells = self.cells[level]
+        level_cells[cell].discard(item)
+        if len(level_cells[cell]) == 0:
+            del level_cells[cell]
+            self.cell_arrays.pop(level, None)
+            if len(level_cells) == 0:
+                del self.cells[level]
+
+    def GetBounds(self, item):
+        entry = self.items.get(item)
+        return None if entry is None else entry[2]
+
+    def QueryBox(self, bounds):
+        # items whose bounds overlap the (xmin, xmax, ymin, ymax, zmin, zmax) box
+        bounds = np.reshape(bounds, (3, 2)).astype(float)
+        lower, upper = bounds[:,0], bounds[:,1]
+        return self._query(lambda cell_lower, cell_upper: np.all((cell_lower <= upper) & (cell_upper >= lower), axis=1))
+
+    def QuerySphere(self, center, radius):
+        # items whose bounds come within radius of center
+        center = np.asarray(center, dtype=float)
+        def test(box_lower, box_upper):
+            closest = np.clip(center, box_lower, box_upper)
+            return np.sum((closest - center)**2, axis=1) <= radius*radius
+        return self._query(test)
+
+    def QueryFrustum(self, planes):
+        # items whose bounds are (at least partly) inside the frustum given by (6 x 4) plane equations with inward normals
+        return self._query(lambda box_lower, box_upper: boxesInFrustum(planes, box_lower, box_upper))
+
+    def _query(self, test):
+        # test takes (N x 3) lower and upper box corners and returns a boolean per box - it is applied first to the loose
+        # cubes of the occupied cells, then to the bounds of the items in the cells that passed
+        candidates = []
+        for level in self.cells:
+            cell_array, cell_list = self._cellArray(level)
+            size = 2.0**level
+            # the loose cube of a cell extends half a cell beyond it on every side
+            inside = test(cell_array*size - size/2.0, cell_array*size + 1.5*size)
+            for i in np.nonzero(inside)[0]:
+                candidates.extend(self.cells[level][cell_list[i]])
+        if len(candidates) == 0:
+            return []
+        bounds = np.array([self.items[item][2] for item in candidates], dtype=float)
+        inside = test(bounds[:,0::2], bounds[:,1::2])
+        return [candidates[i] for i in np.nonzero(inside)[0]]
+
+    def _cellArray(self, level):
+        if level not in self.cell_arrays:
+            cell_list = list(self.cells[level].keys())
+            self.cell_arrays[level] = (np.array(cell_list, dtype=float).reshape(-1, 3), cell_list)
+        return self.cell_arrays[level]
+
+def _transformChain(transform, chain=None):
+    # transform and every vtkTransform it concatenates, directly or through its parents
+    if chain is None:
+        chain = []
+    if transform in chain:
+        return chain
+    chain.append(transform)
+    for i in xrange(transform.GetNumberOfConcatenatedTransforms()):
+        concatenated = transform.GetConcatenatedTransform(i)
+        if concatenated is not None and concatenated.IsA('vtkTransform'):
+            _transformChain(concatenated, chain)
+    return chain
+
+class ActorBoundsTracker(object):
+    '''
+    keeps a SpatialIndex of actor bounds up to date from vtk Modified events - of the actor, its mapper and mapper input,
+    and every transform it is placed by (a tree node's transform concatenates its parents', so moving a directory only
+    modifies the directory's transform) - so only the actors that changed are re-read
+    '''
+    def __init__(self, spatial_index):
+        self.spatial_index = spatial_index
+        self.moved = set()              # actors whose bounds must be re-read
+        self.watched = {}               # actor -> {'actor'/'mapper'/'input': (vtk object, observer tag), 'user_transform': transform}
+        self.transform_actors = {}      # transform -> set of actors placed by it
+        self.transform_observers = {}   # transform -> observer tag
+        self.actor_transforms = {}      # actor -> set of transforms it is registered with
+
+    def Add(self, actor):
+        self.watched[actor] = {'actor': (actor, actor.AddObserver('ModifiedEvent', lambda obj, event, actor=actor: self._actorModified(actor))),
+                               'mapper': None, 'input': None, 'user_transform': None}
+        self.actor_transforms[actor] = set()
+        self._actorModified(actor)
+
+    def Remove(self, actor):
+        watch = self.watched.pop(actor, None)
+        if watch is None:
+            return
+        for key in ['actor', 'mapper', 'input']:
+            if watch[key] is not None:
+                watch[key][0].RemoveObserver(watch[key][1])
+        for transform in self.actor_transforms.pop(actor):
+            actors = self.transform_actors[transform]
+            actors.discard(actor)
+            if len(actors) == 0:
+                transform.RemoveObserver(self.transform_observers.pop(transform))
+                del self.transform_actors[transform]
+        self.moved.discard(actor)
+        self.spatial_index.Remove(actor)
+
+    def Refresh(self):
+        # re-file the actors that changed since the last refresh, and return them
+        moved = self.moved
+        self.moved = set()
+        for actor in moved:
+            self.spatial_index.Update(actor, actor.GetBounds())
+        return moved
+
+    def _actorModified(self, actor):
+        # position, orientation, scale, user transform or mapper changes
+        self.moved.add(actor)
+        watch = self.watched[actor]
+        user_transform = actor.GetUserTransform()
+        if user_transform is not watch['user_transform']:
+            watch['user_transform'] = user_transform
+            if user_transform is not None and user_transform.IsA('vtkTransform'):
+                for transform in _transformChain(user_transform):
+                    self._register(transform, [actor])
+        mapper = actor.GetMapper() if actor.IsA('vtkActor') else None
+        if mapper is not None and (watch['mapper'] is None or watch['mapper'][0] is not mapper):
+            self._observe(watch, 'mapper', mapper, lambda obj, event, actor=actor: self._mapperModified(actor))
+            self._mapperModified(actor)
+
+    def _mapperModified(self, actor):
+        # the mapper may draw a different input now (i.e. a level of detail switch)
+        self.moved.add(actor)
+        watch = self.watched[actor]
+        polydata = watch['mapper'][0].GetInput()
+        if polydata is not None and (watch['input'] is None or watch['input'][0] is not polydata):
+            self._observe(watch, 'input', polydata, lambda obj, event, actor=actor: self.moved.add(actor))
+
+    def _observe(self, watch, key, vtk_object, callback):
+        if watch[key] is not None:
+            watch[key][0].RemoveObserver(watch[key][1])
+        watch[key] = (vtk_object, vtk_object.AddObserver('ModifiedEvent', callback))
+
+    def _transformModified(self, transform):
+        actors = self.transform_actors[transform]
+        self.moved |= actors
+        # the transform may concatenate different parents now (i.e. its tree node was reset)
+        for ancestor in _transformChain(transform)[1:]:
+            self._register(ancestor, actors)
+
+    def _register(self, transform, actors):
+        if transform not in self.transform_actors:
+            self.transform_actors[transform] = set()
+            self.transform_observers[transform] = transform.AddObserver('ModifiedEvent', lambda obj, event, transform=transform: self._transformModified(transform))
+        self.transform_actors[transform].update(actors)
+        for actor in actors:
+            self.actor_transforms[actor].add(transform)
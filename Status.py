@@ -13,4 +13,5 @@ status types
 OK = 'ok'
 NONEXISTING_PATH = 'nonexisting_path'
 EXISTING_PATH = 'existing_path'
-MALFORMED_PATH = 'malformed_path'
\ No newline at end of file
+MALFORMED_PATH = 'malformed_path'
+MISMATCHED_TYPE = 'mismatched_type'
\ No newline at end of file
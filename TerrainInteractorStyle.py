@@ -12,11 +12,17 @@ custom interactor style for terrain
 import vtk
 import math
 import numpy as np
+from PyQt4 import QtCore
+
+MOTION_FRAME_MS = 16    # mouse motion is gathered for up to this long, then applied to the camera in one step and rendered once
  
 class TerrainInteractorStyle(vtk.vtkInteractorStyle):
     def __init__(self):
         self.MotionFactor = 10.0
         self.MouseWheelMotionFactor = 1.0
+        self.motionPending = False
+        self.motionStart = None
+        self.motionEnd = None
         self.AddObserver("MouseMoveEvent", self.mouseMoveEvent)
         self.AddObserver("LeftButtonPressEvent", self.leftButtonPressEvent)
         self.AddObserver("LeftButtonReleaseEvent", self.leftButtonReleaseEvent)
@@ -26,9 +32,39 @@ class TerrainInteractorStyle(vtk.vtkInteractorStyle):
         self.AddObserver("MiddleButtonReleaseEvent", self.middleButtonReleaseEvent)
         self.AddObserver("MouseWheelForwardEvent", self.mouseWheelForwardEvent)
         self.AddObserver("MouseWheelBackwardEvent", self.mouseWheelBackwardEvent)
+        self.AddObserver("KeyPressEvent", self.keyPressEvent)
+        self.AddObserver("KeyReleaseEvent", self.keyReleaseEvent)
+        self.coordText = vtk.vtkTextActor()
+        self.coordText.GetTextProperty().SetColor(255/255.0,25/255.0,15/255.0)
+        self.coordText.GetTextProperty().BoldOn()
+        self.ctrlKey = False
+        self.picker = None      # depth buffer picker, set by the canvas - without one, there is no coordinate readout
 
     def mouseMoveEvent(self, obj, event):
-        x, y = self.GetInteractor().GetEventPosition()
+        # motion events can arrive much faster than frames render - only record them here, and apply all motion since
+        # the last frame in one camera update on the next frame tick
+        rwi = self.GetInteractor()
+        state = self.GetState()
+
+        if not (state in [1, 2, 4] or self.ctrlKey):
+            return
+        if not self.motionPending:
+            self.motionPending = True
+            self.motionStart = rwi.GetLastEventPosition()
+            QtCore.QTimer.singleShot(MOTION_FRAME_MS, self.processMotion)
+        self.motionEnd = rwi.GetEventPosition()
+
+    def processMotion(self):
+        # apply the gathered motion as a single move from where it started to where the mouse is now
+        if not self.motionPending:
+            return
+        self.motionPending = False
+        rwi = self.GetInteractor()
+        if rwi is None:
+            return
+        rwi.SetEventPosition(self.motionStart[0], self.motionStart[1])
+        rwi.SetEventPosition(self.motionEnd[0], self.motionEnd[1])
+        x, y = self.motionEnd
 
         state = self.GetState()
 
@@ -45,6 +81,9 @@ class TerrainInteractorStyle(vtk.vtkInteractorStyle):
             self.Dolly()
             self.InvokeEvent(vtk.vtkCommand.InteractionEvent)
 
+        if self.ctrlKey:
+            self.ShowCoords()
+
     def leftButtonPressEvent(self, obj, event):
         x, y = self.GetInteractor().GetEventPosition()
         self.FindPokedRenderer(x, y)
@@ -57,6 +96,7 @@ class TerrainInteractorStyle(vtk.vtkInteractorStyle):
             self.StartRotate()
 
     def leftButtonReleaseEvent(self, obj, event):
+        self.processMotion()
         state = self.GetState()
 
         if state == 1:
@@ -77,6 +117,7 @@ class TerrainInteractorStyle(vtk.vtkInteractorStyle):
         self.StartPan()
  
     def middleButtonReleaseEvent(self, obj, event):
+        self.processMotion()
         state = self.GetState()
 
         if state == 2:
@@ -93,6 +134,7 @@ class TerrainInteractorStyle(vtk.vtkInteractorStyle):
         self.StartDolly()
  
     def rightButtonReleaseEvent(self, obj, event):
+        self.processMotion()
         state = self.GetState()
 
         if state == 4:
@@ -126,6 +168,34 @@ class TerrainInteractorStyle(vtk.vtkInteractorStyle):
         self.EndDolly()
         self.ReleaseFocus()
 
+    def keyPressEvent(self, obj, event):
+        x, y = self.GetInteractor().GetEventPosition()
+        self.FindPokedRenderer(x, y)
+        if self.GetCurrentRenderer() == None:
+            return
+
+        rwi = self.GetInteractor()
+
+        if self.GetInteractor().GetControlKey():
+            if not self.ctrlKey:
+                self.ctrlKey = True
+                self.ShowCoords()
+                self.GetCurrentRenderer().AddActor(self.coordText)
+                rwi.Render()
+
+    def keyReleaseEvent(self, obj, event):
+        x, y = self.GetInteractor().GetEventPosition()
+        self.FindPokedRenderer(x, y)
+        if self.GetCurrentRenderer() == None:
+            return
+
+        rwi = self.GetInteractor()
+        if self.ctrlKey:
+            if not self.GetInteractor().GetControlKey():
+                self.ctrlKey = False
+                self.GetCurrentRenderer().RemoveActor(self.coordText)
+                rwi.Render()
+
     def Rotate(self):
         if self.GetCurrentRenderer() == None:
             return
@@ -169,6 +239,31 @@ class TerrainInteractorStyle(vtk.vtkInteractorStyle):
 
         rwi.Render()
 
+    def ShowCoords(self):
+        ren = self.GetCurrentRenderer()
+        if ren == None:
+            return
+
+        rwi = self.GetInteractor()
+
+        x, y = rwi.GetEventPosition()
+
+        # the surface and actor under the cursor, from the depth buffer of the last frame
+        actor, tree_widget_item, p = None, None, None
+        if self.picker is not None:
+            actor, tree_widget_item, p = self.picker.PickActor(x, y)
+
+        if p is not None:
+            coord_str = '(' + '{0:.2f}'.format(p[0]) + ', ' + '{0:.2f}'.format(p[1]) + ', ' + '{0:.2f}'.format(p[2]) + ')'
+            if tree_widget_item is not None:
+                coord_str += ' ' + str(tree_widget_item.text(0))
+        else:
+            coord_str = ''
+        self.coordText.SetInput(coord_str)
+        self.coordText.SetPosition(x,y)
+
+        rwi.Render()
+
     def Pan(self):
         if self.GetCurrentRenderer() == None:
             return
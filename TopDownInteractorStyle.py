@@ -12,11 +12,18 @@ custom interactor style for top-down
 import vtk
 import math
 import numpy as np
+from PyQt4 import QtCore
+
+MOTION_FRAME_MS = 16    # mouse motion is gathered for up to this long, then applied to the camera in one step and rendered once
+SELECT_MIN_PIXELS = 3   # a ctrl+left drag shorter than this (in both directions) is a click, not a rubber-band selection
  
 class TopDownInteractorStyle(vtk.vtkInteractorStyle):
     def __init__(self):
         self.MotionFactor = 10.0
         self.MouseWheelMotionFactor = 1.0
+        self.motionPending = False
+        self.motionStart = None
+        self.motionEnd = None
         self.MinHeight = 5.0
         self.MaxHeight = 1e6
         self.MinParallelScale = 0.5
@@ -36,9 +43,49 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
         self.coordText.GetTextProperty().SetColor(255/255.0,25/255.0,15/255.0)
         self.coordText.GetTextProperty().BoldOn()
         self.ctrlKey = False
+        self.picker = None      # depth buffer picker, set by the canvas - without one, coordinates are read off the view plane
+        self.selection_callback = None  # called with the display rectangle (x0, y0, x1, y1) of a rubber-band selection
+        self.selectStart = None
+        self.rubberBandPoints = vtk.vtkPoints()
+        self.rubberBandPoints.SetNumberOfPoints(4)
+        rubberBandLines = vtk.vtkCellArray()
+        rubberBandLines.InsertNextCell(5)
+        for i in [0, 1, 2, 3, 0]:
+            rubberBandLines.InsertCellPoint(i)
+        rubberBandPolyData = vtk.vtkPolyData()
+        rubberBandPolyData.SetPoints(self.rubberBandPoints)
+        rubberBandPolyData.SetLines(rubberBandLines)
+        rubberBandMapper = vtk.vtkPolyDataMapper2D()
+        rubberBandMapper.SetInput(rubberBandPolyData)
+        self.rubberBand = vtk.vtkActor2D()
+        self.rubberBand.SetMapper(rubberBandMapper)
+        self.rubberBand.GetProperty().SetColor(255/255.0,25/255.0,15/255.0)
 
     def mouseMoveEvent(self, obj, event):
-        x, y = self.GetInteractor().GetEventPosition()
+        # motion events can arrive much faster than frames render - only record them here, and apply all motion since
+        # the last frame in one camera update on the next frame tick
+        rwi = self.GetInteractor()
+        state = self.GetState()
+
+        if not (state in [1, 2, 4] or self.ctrlKey or self.selectStart is not None):
+            return
+        if not self.motionPending:
+            self.motionPending = True
+            self.motionStart = rwi.GetLastEventPosition()
+            QtCore.QTimer.singleShot(MOTION_FRAME_MS, self.processMotion)
+        self.motionEnd = rwi.GetEventPosition()
+
+    def processMotion(self):
+        # apply the gathered motion as a single move from where it started to where the mouse is now
+        if not self.motionPending:
+            return
+        self.motionPending = False
+        rwi = self.GetInteractor()
+        if rwi is None:
+            return
+        rwi.SetEventPosition(self.motionStart[0], self.motionStart[1])
+        rwi.SetEventPosition(self.motionEnd[0], self.motionEnd[1])
+        x, y = self.motionEnd
 
         state = self.GetState()
 
@@ -55,6 +102,9 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
             self.Dolly()
             self.InvokeEvent(vtk.vtkCommand.InteractionEvent)
 
+        if self.selectStart is not None:
+            self.UpdateRubberBand()
+
         if self.ctrlKey:
             self.ShowCoords()
 
@@ -63,6 +113,12 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
         self.FindPokedRenderer(x, y)
         if self.GetCurrentRenderer() == None:
             return
+        if self.GetInteractor().GetControlKey():
+            # ctrl+left drag selects the actors in a rubber-band rectangle
+            self.selectStart = (x, y)
+            self.UpdateRubberBand()
+            self.GetCurrentRenderer().AddActor(self.rubberBand)
+            return
         self.GrabFocus(self.OnMouseMove())
         if self.GetInteractor().GetShiftKey():
             self.StartRotate()
@@ -70,6 +126,10 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
             self.StartPan()
 
     def leftButtonReleaseEvent(self, obj, event):
+        self.processMotion()
+        if self.selectStart is not None:
+            self.EndSelection()
+            return
         state = self.GetState()
 
         if state == 1:
@@ -90,6 +150,7 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
         self.StartPan()
  
     def middleButtonReleaseEvent(self, obj, event):
+        self.processMotion()
         state = self.GetState()
 
         if state == 2:
@@ -106,6 +167,7 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
         self.StartDolly()
  
     def rightButtonReleaseEvent(self, obj, event):
+        self.processMotion()
         state = self.GetState()
 
         if state == 4:
@@ -167,6 +229,25 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
                 self.GetCurrentRenderer().RemoveActor(self.coordText)
                 rwi.Render()
 
+    def UpdateRubberBand(self):
+        x0, y0 = self.selectStart
+        x1, y1 = self.GetInteractor().GetEventPosition()
+        for i, (x, y) in enumerate([(x0, y0), (x1, y0), (x1, y1), (x0, y1)]):
+            self.rubberBandPoints.SetPoint(i, x, y, 0)
+        self.rubberBandPoints.Modified()
+        self.GetInteractor().Render()
+
+    def EndSelection(self):
+        rwi = self.GetInteractor()
+        x0, y0 = self.selectStart
+        x1, y1 = rwi.GetEventPosition()
+        self.selectStart = None
+        if self.GetCurrentRenderer() != None:
+            self.GetCurrentRenderer().RemoveActor(self.rubberBand)
+        if (abs(x1-x0) >= SELECT_MIN_PIXELS or abs(y1-y0) >= SELECT_MIN_PIXELS) and self.selection_callback is not None:
+            self.selection_callback(min(x0,x1), min(y0,y1), max(x0,x1), max(y0,y1))
+        rwi.Render()
+
     def Rotate(self):
         if self.GetCurrentRenderer() == None:
             return
@@ -248,14 +329,19 @@ class TopDownInteractorStyle(vtk.vtkInteractorStyle):
 
         x, y = rwi.GetEventPosition()
 
-        camera = self.GetCurrentRenderer().GetActiveCamera()
-
-        size = self.GetCurrentRenderer().GetRenderWindow().GetSize()
+        # the surface and actor under the cursor, from the depth buffer of the last frame
+        actor, tree_widget_item, p = None, None, None
+        if self.picker is not None:
+            actor, tree_widget_item, p = self.picker.PickActor(x, y)
 
-        p = [0,0,0,0]
-        self.ComputeDisplayToWorld(self.GetCurrentRenderer(), x, y, 0, p)
-
-        coord_str = '(' + '{0:.2f}'.format(p[0]) + ', ' + '{0:.2f}'.format(p[1]) + ')'
+        if p is not None:
+            coord_str = '(' + '{0:.2f}'.format(p[0]) + ', ' + '{0:.2f}'.format(p[1]) + ', ' + '{0:.2f}'.format(p[2]) + ')'
+            if tree_widget_item is not None:
+                coord_str += ' ' + str(tree_widget_item.text(0))
+        else:
+            p = [0,0,0,0]
+            self.ComputeDisplayToWorld(self.GetCurrentRenderer(), x, y, 0, p)
+            coord_str = '(' + '{0:.2f}'.format(p[0]) + ', ' + '{0:.2f}'.format(p[1]) + ')'
         self.coordText.SetInput(coord_str)
         self.coordText.SetPosition(x,y)
 
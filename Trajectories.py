@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+trajectory classes
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+''' custom libs '''
+import CameraUtils
+
+''' level of detail parameters '''
+LOD_MIN_POINTS = 5000           # trajectories shorter than this are always drawn at full resolution
+LOD_PIXEL_TOLERANCE = 0.5       # simplification tolerance, in pixels
+LOD_MIN_TOLERANCE = 1e-5        # finest simplification tolerance, as a fraction of the trajectory extent
+LOD_REBUILD_FRACTION = 0.5      # rebuild the hierarchy once this fraction of points has been appended/dropped since the last build
+
+def _douglasPeuckerSignificance(numpy_array, min_tolerance):
+    '''
+    Given an (N x 3) polyline, return for every point the largest Douglas-Peucker tolerance at which it is still kept
+    (inf for the end points, 0 for points below min_tolerance). Thresholding the result at any tolerance gives the
+    Douglas-Peucker simplification at that tolerance, and the simplifications are nested. All segments of one
+    subdivision depth are split together, so the work is vectorized per depth rather than per point.
+    '''
+    len_array = np.shape(numpy_array)[0]
+    significance = np.zeros(len_array)
+    if len_array == 0:
+        return significance
+    significance[0] = np.inf
+    significance[-1] = np.inf
+
+    firsts = np.array([0])
+    lasts = np.array([len_array-1])
+    parents = np.array([np.inf])
+    while len(firsts) > 0:
+        # drop segments without interior points
+        keep = (lasts - firsts) >= 2
+        firsts, lasts, parents = firsts[keep], lasts[keep], parents[keep]
+        if len(firsts) == 0:
+            break
+
+        # interior point indices of every segment, and the segment each one belongs to
+        lengths = lasts - firsts - 1
+        segment_ids = np.repeat(np.arange(len(firsts)), lengths)
+        segment_starts = np.cumsum(lengths) - lengths
+        idx = firsts[segment_ids] + 1 + (np.arange(len(segment_ids)) - segment_starts[segment_ids])
+
+        # distance of each interior point to its segment chord
+        p0 = numpy_array[firsts][segment_ids]
+        chords = (numpy_array[lasts] - numpy_array[firsts])[segment_ids]
+        offsets = numpy_array[idx] - p0
+        chord_length2 = np.sum(chords**2, axis=1)
+        t = np.clip(np.sum(offsets*chords, axis=1)/np.where(chord_length2 > 0, chord_length2, 1.0), 0.0, 1.0)
+        distances = np.sqrt(np.sum((offsets - t[:,None]*chords)**2, axis=1))
+
+        # farthest point of each segment - the first one that reaches the per-segment maximum
+        max_distances = np.maximum.reduceat(distances, segment_starts)
+        at_max = np.flatnonzero(distances == max_distances[segment_ids])
+        _, first_at_max = np.unique(segment_ids[at_max], return_index=True)
+        split_idx = idx[at_max[first_at_max]]
+
+        split = max_distances >= min_tolerance
+        split_idx = split_idx[split]
+        # a point is never more significant than the split that exposed it - this keeps the levels nested
+        split_significance = np.minimum(max_distances[split], parents[split])
+        significance[split_idx] = split_significance
+
+        firsts, lasts, parents = (np.concatenate((firsts[split], split_idx)),
+                                  np.concatenate((split_idx, lasts[split])),
+                                  np.concatenate((split_significance, split_significance)))
+
+    return significance
+
+class Trajectory(vtk.vtkActor):
+    ''' a polyline that grows as points are appended (i.e. a vehicle track trail) '''
+    def __init__(self, max_length=None, capacity=1024):
+        self.max_length = max_length
+
+        # the points of the polyline are point_buffer[start:end] - the buffers grow geometrically, so appends are O(1) amortized
+        self.start = 0
+        self.end = 0
+        self.point_buffer = np.zeros((capacity, 3))
+        self.color_buffer = None
+        # id_buffer[0] holds the number of points in the polyline cell, id_buffer[1:] the point ids 0,1,2,...
+        self.id_buffer = np.arange(-1, capacity, dtype=nps.ID_TYPE_CODE)
+        # global index of point_buffer[0] - points keep their global index when the buffers are compacted
+        self.offset = 0
+
+        # multi-resolution hierarchy over the global points [lod_first, lod_first + len(lod_significance)) - points appended
+        # since the hierarchy was built are always drawn
+        self.lod_significance = None
+        self.lod_first = 0
+        self.lod_min_tolerance = 0.0
+        self.lod_level_ids = {}
+        self.lod_level = 0
+        self.lod_dirty = False
+        # point ids of the drawn level - referenced by the cell array, like id_buffer
+        self.lod_id_buffer = None
+
+        self.points = vtk.vtkPoints()
+        self.lines = vtk.vtkCellArray()
+
+        self.polydata = vtk.vtkPolyData()
+        self.polydata.SetPoints(self.points)
+        self.polydata.SetLines(self.lines)
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInput(self.polydata)
+
+        self.SetMapper(mapper)
+
+    def GetNumberOfPoints(self):
+        return self.end - self.start
+
+    def GetPoints(self):
+        return self.point_buffer[self.start:self.end]
+
+    def GetColors(self):
+        if self.color_buffer is None:
+            return None
+        return self.color_buffer[self.start:self.end]
+
+    def Append(self, numpy_array, color_array=None):
+        numpy_array = np.atleast_2d(numpy_array)
+        if np.shape(numpy_array)[0] == 3 and np.shape(numpy_array)[1] != 3:
+            numpy_array = np.transpose(numpy_array)
+        if color_array is not None:
+            color_array = np.atleast_2d(color_array)
+            if np.shape(color_array)[0] == 3 and np.shape(color_array)[1] != 3:
+                color_array = np.transpose(color_array)
+
+        # points that would immediately fall out of the window are never copied
+        if self.max_length is not None and np.shape(numpy_array)[0] > self.max_length:
+            numpy_array = numpy_array[-self.max_length:]
+            if color_array is not None:
+                color_array = color_array[-self.max_length:]
+        num_new = np.shape(numpy_array)[0]
+        if num_new == 0:
+            return
+
+        self._reserve(num_new)
+        self.point_buffer[self.end:self.end+num_new] = numpy_array
+        if color_array is not None and self.color_buffer is None:
+            # colors are being added for the first time - previous points default to white
+            white = 255 if np.asarray(color_array).dtype == np.uint8 else 1.0
+            self.color_buffer = np.empty((len(self.point_buffer), np.shape(color_array)[1]), dtype=np.asarray(color_array).dtype)
+            self.color_buffer[:self.end] = white
+        if self.color_buffer is not None:
+            if color_array is not None:
+                self.color_buffer[self.end:self.end+num_new] = color_array
+            elif self.end > self.start:
+                # no new colors - continue with the last color of the trajectory
+                self.color_buffer[self.end:self.end+num_new] = self.color_buffer[self.end-1]
+            else:
+                # no new colors and no previous point (i.e. after Clear) - default to white
+                self.color_buffer[self.end:self.end+num_new] = 255 if self.color_buffer.dtype == np.uint8 else 1.0
+        self.end += num_new
+
+        if self.max_length is not None and self.end - self.start > self.max_length:
+            self.start = self.end - self.max_length
+
+        # a simplified level is rebuilt by UpdateLOD before the next frame, not on every append
+        self._updatePolyData(lod_cells=False)
+
+    def Clear(self):
+        self.offset += self.end
+        self.start = 0
+        self.end = 0
+        self.lod_significance = None
+        self.lod_level_ids = {}
+        self.lod_level = 0
+        self._updatePolyData()
+
+    def UpdateLOD(self, renderer):
+        # called once per frame by the canvas - draw the coarsest level whose simplification error stays below a pixel
+        count = self.end - self.start
+        if count < LOD_MIN_POINTS:
+            if self.lod_level != 0:
+                self.lod_level = 0
+                self._updatePolyData()
+            return
+
+        if self._lodNeedsRebuild():
+            self._buildLOD()
+
+        pixel_size = CameraUtils.getWorldPixelSize(renderer, self.GetBounds())/max(self.GetScale())
+        tolerance = LOD_PIXEL_TOLERANCE*pixel_size
+        if tolerance < self.lod_min_tolerance:
+            level = 0
+        else:
+            level = 1 + int(math.floor(math.log(tolerance/self.lod_min_tolerance, 2)))
+
+        if level != self.lod_level or self.lod_dirty:
+            self.lod_level = level
+            self._updatePolyData()
+
+    def _lodNeedsRebuild(self):
+        if self.lod_significance is None:
+            return True
+        built = len(self.lod_significance)
+        appended = (self.offset + self.end) - (self.lod_first + built)
+        dropped = (self.offset + self.start) - self.lod_first
+        return appended > LOD_REBUILD_FRACTION*built or dropped > LOD_REBUILD_FRACTION*built
+
+    def _buildLOD(self):
+        numpy_array = self.point_buffer[self.start:self.end]
+        extent = np.linalg.norm(np.max(numpy_array, axis=0) - np.min(numpy_array, axis=0))
+        self.lod_min_tolerance = max(LOD_MIN_TOLERANCE*extent, 1e-12)
+        self.lod_significance = _douglasPeuckerSignificance(numpy_array, self.lod_min_tolerance)
+        self.lod_first = self.offset + self.start
+        self.lod_level_ids = {}
+        self.lod_dirty = True
+
+    def _getLODIds(self, level):
+        # local point ids of the polyline at this level - level 0 is full resolution, level k has tolerance min_tolerance*2^(k-1)
+        if level == 0 or self.lod_significance is None:
+            return None
+        if level not in self.lod_level_ids:
+            tolerance = self.lod_min_tolerance*2**(level-1)
+            self.lod_level_ids[level] = self.lod_first + np.flatnonzero(self.lod_significance >= tolerance)
+        global_start = self.offset + self.start
+        global_built_end = self.lod_first + len(self.lod_significance)
+        ids = self.lod_level_ids[level]
+        ids = ids[ids >= global_start] - global_start
+        tail = np.arange(max(global_built_end, global_start), self.offset + self.end) - global_start
+        return np.concatenate((ids, tail))
+
+    def _reserve(self, num_new):
+        # make room for num_new points after end - compact the window to the front of the buffers, and double their capacity
+        # whenever the window would fill more than half of them, so each point is moved O(1) times on average
+        capacity = len(self.point_buffer)
+        if self.end + num_new <= capacity:
+            return
+        count = self.end - self.start
+        new_capacity = capacity
+        while count + num_new > new_capacity//2:
+            new_capacity *= 2
+
+        point_buffer = np.zeros((new_capacity, 3))
+        point_buffer[:count] = self.point_buffer[self.start:self.end]
+        self.point_buffer = point_buffer
+        if self.color_buffer is not None:
+            color_buffer = np.empty((new_capacity, np.shape(self.color_buffer)[1]), dtype=self.color_buffer.dtype)
+            color_buffer[:count] = self.color_buffer[self.start:self.end]
+            self.color_buffer = color_buffer
+        if new_capacity != capacity:
+            self.id_buffer = np.arange(-1, new_capacity, dtype=nps.ID_TYPE_CODE)
+        self.offset += self.start
+        self.start = 0
+        self.end = count
+
+    def _updatePolyData(self, lod_cells=True):
+        # the vtk arrays reference the numpy buffers directly (deep=0), so only the window bounds are handed over - the
+        # cells of a simplified level cost O(level points) to gather, so without lod_cells they are only marked dirty, and
+        # UpdateLOD (called by the canvas before every frame) rebuilds them once - until then the previous ids stay valid,
+        # since appending never shrinks the window
+        count = self.end - self.start
+        self.points.SetData(nps.numpy_to_vtk(self.point_buffer[self.start:self.end], deep=0))
+
+        if self.lod_level > 0 and self.lod_significance is not None:
+            if lod_cells:
+                lod_ids = self._getLODIds(self.lod_level)
+                self.lod_id_buffer = np.empty(len(lod_ids)+1, dtype=nps.ID_TYPE_CODE)
+                self.lod_id_buffer[0] = len(lod_ids)
+                self.lod_id_buffer[1:] = lod_ids
+                self.lines.SetCells(1, nps.numpy_to_vtkIdTypeArray(self.lod_id_buffer, deep=0))
+                self.lod_dirty = False
+            else:
+                self.lod_dirty = True
+        elif count >= 2:
+            self.id_buffer[0] = count
+            self.lines.SetCells(1, nps.numpy_to_vtkIdTypeArray(self.id_buffer[:count+1], deep=0))
+            self.lod_dirty = False
+        else:
+            self.lines.Reset()
+            self.lod_dirty = False
+
+        if self.color_buffer is not None:
+            colors = nps.numpy_to_vtk(self.color_buffer[self.start:self.end], deep=0)
+            colors.SetName("Colors")
+            self.polydata.GetPointData().SetScalars(colors)
+
+        self.polydata.Modified()
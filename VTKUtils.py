@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+numpy to vtk conversion utilities
+'''
+
+''' standard libs '''
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+def numpyToCellArray(numpy_cell_ids, cells=None):
+    '''
+    Given an (N x cell size) array of point ids - every cell has the same size - build a vtkCellArray in bulk, or refill
+    cells if one is given (i.e. the cell array of an existing polydata).
+    '''
+    num_cells, cell_size = np.shape(numpy_cell_ids)
+    connectivity = np.empty((num_cells, cell_size+1), dtype=nps.ID_TYPE_CODE)
+    connectivity[:,0] = cell_size
+    connectivity[:,1:] = numpy_cell_ids
+
+    if cells is None:
+        cells = vtk.vtkCellArray()
+    cells.SetCells(num_cells, nps.numpy_to_vtkIdTypeArray(connectivity.ravel(), deep=1))
+
+    return cells
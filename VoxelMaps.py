@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+voxel map classes
+'''
+
+''' standard libs '''
+import math
+import warnings
+import numpy as np
+
+''' VTK '''
+import vtk
+from vtk.util import numpy_support as nps
+
+''' voxel map parameters '''
+VOXELMAP_BLOCK_SIZE = 16        # voxels per block side - blocks are allocated on first insert, and are the unit of geometry rebuilds
+
+# corners of the face of a unit voxel in each of the 6 axis directions, counter-clockwise seen from outside
+_FACE_DIRECTIONS = np.array([[1,0,0], [-1,0,0], [0,1,0], [0,-1,0], [0,0,1], [0,0,-1]])
+_FACE_CORNERS = np.array([[[1,0,0], [1,1,0], [1,1,1], [1,0,1]],
+                          [[0,0,0], [0,0,1], [0,1,1], [0,1,0]],
+                          [[0,1,0], [0,1,1], [1,1,1], [1,1,0]],
+                          [[0,0,0], [1,0,0], [1,0,1], [0,0,1]],
+                          [[0,0,1], [1,0,1], [1,1,1], [0,1,1]],
+                          [[0,0,0], [0,1,0], [1,1,0], [1,0,0]]])
+
+class VoxelBlock(object):
+    ''' a cube of VOXELMAP_BLOCK_SIZE^3 voxels and the actor that draws their exposed faces '''
+    def __init__(self, block_size):
+        self.occupied = np.zeros((block_size, block_size, block_size), dtype=bool)
+        self.colors = None
+        self.actor = None
+
+class VoxelMap(vtk.vtkAssembly):
+    ''' a sparse 3D occupancy map - occupied voxels are stored in blocks found through a hash of block coordinates '''
+    def __init__(self, voxel_size, origin=(0.0, 0.0, 0.0), block_size=VOXELMAP_BLOCK_SIZE):
+        # voxel (i, j, k) covers origin + [i, i+1) x [j, j+1) x [k, k+1) * voxel_size
+        self.voxel_size = float(voxel_size)
+        self.origin = np.array(origin, dtype=float)
+        self.block_size = block_size
+        self.blocks = {}
+
+        # all blocks share one property, so the actor properties dock treats the voxel map like a single actor
+        self.property = vtk.vtkProperty()
+
+    def GetProperty(self):
+        return self.property
+
+    def SetTexture(self, texture):
+        # voxels are untextured
+        pass
+
+    def GetNumberOfVoxels(self):
+        return sum([np.count_nonzero(block.occupied) for block in self.blocks.itervalues()])
+
+    def PointsToIndices(self, numpy_array):
+        # voxel indices of the voxels containing the (N x 3) points
+        return np.floor((np.asarray(numpy_array, dtype=float) - self.origin)/self.voxel_size).astype(int)
+
+    def Insert(self, index_array, color_array=None):
+        # mark the (N x 3) voxel indices as occupied, optionally with (N x 3) uint8 colors
+        self._update(index_array, True, color_array)
+
+    def Clear(self, index_array=None):
+        # mark the (N x 3) voxel indices as free - with no indices, the whole map is cleared
+        if index_array is None:
+            for block in self.blocks.itervalues():
+                self.RemovePart(block.actor)
+            self.blocks = {}
+            self.Modified()
+            return
+        self._update(index_array, False, None)
+
+    def _update(self, index_array, occupied, color_array):
+        index_array = np.atleast_2d(np.asarray(index_array, dtype=int))
+        if np.shape(index_array)[0] == 3 and np.shape(index_array)[1] != 3:
+            index_array = np.transpose(index_array)
+        if color_array is not None:
+            color_array = np.atleast_2d(np.asarray(color_array, dtype=np.uint8))
+            if np.shape(color_array)[0] == 3 and np.shape(color_array)[1] != 3:
+                color_array = np.transpose(color_array)
+        if len(index_array) == 0:
+            return
+
+        # group the voxels by block - floor division keeps negative indices in the right block
+        block_coords = index_array//self.block_size
+        local_coords = index_array - block_coords*self.block_size
+        # a stable lexsort over the block columns, rather than np.unique over rows (numpy >= 1.13 only)
+        order = np.lexsort((block_coords[:,2], block_coords[:,1], block_coords[:,0]))
+        sorted_blocks = block_coords[order]
+        splits = np.flatnonzero(np.any(sorted_blocks[1:] != sorted_blocks[:-1], axis=1)) + 1
+        unique_blocks = sorted_blocks[np.concatenate(([0], splits))]
+
+        for block_coord, voxel_ids in zip(unique_blocks, np.split(order, splits)):
+            key = tuple(block_coord.tolist())
+            block = self.blocks.get(key)
+            if block is None:
+                if not occupied:
+                    # clearing voxels of a block that was never allocated
+                    continue
+                block = VoxelBlock(self.block_size)
+                self.blocks[key] = block
+            i, j, k = local_coords[voxel_ids,0], local_coords[voxel_ids,1], local_coords[voxel_ids,2]
+            block.occupied[i, j, k] = occupied
+            if color_array is not None:
+                if block.colors is None:
+                    block.colors = np.empty(np.shape(block.occupied) + (3,), dtype=np.uint8)
+                    block.colors[:] = 255
+                block.colors[i, j, k] = color_array[voxel_ids,0:3]
+            self._rebuildBlock(key, block)
+        self.Modified()
+
+    def _rebuildBlock(self, key, block):
+        # regenerate the exposed faces of one block - faces on the block border are always drawn, so blocks never depend on their neighbours
+        if not np.any(block.occupied):
+            if block.actor is not None:
+                self.RemovePart(block.actor)
+            del self.blocks[key]
+            return
+
+        padded = np.pad(block.occupied, 1, mode='constant')
+        n = self.block_size
+        all_points = []
+        all_colors = []
+        for direction, corners in zip(_FACE_DIRECTIONS, _FACE_CORNERS):
+            dx, dy, dz = direction
+            neighbours = padded[1+dx:n+1+dx, 1+dy:n+1+dy, 1+dz:n+1+dz]
+            voxels = np.argwhere(block.occupied & ~neighbours)
+            if len(voxels) == 0:
+                continue
+            all_points.append((voxels[:,None,:] + corners[None,:,:]).reshape(-1, 3))
+            if block.colors is not None:
+                all_colors.append(block.colors[voxels[:,0], voxels[:,1], voxels[:,2]])
+
+        block_origin = self.origin + np.array(key)*self.block_size*self.voxel_size
+        points = block_origin + np.vstack(all_points)*self.voxel_size
+        num_faces = len(points)//4
+        cell_ids = np.empty((num_faces, 5), dtype=nps.ID_TYPE_CODE)
+        cell_ids[:,0] = 4
+        cell_ids[:,1:] = np.arange(4*num_faces).reshape(num_faces, 4)
+
+        vtk_points = vtk.vtkPoints()
+        vtk_points.SetData(nps.numpy_to_vtk(points, deep=1))
+        cells = vtk.vtkCellArray()
+        cells.SetCells(num_faces, nps.numpy_to_vtkIdTypeArray(cell_ids.ravel(), deep=1))
+        polydata = vtk.vtkPolyData()
+        polydata.SetPoints(vtk_points)
+        polydata.SetPolys(cells)
+        if block.colors is not None:
+            colors = nps.numpy_to_vtk(np.ascontiguousarray(np.vstack(all_colors)), deep=1)
+            colors.SetName("Colors")
+            polydata.GetCellData().SetScalars(colors)
+
+        if block.actor is None:
+            block.actor = vtk.vtkActor()
+            block.actor.SetMapper(vtk.vtkPolyDataMapper())
+            block.actor.SetProperty(self.property)
+            self.AddPart(block.actor)
+        block.actor.GetMapper().SetInput(polydata)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+octree build tests - run with python -m unittest discover tests
+'''
+
+''' standard libs '''
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+try:
+    import OctreePointClouds
+    import BuildPointCloudOctree
+except ImportError:
+    BuildPointCloudOctree = None
+
+@unittest.skipIf(BuildPointCloudOctree is None, 'needs vtk')
+class BuildOctreeTest(unittest.TestCase):
+    def setUp(self):
+        self.octree_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.octree_dir)
+
+    def test_root_covers_sorted_input(self):
+        # a survey ordered by scan line - every chunk covers a thin strip of x, so nodes filled in input order would
+        # only hold the first strip
+        np.random.seed(0)
+        points = np.random.random_sample((200000, 3))*[100.0, 100.0, 1.0]
+        points = points[np.argsort(points[:,0])]
+        index = BuildPointCloudOctree.buildOctree(points, None, self.octree_dir, node_capacity=2000, chunk_size=10000)
+
+        self.assertEqual(sum(index['nodes'].values()), len(points))
+        root, _ = OctreePointClouds.loadNode(self.octree_dir, OctreePointClouds.OCTREE_ROOT, False)
+        root = root + index['offset']
+        self.assertEqual(len(root), 2000)
+        # the root spans the whole survey, and holds about as many points in every tenth of it
+        self.assertLess(np.min(root[:,0]), 2.0)
+        self.assertGreater(np.max(root[:,0]), 98.0)
+        counts = np.histogram(root[:,0], bins=10, range=(0.0, 100.0))[0]
+        self.assertGreater(np.min(counts), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+# Author: Nick R. Rypkema (rypkema@mit.edu)
+# License: MIT
+
+'''
+The LightField Visualizer - a VTK/PyQt4-based lightweight field robotics viewer
+-------------------------------------------------------------------------------
+primitive tests - run with python -m unittest discover tests
+'''
+
+''' standard libs '''
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+try:
+    import vtk
+    from vtk.util import numpy_support as nps
+    import Primitives
+except ImportError:
+    vtk = None
+
+@unittest.skipIf(vtk is None, 'needs vtk')
+class MeshTest(unittest.TestCase):
+    def test_single_triangle(self):
+        # (3 x 3) vertices and a (1 x 3) face - the vertices must not be mistaken for a (3 x N) array
+        vertices = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 2.0, 0.0]])
+        faces = np.array([[0, 1, 2]])
+        polydata = Primitives.Mesh(vertices, faces).GetMapper().GetInput()
+        np.testing.assert_allclose(nps.vtk_to_numpy(polydata.GetPoints().GetData()), vertices)
+        self.assertEqual(polydata.GetNumberOfPolys(), 1)
+        np.testing.assert_array_equal(nps.vtk_to_numpy(polydata.GetPolys().GetData()), [3, 0, 1, 2])
+
+    def test_three_faces(self):
+        # (3 x 3) faces are three triangles, one per row
+        vertices = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+        faces = np.array([[0, 1, 2], [0, 1, 3], [0, 2, 3]])
+        polydata = Primitives.Mesh(vertices, faces).GetMapper().GetInput()
+        self.assertEqual(polydata.GetNumberOfPolys(), 3)
+        np.testing.assert_array_equal(nps.vtk_to_numpy(polydata.GetPolys().GetData()).reshape(3, 4)[:,1:], faces)
+
+if __name__ == '__main__':
+    unittest.main()